@@ -0,0 +1,85 @@
+"""Microbenchmarks of the JSON paths replaced by `transcript_api.serialization`.
+
+Run from the service directory:
+
+    GROQ_API_KEY=unused uv run python benchmarks/bench_serialization.py
+"""
+
+import json
+import timeit
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from transcript_api.models import BatchAssistantMessageResponse
+from transcript_api.serialization import FastJSONResponse, dumps, loads
+
+NUMBER = 2000
+
+
+class Event(BaseModel):
+    id: str
+    occurred_on_utc: datetime
+    request_id: str
+    status: str
+    progress_percentage: int
+    message: str | None
+
+
+EVENT = Event(
+    id=str(uuid4()),
+    occurred_on_utc=datetime.now(timezone.utc),
+    request_id=str(uuid4()),
+    status="transcribing",
+    progress_percentage=50,
+    message="Transcribing audio chunks",
+)
+EVENT_BYTES = EVENT.model_dump_json().encode()
+
+# A chat history page: the largest payload the API renders
+PAYLOAD = {
+    "messages": [
+        {"role": "user" if i % 2 else "assistant", "content": "lorem ipsum dolor sit amet " * 20, "message_id": i}
+        for i in range(200)
+    ]
+}
+# The largest response of a hot endpoint
+BATCH_RESPONSE = BatchAssistantMessageResponse(
+    responses=[{"message": "lorem ipsum dolor sit amet " * 40, "clip_path": None} for _ in range(20)]
+)
+
+
+def bench(label: str, fn) -> float:
+    seconds = min(timeit.repeat(fn, number=NUMBER, repeat=5)) / NUMBER
+    print(f"  {label:<48} {seconds * 1e6:>9.1f} us")
+    return seconds
+
+
+def main():
+    print("Response rendering")
+    # FastAPI encodes the endpoint result before rendering it, unless the endpoint returns a response
+    baseline = bench("JSONResponse(jsonable_encoder(model))", lambda: JSONResponse(jsonable_encoder(BATCH_RESPONSE)))
+    fast = bench("FastJSONResponse(model)", lambda: FastJSONResponse(BATCH_RESPONSE))
+    print(f"  speedup x{baseline / fast:.1f}")
+
+    print("Event encoding")
+    baseline = bench("model.json().encode()", lambda: EVENT.model_dump_json().encode())
+    fast = bench("dumps(model)", lambda: dumps(EVENT))
+    print(f"  speedup x{baseline / fast:.1f}")
+
+    print("Event decoding")
+    baseline = bench("Model(**json.loads(body.decode()))", lambda: Event(**json.loads(EVENT_BYTES.decode())))
+    fast = bench("Model.model_validate_json(body)", lambda: Event.model_validate_json(EVENT_BYTES))
+    print(f"  speedup x{baseline / fast:.1f}")
+
+    print("Plain payloads")
+    baseline = bench("json.loads(json.dumps(payload))", lambda: json.loads(json.dumps(PAYLOAD)))
+    fast = bench("loads(dumps(payload))", lambda: loads(dumps(PAYLOAD)))
+    print(f"  speedup x{baseline / fast:.1f}")
+
+
+if __name__ == "__main__":
+    main()
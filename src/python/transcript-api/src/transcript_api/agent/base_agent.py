@@ -4,6 +4,8 @@ from fastmcp import Client
 from loguru import logger
 
 from transcript_api.agent.memory import Memory
+from transcript_api.mcp_transport import get_mcp_transport
+from transcript_api.metrics import timed_stage
 
 
 class BaseAgent(ABC):
@@ -19,7 +21,7 @@ class BaseAgent(ABC):
         disable_tools: list = None,
     ):
         self.name = name
-        self.mcp_client = Client(mcp_server)
+        self.mcp_client = Client(get_mcp_transport(mcp_server))
         self.memory = memory if memory else Memory(name)
         self.disable_tools = disable_tools if disable_tools else []
         
@@ -63,6 +65,7 @@ class BaseAgent(ABC):
         """
         return [tool for tool in tools if tool.name not in self.disable_tools]
 
+    @timed_stage("discover_tools")
     async def discover_tools(self) -> list:
         """
         Discover and register available tools from the MCP server.
@@ -100,6 +103,7 @@ class BaseAgent(ABC):
     async def _get_tools(self) -> list:
         raise NotImplementedError("Tools are not implemented in the base class.")
     
+    @timed_stage("call_tool")
     async def call_tool(self, function_name: str, function_args: dict) -> str:
         async with self.mcp_client as _:
             mcp_response = await self.mcp_client.call_tool(function_name, function_args)
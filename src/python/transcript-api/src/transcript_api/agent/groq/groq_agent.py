@@ -1,24 +1,27 @@
+import asyncio
 import json
 import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 import instructor
-import opik
 from groq import Groq
 from loguru import logger
-from opik import opik_context
 
 from transcript_api.agent.base_agent import BaseAgent
+from transcript_api.agent.groq.groq_rate_limiter import rate_limiter
 from transcript_api.agent.groq.groq_tool import transform_tool_definition
+from transcript_api.agent.history import ChatHistoryManager, truncate_to_tokens
 from transcript_api.agent.memory import Memory, MemoryRecord
 from transcript_api.config import get_settings
+from transcript_api.metrics import timed_stage
 from transcript_api.models import (
     AssistantMessageResponse,
     GeneralResponseModel,
     RoutingResponseModel,
     VideoClipResponseModel,
 )
+from transcript_api.opik_utils import track, update_current_trace
 
 logger.bind(name="GroqAgent")
 
@@ -39,24 +42,30 @@ class GroqAgent(BaseAgent):
             memory,
             disable_tools,
         )
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        self.client = Groq(
+            api_key=settings.GROQ_API_KEY,
+            http_client=rate_limiter.http_client(),
+            max_retries=settings.GROQ_MAX_RETRIES,
+        )
         self.instructor_client = instructor.from_groq(self.client, mode=instructor.Mode.JSON)
         self.thread_id = str(uuid.uuid4())
+        self.history = ChatHistoryManager(self.memory, self._summarize_history)
 
     async def _get_tools(self) -> List[Dict[str, Any]]:
         tools = await self.discover_tools()
         return [transform_tool_definition(tool) for tool in tools]
 
-    @opik.track(name="build-chat-history")
+    @track(name="build-chat-history")
     def _build_chat_history(
         self,
         system_prompt: str,
         user_message: str,
         image_base64: Optional[str] = None,
         n: int = settings.AGENT_MEMORY_SIZE,
+        model: str = settings.GROQ_GENERAL_MODEL,
     ) -> List[Dict[str, Any]]:
         history = [{"role": "system", "content": system_prompt}]
-        history += [{"role": record.role, "content": record.content} for record in self.memory.get_latest(n)]
+        history += self.history.get_history(model, n)
 
         user_content = (
             [
@@ -72,7 +81,37 @@ class GroqAgent(BaseAgent):
         history.append({"role": "user", "content": user_content})
         return history
 
-    @opik.track(name="router", type="llm")
+    def _summarize_history(self, summary: str, records: List[MemoryRecord]) -> str:
+        """Fold older conversation records into the rolling summary."""
+        conversation = "\n".join(
+            f"{record.role}: {truncate_to_tokens(record.content, settings.AGENT_HISTORY_MAX_MESSAGE_TOKENS)}"
+            for record in records
+        )
+        messages = [
+            {
+                "role": "system",
+                "content": "You maintain a short running summary of a conversation between a user and Transcript, "
+                "a video assistant. Merge the new messages into the current summary. Keep facts, user preferences "
+                "and the videos or moments discussed, drop pleasantries. Answer with the updated summary only.",
+            },
+            {
+                "role": "user",
+                "content": f"Current summary:\n{summary or 'None'}\n\nNew messages:\n{conversation}",
+            },
+        ]
+        response = self.client.chat.completions.create(
+            model=settings.GROQ_SUMMARY_MODEL,
+            messages=messages,
+            max_completion_tokens=settings.AGENT_HISTORY_SUMMARY_MAX_TOKENS,
+        )
+        return response.choices[0].message.content
+
+    def reset_memory(self):
+        super().reset_memory()
+        self.history.reset()
+
+    @track(name="router", type="llm")
+    @timed_stage("router")
     def _should_use_tool(self, message: str) -> bool:
         messages = [
             {"role": "system", "content": self.routing_system_prompt},
@@ -99,18 +138,48 @@ class GroqAgent(BaseAgent):
         logger.info(f"Executing tool: {function_name}")
 
         try:
-            return await self.call_tool(function_name, function_args)
+            return await asyncio.wait_for(
+                self.call_tool(function_name, function_args),
+                timeout=settings.TOOL_CALL_TIMEOUT_SECONDS,
+            )
+        except TimeoutError:
+            logger.error(f"Tool {function_name} timed out after {settings.TOOL_CALL_TIMEOUT_SECONDS} seconds")
+            return f"Error executing tool {function_name}: timed out after {settings.TOOL_CALL_TIMEOUT_SECONDS} seconds"
         except Exception as e:
             logger.error(f"Error executing tool {function_name}: {str(e)}")
             return f"Error executing tool {function_name}: {str(e)}"
 
-    @opik.track(name="tool-use", type="tool")
-    async def _run_with_tool(self, message: str, video_path: str, image_base64: str | None = None) -> str:
-        """Execute chat completion with tool usage."""
+    async def _execute_tool_calls(
+        self, tool_calls: List[Any], video_path: str, image_base64: str | None = None
+    ) -> List[str]:
+        """Execute tool calls concurrently and return their responses in call order."""
+        semaphore = asyncio.Semaphore(settings.TOOL_CALL_MAX_CONCURRENCY)
+
+        async def _bounded_call(tool_call: Any) -> str:
+            async with semaphore:
+                return await self._execute_tool_call(tool_call, video_path, image_base64)
+
+        # Keep one MCP session open so the concurrent calls share it instead of reconnecting
+        async with self.mcp_client:
+            return await asyncio.gather(*(_bounded_call(tool_call) for tool_call in tool_calls))
+
+    @staticmethod
+    def _format_tool_responses(tool_calls: List[Any], function_responses: List[str]) -> str:
+        """Merge the responses of all tool calls into a single follow-up context."""
+        if len(function_responses) == 1:
+            return function_responses[0]
+        return "\n\n".join(
+            f"Result of {tool_call.function.name}:\n{function_response}"
+            for tool_call, function_response in zip(tool_calls, function_responses)
+        )
+
+    @timed_stage("tool_selection")
+    def _select_tool_calls(self, message: str, image_base64: str | None = None) -> Any:
+        """Ask the tool-use model which tools to call for a message."""
         tool_use_system_prompt = self.tool_use_system_prompt.format(
             is_image_provided=bool(image_base64),
         )
-        chat_history = self._build_chat_history(tool_use_system_prompt, message)
+        chat_history = self._build_chat_history(tool_use_system_prompt, message, model=settings.GROQ_TOOL_USE_MODEL)
 
         response = (
             self.client.chat.completions.create(
@@ -123,29 +192,14 @@ class GroqAgent(BaseAgent):
             .choices[0]
             .message
         )
-        tool_calls = response.tool_calls
-        logger.info(f"Tool calls: {tool_calls}")
+        logger.info(f"Tool calls: {response.tool_calls}")
+        return response
 
-        if not tool_calls:
-            logger.info("No tool calls available, returning general response ...")
-            return GeneralResponseModel(message=response.content)
-
-        for tool_call in tool_calls:
-            function_response = await self._execute_tool_call(tool_call, video_path, image_base64)
-            logger.info(f"Function response: {function_response}")
-
-            chat_history.append(
-                {
-                    "tool_call_id": tool_call.id,
-                    "role": "tool",
-                    "name": tool_call.function.name,
-                    "content": function_response,
-                }
-            )
-
-        response_model = (
-            GeneralResponseModel if tool_call.function.name == "ask_question_about_video" else VideoClipResponseModel
-        )
+    @timed_stage("follow_up")
+    def _follow_up(self, message: str, tool_calls: List[Any], function_responses: List[str]):
+        """Turn the tool responses into the final structured answer."""
+        only_questions = all(tool_call.function.name == "ask_question_about_video" for tool_call in tool_calls)
+        response_model = GeneralResponseModel if only_questions else VideoClipResponseModel
 
         # TODO: Prompt need to be improved, tool-calling history + general response confuse the LLM
         tmp_chat = [
@@ -154,52 +208,78 @@ class GroqAgent(BaseAgent):
                 "content": "Your name is Transcript, an AI assistant. You are helpful, creative, and friendly. The context you have contains informations about what's happening in a video, you will answer the user's question in a detailed manner.",
             },
             {"role": "user", "content": message},
-            {"role": "assistant", "content": function_response},
+            {"role": "assistant", "content": self._format_tool_responses(tool_calls, function_responses)},
         ]
-        followup_response = self.instructor_client.chat.completions.create(
+        return self.instructor_client.chat.completions.create(
             model=settings.GROQ_GENERAL_MODEL,
             messages=tmp_chat,
             response_model=response_model,
         )
 
-        return followup_response
+    @track(name="tool-use", type="tool")
+    @timed_stage("tool_use")
+    async def _run_with_tool(self, message: str, video_path: str, image_base64: str | None = None) -> str:
+        """Execute chat completion with tool usage."""
+        response = await asyncio.to_thread(self._select_tool_calls, message, image_base64)
+        tool_calls = response.tool_calls
 
-    @opik.track(name="generate-response", type="llm")
+        if not tool_calls:
+            logger.info("No tool calls available, returning general response ...")
+            return GeneralResponseModel(message=response.content)
+
+        function_responses = await self._execute_tool_calls(tool_calls, video_path, image_base64)
+        for tool_call, function_response in zip(tool_calls, function_responses):
+            logger.info(f"Function response ({tool_call.function.name}): {function_response}")
+
+        return await asyncio.to_thread(self._follow_up, message, tool_calls, function_responses)
+
+    @track(name="generate-response", type="llm")
+    @timed_stage("general_response")
     def _respond_general(self, message: str) -> str:
-        chat_history = self._build_chat_history(self.general_system_prompt, message)
+        chat_history = self._build_chat_history(self.general_system_prompt, message, model=settings.GROQ_GENERAL_MODEL)
         return self.instructor_client.chat.completions.create(
             model=settings.GROQ_GENERAL_MODEL,
             messages=chat_history,
             response_model=GeneralResponseModel,
         )
 
+    @staticmethod
+    def _memory_record(role: str, content: str) -> MemoryRecord:
+        return MemoryRecord(
+            message_id=str(uuid.uuid4()),
+            role=role,
+            content=content,
+            timestamp=datetime.now(),
+        )
+
     def _add_to_memory(self, role: str, content: str) -> None:
         """Add a message to the agent's memory."""
-        self.memory.insert(
-            MemoryRecord(
-                message_id=str(uuid.uuid4()),
-                role=role,
-                content=content,
-                timestamp=datetime.now(),
-            )
-        )
+        self.memory.insert(self._memory_record(role, content))
 
-    @opik.track(name="memory-insertion", type="general")
+    @track(name="memory-insertion", type="general")
     def _add_memory_pair(self, user_message: str, assistant_message: str) -> None:
-        self._add_to_memory("user", user_message)
-        self._add_to_memory("assistant", assistant_message)
+        self.memory.insert_many(
+            [
+                self._memory_record("user", user_message),
+                self._memory_record("assistant", assistant_message),
+            ]
+        )
 
-    @opik.track(name="chat", type="general")
+    @track(name="chat", type="general", root=True)
     async def chat(
         self,
         message: str,
         video_path: Optional[str] = None,
         image_base64: Optional[str] = None,
     ) -> AssistantMessageResponse:
-        """Main entry point for processing a user message."""
-        opik_context.update_current_trace(thread_id=self.thread_id)
+        """Main entry point for processing a user message.
 
-        tool_required = video_path and self._should_use_tool(message)
+        The Groq client is synchronous and may wait for rate limit budget, so its completions
+        run in worker threads rather than on the event loop.
+        """
+        update_current_trace(thread_id=self.thread_id)
+
+        tool_required = video_path and await asyncio.to_thread(self._should_use_tool, message)
         logger.info(f"Tool required: {tool_required}")
 
         if tool_required:
@@ -207,8 +287,103 @@ class GroqAgent(BaseAgent):
             response = await self._run_with_tool(message, video_path, image_base64)
         else:
             logger.info("Running general response")
-            response = self._respond_general(message)
+            response = await asyncio.to_thread(self._respond_general, message)
 
         self._add_memory_pair(message, response.message)
 
-        return AssistantMessageResponse(**response.dict())
+        return AssistantMessageResponse(**response.model_dump())
+
+    async def _ask_questions(self, tool_calls: List[Any], video_path: str) -> List[str]:
+        """Answer several `ask_question_about_video` calls with a single batched MCP search."""
+        user_queries = [json.loads(tool_call.function.arguments).get("user_query", "") for tool_call in tool_calls]
+        try:
+            batch_response = await asyncio.wait_for(
+                self.call_tool(
+                    "ask_questions_about_video",
+                    {"video_path": video_path, "user_queries": user_queries},
+                ),
+                timeout=settings.TOOL_CALL_TIMEOUT_SECONDS,
+            )
+            answers = json.loads(batch_response)["answers"]
+        except Exception as e:
+            logger.error(f"Error executing batched questions: {str(e)}")
+            return [f"Error executing tool ask_question_about_video: {str(e)}"] * len(tool_calls)
+        return [json.dumps({"answer": answer}) for answer in answers]
+
+    @track(name="chat-batch", type="general", root=True)
+    async def chat_batch(self, messages: List[str], video_path: str) -> List[AssistantMessageResponse]:
+        """Answer many messages about the same video in one pass.
+
+        Routing, tool selection and follow-up completions run concurrently, bounded by
+        BATCH_CHAT_MAX_CONCURRENCY, and every question-style tool call is resolved through
+        a single batched search against the video index.
+        """
+        update_current_trace(thread_id=self.thread_id)
+        semaphore = asyncio.Semaphore(settings.BATCH_CHAT_MAX_CONCURRENCY)
+
+        async def _bounded(fn, *args):
+            async with semaphore:
+                return await asyncio.to_thread(fn, *args)
+
+        tool_required = await asyncio.gather(*(_bounded(self._should_use_tool, message) for message in messages))
+        logger.info(f"Batch of {len(messages)} messages, {sum(tool_required)} require tools")
+
+        routed = [idx for idx, required in enumerate(tool_required) if required]
+        selections = await asyncio.gather(*(_bounded(self._select_tool_calls, messages[idx]) for idx in routed))
+        tool_calls_by_message: Dict[int, List[Any]] = {}
+        responses: Dict[int, Any] = {}
+        for idx, response in zip(routed, selections):
+            if response.tool_calls:
+                tool_calls_by_message[idx] = response.tool_calls
+            else:
+                responses[idx] = GeneralResponseModel(message=response.content)
+
+        question_calls = [
+            (idx, tool_call)
+            for idx, tool_calls in tool_calls_by_message.items()
+            for tool_call in tool_calls
+            if tool_call.function.name == "ask_question_about_video"
+        ]
+        other_calls = [
+            (idx, tool_call)
+            for idx, tool_calls in tool_calls_by_message.items()
+            for tool_call in tool_calls
+            if tool_call.function.name != "ask_question_about_video"
+        ]
+
+        async with self.mcp_client:
+            question_responses, other_responses = await asyncio.gather(
+                self._ask_questions([tool_call for _, tool_call in question_calls], video_path)
+                if question_calls
+                else asyncio.sleep(0, result=[]),
+                self._execute_tool_calls([tool_call for _, tool_call in other_calls], video_path)
+                if other_calls
+                else asyncio.sleep(0, result=[]),
+            )
+
+        function_responses = {
+            (idx, tool_call.id): function_response
+            for (idx, tool_call), function_response in zip(
+                question_calls + other_calls, list(question_responses) + list(other_responses)
+            )
+        }
+
+        async def _answer(idx: int, message: str):
+            if idx in responses:
+                return responses[idx]
+            if idx in tool_calls_by_message:
+                tool_calls = tool_calls_by_message[idx]
+                return await _bounded(
+                    self._follow_up,
+                    message,
+                    tool_calls,
+                    [function_responses[(idx, tool_call.id)] for tool_call in tool_calls],
+                )
+            return await _bounded(self._respond_general, message)
+
+        answers = await asyncio.gather(*(_answer(idx, message) for idx, message in enumerate(messages)))
+
+        for message, answer in zip(messages, answers):
+            self._add_memory_pair(message, answer.message)
+
+        return [AssistantMessageResponse(**answer.model_dump()) for answer in answers]
@@ -0,0 +1,267 @@
+import json
+import math
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import groq
+import httpx
+from groq import DefaultHttpxClient
+from loguru import logger
+
+from transcript_api.agent.history import estimate_tokens
+from transcript_api.config import get_settings
+from transcript_api.serialization import loads
+
+logger = logger.bind(name="GroqRateLimiter")
+
+settings = get_settings()
+
+# Images are billed at a fixed cost rather than by the size of their base64 payload
+IMAGE_TOKENS = 1000
+# Completions rarely use their whole max_completion_tokens. Reserving it would starve small
+# TPM budgets, the remaining-tokens header corrects the estimate after each response
+EXPECTED_COMPLETION_TOKENS = 512
+
+DURATION_PATTERN = re.compile(r"(?:(\d+(?:\.\d+)?)h)?(?:(\d+(?:\.\d+)?)m(?!s))?(?:(\d+(?:\.\d+)?)s)?(?:(\d+(?:\.\d+)?)ms)?")
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse a Groq reset duration such as `2m59.56s`, `7.66s` or `120ms` into seconds."""
+    match = DURATION_PATTERN.fullmatch(value.strip())
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes, seconds, millis = (float(group) if group else 0.0 for group in match.groups())
+    return hours * 3600 + minutes * 60 + seconds + millis / 1000
+
+
+class RateLimitWaitExceeded(Exception):
+    """The budgets of a model won't allow a request within GROQ_MAX_RATE_LIMIT_WAIT_SECONDS."""
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"Groq rate limit budget of {model} exhausted, retry in {retry_after:.0f}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+def rate_limit_retry_after(error: BaseException) -> Optional[float]:
+    """Find a Groq rate limit error behind an exception, and return the seconds to wait before retrying.
+
+    The SDK error may be wrapped, e.g. by instructor's retries, so its causes and arguments are
+    searched too. Returns None if the exception wasn't caused by a rate limit.
+    """
+    seen = set()
+    pending = [error]
+    while pending:
+        current = pending.pop()
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, groq.RateLimitError):
+            try:
+                return float(current.response.headers.get("retry-after", ""))
+            except ValueError:
+                return 1.0
+        pending += [current.__cause__, current.__context__]
+        pending += [arg for arg in current.args if isinstance(arg, BaseException)]
+    return None
+
+
+class TokenBucket:
+    """A bucket refilled continuously up to a per-minute limit."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds to wait until `amount` can be taken. Requests above capacity wait for a full bucket."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(missing / self.rate, 0.0)
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, remaining: float, now: float):
+        """Lower the level to what the provider reports, never raise it above our own estimate."""
+        self._refill(now)
+        self.level = min(self.level, remaining)
+
+
+class ModelRateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets of a single model.
+
+    Callers are served strictly in arrival order: a caller only takes from the budgets once
+    everyone ahead of it has, so a large request can't be starved by a stream of small ones.
+    Provider feedback (remaining tokens, `retry-after` on 429s, exhausted daily requests)
+    tightens the budgets for every caller at once. A caller that would wait longer than
+    `max_wait` seconds fails right away rather than holding its thread, e.g. until a daily reset.
+    """
+
+    def __init__(self, model: str, requests_per_minute: int, tokens_per_minute: int, max_wait: float):
+        self.model = model
+        self.max_wait = max_wait
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+        self._condition = threading.Condition()
+        self._waiters: deque[object] = deque()
+        self._blocked_until = 0.0
+
+    def acquire(self, tokens: int) -> float:
+        """Block until one request of `tokens` tokens fits the budgets, and return the time waited.
+
+        Raises:
+            RateLimitWaitExceeded: If the request can't fit the budgets within `max_wait` seconds.
+        """
+        ticket = object()
+        start = time.monotonic()
+        deadline = start + self.max_wait
+        with self._condition:
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._waiters[0] is ticket:
+                        wait = max(
+                            self._blocked_until - now,
+                            self.requests.time_until(1, now),
+                            self.tokens.time_until(tokens, now),
+                        )
+                        if wait <= 0:
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            return now - start
+                        if now + wait > deadline:
+                            raise RateLimitWaitExceeded(self.model, wait)
+                    elif self._blocked_until > deadline or now >= deadline:
+                        raise RateLimitWaitExceeded(self.model, max(self._blocked_until - now, self.max_wait))
+                    else:
+                        wait = deadline - now
+                    self._condition.wait(timeout=wait)
+            finally:
+                self._waiters.remove(ticket)
+                self._condition.notify_all()
+
+    def update(self, headers: httpx.Headers, status_code: int):
+        """Adjust the budgets from the rate limit headers of a response."""
+        now = time.monotonic()
+        with self._condition:
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_tokens and remaining_tokens.isdigit():
+                self.tokens.sync(float(remaining_tokens), now)
+
+            # Groq's request limit is per day, only its exhaustion matters at this scale
+            if headers.get("x-ratelimit-remaining-requests") == "0":
+                reset = parse_duration(headers.get("x-ratelimit-reset-requests", ""))
+                if reset:
+                    self._blocked_until = max(self._blocked_until, now + reset)
+
+            if status_code == 429:
+                retry_after = headers.get("retry-after")
+                try:
+                    delay = float(retry_after) if retry_after else None
+                except ValueError:
+                    delay = None
+                if delay is None:
+                    delay = parse_duration(headers.get("x-ratelimit-reset-tokens", "")) or 1.0
+                self._blocked_until = max(self._blocked_until, now + delay)
+                self.tokens.sync(0, now)
+                logger.warning(f"Rate limited by Groq on {self.model}, pausing all callers for {delay:.2f}s")
+
+            self._condition.notify_all()
+
+
+class GroqRateLimiter:
+    """Process-wide rate limiting of every request sent by the Groq clients.
+
+    It plugs into the HTTP client as its transport, so the plain, instructor and summarization
+    completions all draw from the same per-model budgets, including the SDK's own retries.
+    A request that can't get budget in time is answered with a local 429 that tells the SDK
+    not to retry, so it fails with a `groq.RateLimitError` right away.
+    """
+
+    def __init__(self):
+        self._limiters: Dict[str, ModelRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter_for(self, model: str) -> ModelRateLimiter:
+        with self._lock:
+            limiter = self._limiters.get(model)
+            if limiter is None:
+                limits = settings.GROQ_MODEL_RATE_LIMITS.get(model, {})
+                limiter = ModelRateLimiter(
+                    model,
+                    requests_per_minute=limits.get("rpm", settings.GROQ_DEFAULT_RPM),
+                    tokens_per_minute=limits.get("tpm", settings.GROQ_DEFAULT_TPM),
+                    max_wait=settings.GROQ_MAX_RATE_LIMIT_WAIT_SECONDS,
+                )
+                self._limiters[model] = limiter
+            return limiter
+
+    @staticmethod
+    def estimate_request_tokens(body: dict) -> int:
+        """Estimate the tokens a completion request will consume, prompt and completion included."""
+        tokens = 0
+        for message in body.get("messages", []):
+            content = message.get("content") or ""
+            if isinstance(content, str):
+                tokens += estimate_tokens(content)
+                continue
+            for part in content:
+                tokens += IMAGE_TOKENS if part.get("type") == "image_url" else estimate_tokens(part.get("text", ""))
+        if body.get("tools"):
+            tokens += estimate_tokens(json.dumps(body["tools"]))
+        max_completion_tokens = body.get("max_completion_tokens") or body.get("max_tokens") or EXPECTED_COMPLETION_TOKENS
+        return tokens + min(max_completion_tokens, EXPECTED_COMPLETION_TOKENS)
+
+    def http_client(self) -> httpx.Client:
+        """Build an HTTP client for the Groq SDK that goes through this rate limiter."""
+        return DefaultHttpxClient(transport=RateLimitedTransport(self))
+
+
+class RateLimitedTransport(httpx.HTTPTransport):
+    """HTTP transport taking each completion request's budget from a `GroqRateLimiter`."""
+
+    def __init__(self, rate_limiter: GroqRateLimiter, **kwargs):
+        super().__init__(**kwargs)
+        self.rate_limiter = rate_limiter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            body = loads(request.content)
+        except ValueError:
+            body = None
+        model = body.get("model") if isinstance(body, dict) else None
+        if not model:
+            return super().handle_request(request)
+
+        limiter = self.rate_limiter.limiter_for(model)
+        try:
+            waited = limiter.acquire(self.rate_limiter.estimate_request_tokens(body))
+        except RateLimitWaitExceeded as e:
+            logger.warning(str(e))
+            return httpx.Response(
+                429,
+                headers={"retry-after": str(math.ceil(e.retry_after)), "x-should-retry": "false"},
+                json={"error": {"message": str(e), "type": "rate_limit_exceeded"}},
+                request=request,
+            )
+        if waited > 0.1:
+            logger.info(f"Waited {waited:.2f}s for Groq rate limit budget on {model}")
+
+        response = super().handle_request(request)
+        limiter.update(response.headers, response.status_code)
+        return response
+
+
+rate_limiter = GroqRateLimiter()
@@ -0,0 +1,164 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from transcript_api.agent.memory import Memory, MemoryRecord
+from transcript_api.config import get_settings
+
+logger = logger.bind(name="ChatHistoryManager")
+
+settings = get_settings()
+
+# Rough average for English text with the Llama tokenizers, good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Truncate a piece of text so that it fits in roughly `max_tokens` tokens."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]} [truncated]"
+
+
+class ChatHistoryManager:
+    """Builds chat histories that fit a per-model token budget.
+
+    The newest memory records are kept verbatim (each one capped at
+    AGENT_HISTORY_MAX_MESSAGE_TOKENS) until the budget is spent. Older records are folded
+    into a rolling summary by a background worker, so summarization never sits on the
+    request path: until a summary is ready the overflowing records are simply left out.
+    The records that overflow the budget, or slid out of the last `n` since the previous
+    build, are queued as they are seen, and a summary is only scheduled when that queue
+    holds records newer than the summary, so memory is never re-read for it.
+    The compacted history is cached per model and only rebuilt when memory or the summary
+    change.
+    """
+
+    def __init__(self, memory: Memory, summarize: Callable[[str, List[MemoryRecord]], str]):
+        self.memory = memory
+        self._summarize = summarize
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-summarizer")
+        self._lock = threading.Lock()
+
+        self._summary = ""
+        self._summary_version = 0
+        # Timestamp of the last record in the summary
+        self._summarized_until: Optional[datetime] = None
+        # Records left out of the verbatim history and not summarized yet, by message id
+        self._overflow: Dict[str, MemoryRecord] = {}
+        # The records of the last window read, to find the ones that slide out of it
+        self._window: List[MemoryRecord] = []
+        self._summary_future: Optional[Future] = None
+        self._generation = 0
+        self._cache: Dict[str, tuple[tuple, List[Dict[str, str]]]] = {}
+
+    @staticmethod
+    def token_budget(model: str) -> int:
+        return settings.AGENT_HISTORY_MODEL_TOKEN_BUDGETS.get(model, settings.AGENT_HISTORY_TOKEN_BUDGET)
+
+    def reset(self):
+        """Forget the rolling summary and cached histories."""
+        with self._lock:
+            self._generation += 1
+            self._summary = ""
+            self._summary_version += 1
+            self._summarized_until = None
+            self._overflow.clear()
+            self._window = []
+            self._cache.clear()
+
+    def get_history(self, model: str, n: int) -> List[Dict[str, str]]:
+        """Get the compacted history of the last `n` memory records for `model`.
+
+        Args:
+            model (str): The model the history will be sent to.
+            n (int): The maximum number of memory records to consider.
+
+        Returns:
+            List[Dict[str, str]]: Chat messages, starting with the rolling summary if any.
+        """
+        records = self.memory.get_latest(n)
+        cache_key = (records[-1].message_id if records else None, len(records), self._summary_version)
+
+        with self._lock:
+            cached = self._cache.get(model)
+            if cached and cached[0] == cache_key:
+                return list(cached[1])
+            summary = self._summary
+
+        history = []
+        remaining = self.token_budget(model)
+        if summary:
+            summary_message = {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+            history.append(summary_message)
+            remaining -= estimate_tokens(summary_message["content"])
+
+        kept = []
+        first_kept = len(records)
+        for idx in range(len(records) - 1, -1, -1):
+            record = records[idx]
+            content = truncate_to_tokens(record.content, settings.AGENT_HISTORY_MAX_MESSAGE_TOKENS)
+            tokens = estimate_tokens(content)
+            if tokens > remaining:
+                break
+            kept.append({"role": record.role, "content": content})
+            remaining -= tokens
+            first_kept = idx
+        kept.reverse()
+        history += kept
+
+        self._schedule_summary(records, first_kept)
+
+        with self._lock:
+            self._cache[model] = (cache_key, history)
+        return list(history)
+
+    def _schedule_summary(self, records: List[MemoryRecord], first_kept: int):
+        """Queue the records left out of the history and summarize them if any is new."""
+        with self._lock:
+            # Records of the previous window older than this one slid out of the last `n`
+            window_start = records[0].timestamp if records else None
+            slid_out = [
+                record for record in self._window if window_start is not None and record.timestamp < window_start
+            ]
+            self._window = records
+            for record in slid_out + records[:first_kept]:
+                if self._summarized_until is None or record.timestamp > self._summarized_until:
+                    self._overflow.setdefault(record.message_id, record)
+
+            if not self._overflow:
+                return
+            if self._summary_future and not self._summary_future.done():
+                # Picked up by the next build once the running summary is done
+                return
+            pending = sorted(self._overflow.values(), key=lambda record: record.timestamp)
+            self._summary_future = self._executor.submit(
+                self._update_summary, self._summary, pending, self._generation
+            )
+
+    def _update_summary(self, summary: str, pending: List[MemoryRecord], generation: int):
+        """Fold the `pending` records into the summary."""
+        try:
+            new_summary = self._summarize(summary, pending)
+        except Exception as e:
+            logger.error(f"Failed to summarize {len(pending)} history records: {e}")
+            return
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._summary = new_summary
+            self._summary_version += 1
+            self._summarized_until = pending[-1].timestamp
+            for record in pending:
+                self._overflow.pop(record.message_id, None)
+        logger.info(f"Rolling summary updated with {len(pending)} records")
@@ -1,9 +1,17 @@
+import threading
+from collections import deque
 from datetime import datetime
+from itertools import islice
 
 import pixeltable as pxt
 from loguru import logger
 from pydantic import BaseModel
 
+from transcript_api.config import get_settings
+from transcript_api.metrics import timed_stage
+
+settings = get_settings()
+
 
 class MemoryRecord(BaseModel):
     message_id: str
@@ -13,14 +21,36 @@ class MemoryRecord(BaseModel):
 
 
 class Memory:
+    """Conversation memory backed by a pixeltable table.
+
+    The most recent records are kept in an in-process ring buffer so that reads never have
+    to scan the table, and writes are queued and flushed to pixeltable in batches by a
+    background thread.
+    """
+
     def __init__(self, name: str):
         self.directory = name
+        # Pixeltable sessions are not safe for concurrent use, serialize table access across threads
+        self._lock = threading.Lock()
+
+        self._buffer_lock = threading.Lock()
+        self._recent: deque[MemoryRecord] = deque(
+            maxlen=max(settings.AGENT_MEMORY_BUFFER_SIZE, settings.AGENT_MEMORY_SIZE)
+        )
+        self._pending: list[MemoryRecord] = []
+        self._total_records = 0
+        # Bumped by reset_memory, batches taken before a reset are dropped instead of written
+        self._generation = 0
+        self._flush_requested = threading.Event()
 
         pxt.create_dir(self.directory, if_exists="replace_force")
 
         self._setup_table()
         self._memory_table = pxt.get_table(f"{self.directory}.memory")
 
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"{name}-memory-flusher", daemon=True)
+        self._flusher.start()
+
     def _setup_table(self):
         self._memory_table = pxt.create_table(
             f"{self.directory}.memory",
@@ -35,16 +65,91 @@ class Memory:
 
     def reset_memory(self):
         logger.info(f"Resetting memory: {self.directory}")
-        pxt.drop_dir(self.directory, if_not_exists="ignore", force=True)
+        # Holding the table lock from the new generation until the drop keeps a flush of the new
+        # conversation from writing its records into the table about to be dropped
+        with self._lock:
+            with self._buffer_lock:
+                self._recent.clear()
+                self._pending.clear()
+                self._total_records = 0
+                self._generation += 1
+            pxt.drop_dir(self.directory, if_not_exists="ignore", force=True)
+            self._memory_table = None
+
+    def _flush_loop(self):
+        while True:
+            self._flush_requested.wait(timeout=settings.AGENT_MEMORY_FLUSH_INTERVAL_SECONDS)
+            self._flush_requested.clear()
+            self.flush()
+
+    @timed_stage("memory_flush")
+    def flush(self):
+        """Write all pending records to the memory table in a single insert."""
+        with self._buffer_lock:
+            batch, self._pending = self._pending, []
+            generation = self._generation
+        if not batch:
+            return
+
+        with self._lock:
+            if generation != self._generation:
+                # The memory was reset since the batch was taken, it belongs to the old conversation
+                return
+            try:
+                if self._memory_table is None:
+                    # The table was dropped by reset_memory, recreate it for the new conversation
+                    pxt.create_dir(self.directory, if_exists="ignore")
+                    self._setup_table()
+                self._memory_table.insert([record.model_dump() for record in batch])
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} memory records: {e}")
+                with self._buffer_lock:
+                    if generation == self._generation:
+                        self._pending[:0] = batch
 
     def insert(self, memory_record: MemoryRecord):
-        self._memory_table.insert([memory_record.dict()])
+        self.insert_many([memory_record])
 
+    @timed_stage("memory_write")
+    def insert_many(self, memory_records: list[MemoryRecord]):
+        with self._buffer_lock:
+            self._recent.extend(memory_records)
+            self._pending.extend(memory_records)
+            self._total_records += len(memory_records)
+            flush_due = len(self._pending) >= settings.AGENT_MEMORY_FLUSH_BATCH_SIZE
+        if flush_due:
+            self._flush_requested.set()
+
+    @timed_stage("memory_read")
     def get_all(self) -> list[MemoryRecord]:
-        return [MemoryRecord(**record) for record in self._memory_table.collect()]
+        return self._collect()
+
+    def _collect(self) -> list[MemoryRecord]:
+        self.flush()
+        with self._lock:
+            if self._memory_table is None:
+                return []
+            return [MemoryRecord(**record) for record in self._memory_table.collect()]
 
+    @timed_stage("memory_read")
     def get_latest(self, n: int) -> list[MemoryRecord]:
-        return self.get_all()[-n:]
+        with self._buffer_lock:
+            if n <= len(self._recent) or self._total_records == len(self._recent):
+                latest = list(islice(reversed(self._recent), n))
+                latest.reverse()
+                return latest
+        return self._collect()[-n:]
+
+    @timed_stage("memory_read")
+    def get_by_message_id(self, message_id: str) -> MemoryRecord | None:
+        with self._buffer_lock:
+            for record in reversed(self._recent):
+                if record.message_id == message_id:
+                    return record
 
-    def get_by_message_id(self, message_id: str) -> MemoryRecord:
-        return self._memory_table.where(self._memory_table.message_id == message_id).collect()[0]
+        self.flush()
+        with self._lock:
+            if self._memory_table is None:
+                return None
+            records = self._memory_table.where(self._memory_table.message_id == message_id).collect()
+        return MemoryRecord(**records[0]) if len(records) else None
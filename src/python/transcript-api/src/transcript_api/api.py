@@ -1,39 +1,112 @@
-import shutil
+import asyncio
+import math
 from contextlib import asynccontextmanager
-from enum import Enum
 from pathlib import Path
-from uuid import uuid4
 
 import click
-from fastapi import BackgroundTasks, FastAPI, File, HTTPException, Request, UploadFile
+from fastapi import FastAPI, File, Header, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import Response
 from fastmcp.client import Client
+from fastmcp.exceptions import ToolError
 from loguru import logger
+from transcript_profiling import profiling_endpoints
 
 from transcript_api.agent import GroqAgent
+from transcript_api.agent.groq.groq_rate_limiter import rate_limit_retry_after
 from transcript_api.config import get_settings
+from transcript_api.jobs import IngestionJobQueue, McpJobCallback, ProgressCallback, TaskStatus
+from transcript_api.mcp_transport import get_mcp_transport
+from transcript_api.media import media_response
+from transcript_api.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, render_metrics
 from transcript_api.models import (
     AssistantMessageResponse,
+    BatchAssistantMessageResponse,
+    BatchUserMessageRequest,
     ProcessVideoRequest,
     ProcessVideoFromConsumerRequest,
     ProcessVideoFromConsumerResponse,
     ProcessVideoResponse,
     ResetMemoryResponse,
+    TaskStatusResponse,
+    UploadSessionRequest,
+    UploadSessionResponse,
     UserMessageRequest,
     VideoUploadResponse,
 )
+from transcript_api.opik_utils import flush as flush_traces
+from transcript_api.serialization import FastJSONResponse, loads
+from transcript_api.uploads import UploadError, UploadHashMismatch, UploadStore
 
 settings = get_settings()
 
 
-class TaskStatus(str, Enum):
-    PENDING = "pending"
-    IN_PROGRESS = "in_progress"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    NOT_FOUND = "not_found"
+async def call_mcp_tool(mcp_client: Client, name: str, arguments: dict) -> dict:
+    result = await mcp_client.call_tool(name, arguments)
+    return loads(result.content[0].text)
+
+
+async def start_mcp_ingestion(mcp_client: Client, video_path: str, record_mcp_job: McpJobCallback) -> dict:
+    """
+    Start the ingestion of a video on the MCP server and record the id of its job
+    """
+
+    async def submit():
+        job = await call_mcp_tool(mcp_client, "process_video", {"video_path": video_path})
+        await record_mcp_job(job["job_id"])
+        return job
+
+    submission = asyncio.ensure_future(submit())
+    try:
+        return await asyncio.shield(submission)
+    except asyncio.CancelledError:
+        # The MCP server starts the job anyway, wait for its id so it can be cancelled or resumed
+        await asyncio.gather(submission, return_exceptions=True)
+        raise
+
+
+async def run_ingestion_job(
+    video_path: str, mcp_job_id: str | None, report_progress: ProgressCallback, record_mcp_job: McpJobCallback
+):
+    """
+    Ingest a video through the MCP server, polling its ingestion job and forwarding its per-stage progress
+
+    A task requeued after a restart resumes polling the MCP job it started, and only starts a new one
+    if the MCP server no longer knows it.
+    """
+    if not await asyncio.to_thread(Path(video_path).exists):
+        raise FileNotFoundError(f"Video file not found: {video_path}")
+
+    mcp_client = Client(get_mcp_transport(settings.MCP_SERVER))
+    async with mcp_client:
+        job = None
+        if mcp_job_id is not None:
+            try:
+                job = await call_mcp_tool(mcp_client, "get_ingestion_job", {"job_id": mcp_job_id})
+            except ToolError:
+                logger.warning(f"MCP ingestion job {mcp_job_id} is gone, ingesting {video_path} again")
+        if job is None:
+            job = await start_mcp_ingestion(mcp_client, video_path, record_mcp_job)
+
+        while True:
+            await report_progress(job["stage"] or job["status"], job["progress"])
+            if job["status"] == "completed":
+                return
+            if job["status"] == "failed":
+                raise RuntimeError(job["error"] or "Video ingestion failed")
+            if job["status"] == "cancelled":
+                raise RuntimeError("Video ingestion was cancelled on the MCP server")
+            await asyncio.sleep(settings.INGESTION_POLL_INTERVAL_SECONDS)
+            job = await call_mcp_tool(mcp_client, "get_ingestion_job", {"job_id": job["job_id"]})
+
+
+async def cancel_mcp_ingestion_job(mcp_job_id: str):
+    """
+    Cancel an ingestion job on the MCP server
+    """
+    mcp_client = Client(get_mcp_transport(settings.MCP_SERVER))
+    async with mcp_client:
+        await mcp_client.call_tool("cancel_ingestion_job", {"job_id": mcp_job_id})
 
 
 @asynccontextmanager
@@ -41,11 +114,24 @@ async def lifespan(app: FastAPI):
     app.state.agent = GroqAgent(
         name="transcript",
         mcp_server=settings.MCP_SERVER,
-        disable_tools=["process_video"],
+        disable_tools=[
+            "process_video",
+            "get_ingestion_job",
+            "list_ingestion_jobs",
+            "cancel_ingestion_job",
+            "ask_questions_about_video",
+            "search_videos",
+        ],
+    )
+    app.state.upload_store = UploadStore(settings.SHARED_MEDIA_DIR, settings.UPLOAD_CHUNK_SIZE)
+    app.state.ingestion_queue = IngestionJobQueue(
+        settings.INGESTION_JOBS_DB, run_ingestion_job, settings.INGESTION_WORKERS, cancel_mcp_ingestion_job
     )
-    app.state.bg_task_states = dict()
+    await app.state.ingestion_queue.start()
     yield
+    await app.state.ingestion_queue.stop()
     app.state.agent.reset_memory()
+    flush_traces()
 
 
 app = FastAPI(
@@ -53,6 +139,7 @@ app = FastAPI(
     description="An AI-powered sports assistant API using OpenAI",
     docs_url="/docs",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # Add CORS middleware
@@ -62,10 +149,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(MetricsMiddleware)
 
-# Mount static files for media serving
-app.mount("/media", StaticFiles(directory="shared_media"), name="media")
+if settings.PROFILING_ENABLED:
+    if settings.PROFILING_TOKEN:
+        for path, methods, endpoint in profiling_endpoints(settings.PROFILING_TOKEN, settings.PROFILING_MAX_SECONDS):
+            app.add_api_route(path, endpoint, methods=methods, include_in_schema=False)
+        logger.info("Profiling endpoints mounted under /debug")
+    else:
+        logger.warning("PROFILING_ENABLED is set without a PROFILING_TOKEN, the profiling endpoints are not mounted")
 
 
 @app.get("/")
@@ -76,43 +170,48 @@ async def root():
     return {"message": "Welcome to Transcript API. Visit /docs for documentation"}
 
 
-@app.get("/task-status/{task_id}")
+@app.get("/metrics")
+async def metrics():
+    """
+    Expose latency histograms per chat pipeline stage and per route in Prometheus format
+    """
+    return Response(content=render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/task-status/{task_id}", response_model=TaskStatusResponse)
 async def get_task_status(task_id: str, fastapi_request: Request):
-    status = fastapi_request.app.state.bg_task_states.get(task_id, TaskStatus.NOT_FOUND)
-    return {"task_id": task_id, "status": status}
+    """
+    Get the status of a video processing task
+
+    Pending tasks report their position in the queue, running tasks their current
+    ingestion stage and progress.
+    """
+    job = await fastapi_request.app.state.ingestion_queue.get(task_id)
+    if job is None:
+        return FastJSONResponse(TaskStatusResponse(task_id=task_id, status=TaskStatus.NOT_FOUND))
+    return FastJSONResponse(TaskStatusResponse(**job))
+
+
+@app.post("/cancel-task/{task_id}", response_model=TaskStatusResponse)
+async def cancel_task(task_id: str, fastapi_request: Request):
+    """
+    Cancel a pending or running video processing task
+    """
+    status = await fastapi_request.app.state.ingestion_queue.cancel(task_id)
+    if status == TaskStatus.NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return TaskStatusResponse(task_id=task_id, status=status)
 
 
 @app.post("/process-video")
-async def process_video(request: ProcessVideoRequest, bg_tasks: BackgroundTasks, fastapi_request: Request):
-    """
-    Process a video and return the results
-    """
-    video_path = request.video_path
-    task_id = str(uuid4())
-    bg_task_states = fastapi_request.app.state.bg_task_states
-    bg_task_states[task_id] = TaskStatus.PENDING
-
-    async def background_process_video(video_path: str, task_id: str):
-        """
-        Background task to process the video
-        """
-        bg_task_states[task_id] = TaskStatus.IN_PROGRESS
-
-        if not Path(video_path).exists():
-            bg_task_states[task_id] = TaskStatus.FAILED
-            raise HTTPException(status_code=404, detail="Video file not found")
-
-        try:
-            mcp_client = Client(settings.MCP_SERVER)
-            async with mcp_client:
-                _ = await mcp_client.call_tool("process_video", {"video_path": request.video_path})
-        except Exception as e:
-            logger.error(f"Error processing video {video_path}: {e}")
-            bg_task_states[task_id] = TaskStatus.FAILED
-            raise HTTPException(status_code=500, detail=str(e))
-        bg_task_states[task_id] = TaskStatus.COMPLETED
-
-    bg_tasks.add_task(background_process_video, request.video_path, task_id)
+async def process_video(request: ProcessVideoRequest, fastapi_request: Request):
+    """
+    Enqueue a video for processing
+
+    Jobs are persisted and run by a bounded pool of ingestion workers, use /task-status
+    to follow their progress.
+    """
+    task_id = await fastapi_request.app.state.ingestion_queue.enqueue(request.video_path)
     return ProcessVideoResponse(message="Task enqueued for processing", task_id=task_id)
 
 
@@ -161,6 +260,18 @@ async def process_video_from_consumer(request: ProcessVideoFromConsumerRequest,
         )
 
 
+def chat_error(error: Exception) -> HTTPException:
+    """Map a chat failure to an HTTP error, 429 with a Retry-After header when Groq's rate limits caused it."""
+    retry_after = rate_limit_retry_after(error)
+    if retry_after is not None:
+        return HTTPException(
+            status_code=429,
+            detail=f"Rate limited by the language model provider, retry in {retry_after:.0f}s",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    return HTTPException(status_code=500, detail=str(error))
+
+
 @app.post("/chat", response_model=AssistantMessageResponse)
 async def chat(request: UserMessageRequest, fastapi_request: Request):
     """
@@ -177,9 +288,30 @@ async def chat(request: UserMessageRequest, fastapi_request: Request):
 
     try:
         response = await agent.chat(request.message, request.video_path, request.image_base64)
-        return response
+        return FastJSONResponse(response)
+    except Exception as e:
+        raise chat_error(e) from e
+
+
+@app.post("/chat/batch", response_model=BatchAssistantMessageResponse)
+async def chat_batch(request: BatchUserMessageRequest, fastapi_request: Request):
+    """
+    Ask several questions about the same video in a single request
+
+    Args:
+        request: BatchUserMessageRequest containing the video path and the messages
+
+    Returns:
+        BatchAssistantMessageResponse containing one response per message, in order
+    """
+    agent = fastapi_request.app.state.agent
+    await agent.setup()
+
+    try:
+        responses = await agent.chat_batch(request.messages, request.video_path)
+        return FastJSONResponse(BatchAssistantMessageResponse(responses=responses))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise chat_error(e) from e
 
 
 @app.post("/reset-memory")
@@ -192,45 +324,110 @@ async def reset_memory(fastapi_request: Request):
     return ResetMemoryResponse(message="Memory reset successfully")
 
 
+async def _read_upload_file(file: UploadFile):
+    while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+
 @app.post("/upload-video", response_model=VideoUploadResponse)
-async def upload_video(file: UploadFile = File(...)):
+async def upload_video(fastapi_request: Request, file: UploadFile = File(...)):
     """
     Upload a video and return the path
+
+    The file is streamed to disk off the event loop and stored under its SHA-256 hash,
+    so uploading the same content twice reuses the existing file.
     """
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file uploaded")
 
     try:
-        shared_media_dir = Path("shared_media")
-        shared_media_dir.mkdir(exist_ok=True)
-
-        video_path = Path(shared_media_dir / file.filename)
-        if not video_path.exists():
-            with open(video_path, "wb") as f:
-                shutil.copyfileobj(file.file, f)
-
+        upload_store = fastapi_request.app.state.upload_store
+        video_path = await upload_store.save(_read_upload_file(file), file.filename)
         return VideoUploadResponse(message="Video uploaded successfully", video_path=str(video_path))
     except Exception as e:
         logger.error(f"Error uploading video: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@app.get("/media/{file_path:path}")
-async def serve_media(file_path: str):
+@app.post("/uploads", response_model=UploadSessionResponse)
+async def create_upload(request: UploadSessionRequest, fastapi_request: Request):
     """
-    Serve media files from the shared_media directory
+    Start a resumable video upload
+
+    An optional `sha256` is checked against the hash of the received bytes when the upload
+    completes. Content that was already uploaded is still sent in full and only stored once.
+    """
+    sha256 = request.sha256.lower() if request.sha256 else None
+    try:
+        upload_id = await fastapi_request.app.state.upload_store.create_session(request.filename, sha256)
+    except UploadError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    return UploadSessionResponse(upload_id=upload_id, offset=0)
+
+
+@app.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload(upload_id: str, fastapi_request: Request):
+    """
+    Get the number of bytes received so far, to resume an interrupted upload
     """
     try:
-        clean_path = Path(file_path).name
-        media_file = Path("shared_media") / clean_path
+        offset = await fastapi_request.app.state.upload_store.get_offset(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    return UploadSessionResponse(upload_id=upload_id, offset=offset)
 
-        if not media_file.exists():
-            raise HTTPException(status_code=404, detail="File not found")
 
-        return FileResponse(str(media_file))
+@app.patch("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def append_upload(upload_id: str, fastapi_request: Request, upload_offset: int = Header(...)):
+    """
+    Append the raw request body to a resumable upload, starting at the `Upload-Offset` header
+    """
+    upload_store = fastapi_request.app.state.upload_store
+    try:
+        await upload_store.get_offset(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+    try:
+        offset = await upload_store.append(upload_id, upload_offset, fastapi_request.stream())
+    except UploadError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return FastJSONResponse(UploadSessionResponse(upload_id=upload_id, offset=offset))
+
+
+@app.post("/uploads/{upload_id}/complete", response_model=VideoUploadResponse)
+async def complete_upload(upload_id: str, fastapi_request: Request):
+    """
+    Finish a resumable upload and return the path of the stored video
+    """
+    try:
+        video_path = await fastapi_request.app.state.upload_store.complete(upload_id)
+    except UploadHashMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    except UploadError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    return VideoUploadResponse(message="Video uploaded successfully", video_path=str(video_path))
+
+
+@app.api_route("/media/{file_path:path}", methods=["GET", "HEAD"])
+async def serve_media(file_path: str, request: Request):
+    """
+    Serve media files from the shared_media directory
+
+    Supports byte-range requests for seeking, and ETag / Last-Modified validators so
+    players can revalidate instead of downloading the file again.
+    """
+    clean_path = Path(file_path).name
+    media_file = Path(settings.SHARED_MEDIA_DIR) / clean_path
+
+    if not await asyncio.to_thread(media_file.is_file):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    try:
+        return await media_response(request, media_file)
     except Exception as e:
         logger.error(f"Error serving media file {file_path}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=str(e)) from e
 
 
 @app.post("/process-video-from-consumer", response_model=ProcessVideoFromConsumerResponse)
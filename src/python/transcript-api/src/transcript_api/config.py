@@ -12,6 +12,20 @@ class Settings(BaseSettings):
     GROQ_TOOL_USE_MODEL: str = "meta-llama/llama-4-maverick-17b-128e-instruct"
     GROQ_IMAGE_MODEL: str = "meta-llama/llama-4-maverick-17b-128e-instruct"
     GROQ_GENERAL_MODEL: str = "meta-llama/llama-4-maverick-17b-128e-instruct"
+    GROQ_SUMMARY_MODEL: str = "meta-llama/llama-4-scout-17b-16e-instruct"
+    GROQ_MAX_RETRIES: int = 4
+
+    # --- GROQ Rate Limit Configuration ---
+    GROQ_DEFAULT_RPM: int = 30
+    GROQ_DEFAULT_TPM: int = 6000
+    GROQ_MAX_RATE_LIMIT_WAIT_SECONDS: float = 30.0
+    GROQ_MODEL_RATE_LIMITS: dict[str, dict[str, int]] = Field(
+        default_factory=lambda: {
+            "meta-llama/llama-4-scout-17b-16e-instruct": {"rpm": 30, "tpm": 30000},
+            "meta-llama/llama-4-maverick-17b-128e-instruct": {"rpm": 30, "tpm": 6000},
+        },
+        description="Per-model 'rpm' and 'tpm' limits, overriding GROQ_DEFAULT_RPM and GROQ_DEFAULT_TPM.",
+    )
 
     # --- Comet ML & Opik Configuration ---
     OPIK_API_KEY: str | None = Field(default=None, description="API key for Comet ML and Opik services.")
@@ -20,12 +34,63 @@ class Settings(BaseSettings):
         default="transcript-api",
         description="Project name for Comet ML and Opik tracking.",
     )
+    OPIK_TRACING_ENABLED: bool = True
+    OPIK_TRACE_SAMPLE_RATE: float = Field(
+        default=1.0,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of chat requests traced with Opik.",
+    )
 
     # --- Memory Configuration ---
     AGENT_MEMORY_SIZE: int = 20
+    AGENT_MEMORY_BUFFER_SIZE: int = 200
+    AGENT_MEMORY_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AGENT_MEMORY_FLUSH_BATCH_SIZE: int = 32
+
+    # --- Chat History Configuration ---
+    AGENT_HISTORY_TOKEN_BUDGET: int = 3000
+    AGENT_HISTORY_MODEL_TOKEN_BUDGETS: dict[str, int] = Field(
+        default_factory=dict,
+        description="Per-model history token budgets, overriding AGENT_HISTORY_TOKEN_BUDGET.",
+    )
+    AGENT_HISTORY_MAX_MESSAGE_TOKENS: int = 600
+    AGENT_HISTORY_SUMMARY_MAX_TOKENS: int = 300
 
     # --- MCP Configuration ---
     MCP_SERVER: str = "http://transcript-mcp:9090/mcp"
+    MCP_COLOCATED: bool = Field(
+        default=False,
+        description="Run the transcript-mcp server in-process and call it through an in-memory transport.",
+    )
+
+    # --- Media Configuration ---
+    SHARED_MEDIA_DIR: str = "shared_media"
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+
+    # --- Tool Execution Configuration ---
+    TOOL_CALL_MAX_CONCURRENCY: int = 4
+    TOOL_CALL_TIMEOUT_SECONDS: float = 120.0
+    BATCH_CHAT_MAX_CONCURRENCY: int = 8
+
+    # --- Ingestion Queue Configuration ---
+    INGESTION_WORKERS: int = 1
+    INGESTION_JOBS_DB: str = "shared_media/.jobs/ingestion_jobs.db"
+    INGESTION_POLL_INTERVAL_SECONDS: float = 2.0
+
+    # --- Metrics Configuration ---
+    METRICS_LATENCY_BUCKETS: list[float] = Field(
+        default=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0],
+        description="Upper bounds, in seconds, of the latency histogram buckets exposed on /metrics.",
+    )
+
+    # --- Profiling Configuration ---
+    PROFILING_ENABLED: bool = Field(
+        default=False,
+        description="Mount the /debug profiling endpoints. They also require PROFILING_TOKEN to be set.",
+    )
+    PROFILING_TOKEN: str = ""
+    PROFILING_MAX_SECONDS: float = 60.0
 
     # --- Disable Nest Asyncio ---
     DISABLE_NEST_ASYNCIO: bool = True
@@ -0,0 +1,287 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+
+from loguru import logger
+
+logger = logger.bind(name="IngestionJobQueue")
+
+
+class TaskStatus(str, Enum):
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    NOT_FOUND = "not_found"
+
+
+# Reports (stage, progress) while a job runs, progress being a fraction between 0 and 1
+ProgressCallback = Callable[[str, float], Awaitable[None]]
+# Records the id of the ingestion job a runner started on the MCP server
+McpJobCallback = Callable[[str], Awaitable[None]]
+# Called with (video_path, mcp_job_id, report_progress, record_mcp_job), `mcp_job_id` being set
+# when the job already started one before a restart
+JobRunner = Callable[[str, Optional[str], ProgressCallback, McpJobCallback], Awaitable[None]]
+# Cancels an ingestion job on the MCP server, given its id
+McpJobCanceller = Callable[[str], Awaitable[None]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL UNIQUE,
+    video_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    mcp_job_id TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class IngestionJobQueue:
+    """Bounded, persistent queue of video ingestion jobs.
+
+    Jobs are stored in a SQLite table so they survive restarts: on start, jobs that were
+    running when the process stopped are put back in the queue, ahead of newer ones. A fixed
+    number of worker tasks drain the queue, so a burst of uploads can't spawn an unbounded
+    number of concurrent ingestions. SQLite calls run in worker threads to keep the event
+    loop free.
+
+    The ingestion itself runs on the MCP server. The id of the MCP job is stored with the job,
+    so a requeued job resumes following it instead of starting it again, and cancelling a job
+    cancels it on the MCP server too.
+    """
+
+    def __init__(self, db_path: str | Path, runner: JobRunner, workers: int, cancel_mcp_job: McpJobCanceller):
+        self.db_path = Path(db_path)
+        self.runner = runner
+        self.workers = workers
+        self.cancel_mcp_job = cancel_mcp_job
+
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._worker_tasks: list[asyncio.Task] = []
+        self._running: dict[str, asyncio.Task] = {}
+        # Jobs taken off the queue by a worker, and those of them cancelled while it holds them
+        self._claimed: set[str] = set()
+        self._cancelled: set[str] = set()
+
+    async def start(self):
+        """Open the job table, requeue unfinished jobs and start the workers."""
+        await asyncio.to_thread(self._open)
+
+        requeued = await self._execute(
+            "UPDATE ingestion_jobs SET status = ?, updated_at = ? WHERE status = ?",
+            (TaskStatus.PENDING.value, time.time(), TaskStatus.IN_PROGRESS.value),
+        )
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted ingestion jobs")
+
+        pending = await self._fetchall(
+            "SELECT job_id FROM ingestion_jobs WHERE status = ? ORDER BY seq", (TaskStatus.PENDING.value,)
+        )
+        for (job_id,) in pending:
+            self._queue.put_nowait(job_id)
+
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"ingestion-worker-{idx}") for idx in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} ingestion workers with {len(pending)} pending jobs")
+
+    async def stop(self):
+        """Stop the workers. Jobs still running are requeued on the next start, and resume following their MCP job."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.close()
+                self._conn = None
+
+    async def enqueue(self, video_path: str) -> str:
+        """Add a job to the queue and return its id."""
+        job_id = str(uuid4())
+        now = time.time()
+        await self._execute(
+            "INSERT INTO ingestion_jobs (job_id, video_path, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, video_path, TaskStatus.PENDING.value, now, now),
+        )
+        self._queue.put_nowait(job_id)
+        logger.info(f"Enqueued ingestion job {job_id} for {video_path}")
+        return job_id
+
+    async def cancel(self, job_id: str) -> TaskStatus:
+        """Cancel a pending or running job, and the ingestion it started on the MCP server.
+
+        Args:
+            job_id (str): The id of the job to cancel.
+
+        Returns:
+            TaskStatus: The status of the job after the call. Jobs that already finished
+                keep their status.
+        """
+        cancelled = await self._transition(
+            job_id, (TaskStatus.PENDING, TaskStatus.IN_PROGRESS), status=TaskStatus.CANCELLED.value
+        )
+        if not cancelled:
+            job = await self.get(job_id)
+            return TaskStatus(job["status"]) if job else TaskStatus.NOT_FOUND
+
+        # A worker that started the job before the update either registered its task by now,
+        # or checks this set before starting it. Jobs no worker holds anymore aren't flagged.
+        if job_id in self._claimed:
+            self._cancelled.add(job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+            # Lets a runner that was starting the MCP job record its id, so it is cancelled below
+            await asyncio.gather(task, return_exceptions=True)
+        logger.info(f"Cancelled ingestion job {job_id}")
+
+        ((mcp_job_id,),) = await self._fetchall("SELECT mcp_job_id FROM ingestion_jobs WHERE job_id = ?", (job_id,))
+        if mcp_job_id is not None:
+            try:
+                await self.cancel_mcp_job(mcp_job_id)
+            except Exception as e:
+                logger.warning(f"Couldn't cancel MCP ingestion job {mcp_job_id} of job {job_id}: {e}")
+        return TaskStatus.CANCELLED
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        """Get the state of a job, including its position in the queue while pending.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            Optional[dict]: The job's status, stage, progress, error and queue position, or
+                None if the job doesn't exist.
+        """
+        rows = await self._fetchall(
+            "SELECT seq, video_path, status, stage, progress, error FROM ingestion_jobs WHERE job_id = ?", (job_id,)
+        )
+        if not rows:
+            return None
+
+        seq, video_path, status, stage, progress, error = rows[0]
+        queue_position = None
+        if status == TaskStatus.PENDING.value:
+            ((ahead,),) = await self._fetchall(
+                "SELECT COUNT(*) FROM ingestion_jobs WHERE status = ? AND seq < ?", (TaskStatus.PENDING.value, seq)
+            )
+            queue_position = ahead + 1
+
+        return {
+            "task_id": job_id,
+            "video_path": video_path,
+            "status": status,
+            "stage": stage,
+            "progress": progress,
+            "queue_position": queue_position,
+            "error": error,
+        }
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._claimed.add(job_id)
+            try:
+                await self._run_job(job_id)
+            finally:
+                self._claimed.discard(job_id)
+                self._cancelled.discard(job_id)
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        rows = await self._fetchall("SELECT video_path, mcp_job_id FROM ingestion_jobs WHERE job_id = ?", (job_id,))
+        started = rows and await self._transition(job_id, (TaskStatus.PENDING,), status=TaskStatus.IN_PROGRESS.value)
+        if not started or job_id in self._cancelled:
+            # Cancelled while waiting in the queue, or right as it started
+            return
+        video_path, mcp_job_id = rows[0]
+
+        async def report_progress(stage: str, progress: float):
+            await self._update(job_id, stage=stage, progress=progress)
+
+        async def record_mcp_job(mcp_job_id: str):
+            await self._update(job_id, mcp_job_id=mcp_job_id)
+
+        task = asyncio.create_task(self.runner(video_path, mcp_job_id, report_progress, record_mcp_job))
+        self._running[job_id] = task
+        try:
+            await task
+        except asyncio.CancelledError:
+            if job_id not in self._cancelled:
+                # The worker itself is being stopped, leave the job to be requeued on restart
+                raise
+            logger.info(f"Ingestion job {job_id} was cancelled")
+            return
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} for {video_path} failed: {e}")
+            outcome = {"status": TaskStatus.FAILED.value, "error": str(e)}
+        else:
+            outcome = {"status": TaskStatus.COMPLETED.value, "progress": 1.0}
+        finally:
+            self._running.pop(job_id, None)
+
+        # A job cancelled after its ingestion ended stays cancelled
+        finished = await self._transition(job_id, (TaskStatus.IN_PROGRESS,), **outcome)
+        if finished and outcome["status"] == TaskStatus.COMPLETED.value:
+            logger.info(f"Ingestion job {job_id} for {video_path} completed")
+
+    def _open(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(ingestion_jobs)")}
+        if "mcp_job_id" not in columns:
+            # Tables created before the MCP job ids were stored
+            conn.execute("ALTER TABLE ingestion_jobs ADD COLUMN mcp_job_id TEXT")
+        self._conn = conn
+
+    async def _update(self, job_id: str, **fields):
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        await self._execute(
+            f"UPDATE ingestion_jobs SET {assignments}, updated_at = ? WHERE job_id = ?",
+            (*fields.values(), time.time(), job_id),
+        )
+
+    async def _transition(self, job_id: str, expected: tuple[TaskStatus, ...], **fields) -> bool:
+        """Update a job only if its status is one of `expected`, return whether it was.
+
+        The check and the update are a single statement, so a worker starting a job and a
+        cancellation can't overwrite each other's status.
+        """
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        statuses = ", ".join("?" for _ in expected)
+        updated = await self._execute(
+            f"UPDATE ingestion_jobs SET {assignments}, updated_at = ? WHERE job_id = ? AND status IN ({statuses})",
+            (*fields.values(), time.time(), job_id, *(status.value for status in expected)),
+        )
+        return updated > 0
+
+    def _execute_sync(self, sql: str, params: tuple) -> int:
+        with self._db_lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def _fetchall_sync(self, sql: str, params: tuple) -> list[tuple]:
+        with self._db_lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    async def _execute(self, sql: str, params: tuple) -> int:
+        return await asyncio.to_thread(self._execute_sync, sql, params)
+
+    async def _fetchall(self, sql: str, params: tuple) -> list[tuple]:
+        return await asyncio.to_thread(self._fetchall_sync, sql, params)
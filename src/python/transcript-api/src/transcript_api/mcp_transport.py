@@ -0,0 +1,43 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+from transcript_api.config import get_settings
+
+if TYPE_CHECKING:
+    from fastmcp import FastMCP
+
+logger = logger.bind(name="MCPTransport")
+
+settings = get_settings()
+
+
+@lru_cache(maxsize=1)
+def _colocated_server() -> "FastMCP":
+    try:
+        from transcript_mcp.server import mcp
+    except ImportError as e:
+        raise RuntimeError(
+            "MCP_COLOCATED is enabled but transcript-mcp is not installed, install the `colocated` extra."
+        ) from e
+
+    logger.info(f"Using in-process MCP server '{mcp.name}'")
+    return mcp
+
+
+def get_mcp_transport(mcp_server: str) -> "str | FastMCP":
+    """Get what the fastmcp `Client` should connect to.
+
+    In colocated mode the transcript-mcp server is imported and mounted in this process, and
+    the client talks to it through fastmcp's in-memory transport instead of streamable HTTP.
+
+    Args:
+        mcp_server (str): URL of the remote MCP server, used when not colocated.
+
+    Returns:
+        str | FastMCP: The server URL, or the in-process FastMCP server.
+    """
+    if settings.MCP_COLOCATED:
+        return _colocated_server()
+    return mcp_server
@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# The MCP server's clip cache names clips clip_<key>.mp4, keep in sync with CLIP_NAME_PATTERN in
+# transcript_mcp/video/clip_cache.py
+CLIP_PREFIX = "clip_"
+CLIP_KEY_LENGTH = 32
+# Clips (<uuid4>.mp4 before the clip cache) and uploads, named <sha256>.<ext>, never change
+IMMUTABLE_NAME_PATTERN = re.compile(
+    rf"^({CLIP_PREFIX}[0-9a-f]{{{CLIP_KEY_LENGTH}}}"
+    r"|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{64})\.\w+$"
+)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+CHUNK_SIZE = 256 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class MediaFileResponse(Response):
+    """Sends a whole file or a single byte range of it.
+
+    When the ASGI server supports the `http.response.zerocopysend` extension the bytes are
+    handed to the kernel with sendfile, otherwise they are read in chunks in a worker thread.
+    """
+
+    def __init__(self, path: Path, start: int, end: int, status_code: int, headers: dict[str, str]):
+        super().__init__(status_code=status_code, headers=headers, media_type=headers.get("content-type"))
+        self.path = path
+        self.start = start
+        self.count = end - start + 1 if end >= start else 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        f = await asyncio.to_thread(open, self.path, "rb")
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": f,
+                        "offset": self.start,
+                        "count": self.count,
+                        "more_body": False,
+                    }
+                )
+                return
+
+            await asyncio.to_thread(f.seek, self.start)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await asyncio.to_thread(f.close)
+
+
+def _etag(stat: os.stat_result) -> str:
+    # Files in the media directory are written once under a new name, never rewritten in place,
+    # so inode, size and mtime identify their content
+    fingerprint = f"{stat.st_ino}-{stat.st_size}-{stat.st_mtime_ns}".encode()
+    return f'"{hashlib.md5(fingerprint, usedforsecurity=False).hexdigest()}"'
+
+
+def _cache_control(path: Path) -> str:
+    return IMMUTABLE_CACHE_CONTROL if IMMUTABLE_NAME_PATTERN.match(path.name) else DEFAULT_CACHE_CONTROL
+
+
+def _parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single `bytes=` range into inclusive (start, end) offsets.
+
+    Returns None when the header should be ignored (bad syntax or several ranges), in which
+    case the whole file is served.
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    first, sep, last = ranges.strip().partition("-")
+    if not sep or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if size == 0:
+        raise RangeNotSatisfiable()
+
+    if not first:
+        suffix_length = int(last)
+        if suffix_length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - suffix_length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, end
+
+
+def _is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _if_range_matches(request: Request, etag: str, last_modified: str) -> bool:
+    if_range = request.headers.get("if-range")
+    return if_range is None or if_range.strip() in (etag, last_modified)
+
+
+async def media_response(request: Request, path: Path) -> Response:
+    """Build the response serving a media file, honouring Range and conditional headers.
+
+    Args:
+        request (Request): The incoming request.
+        path (Path): The file to serve, which must exist.
+
+    Returns:
+        Response: 200 with the whole file, 206 with the requested range, 304 when the client
+            copy is still valid, or 416 when the range can't be satisfied.
+    """
+    stat = await asyncio.to_thread(path.stat)
+    size = stat.st_size
+    etag = _etag(stat)
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+
+    headers = {
+        "etag": etag,
+        "last-modified": last_modified,
+        "cache-control": _cache_control(path),
+        "accept-ranges": "bytes",
+    }
+
+    if _is_not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    headers["content-type"] = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+
+    if byte_range is None:
+        headers["content-length"] = str(size)
+        return MediaFileResponse(path, 0, size - 1, status_code=200, headers=headers)
+
+    start, end = byte_range
+    headers["content-length"] = str(end - start + 1)
+    headers["content-range"] = f"bytes {start}-{end}/{size}"
+    return MediaFileResponse(path, start, end, status_code=206, headers=headers)
@@ -0,0 +1,176 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from transcript_api.config import get_settings
+
+settings = get_settings()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Stage timings of the request being served, shared with the worker threads it spawns
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """Thread-safe Prometheus histogram with a fixed set of labels.
+
+    Only what this service needs from a metrics client: cumulative buckets, sum and count
+    per label set, rendered in the Prometheus text exposition format.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # Non-cumulative counts per bucket, the last one being +Inf
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(labelvalues, [0] * (len(self.buckets) + 1))
+            counts[idx] += 1
+            self._sums[labelvalues] = self._sums.get(labelvalues, 0.0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), self._sums[labels]) for labels, counts in self._counts.items()}
+
+        for labelvalues, (counts, total) in sorted(series.items()):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+STAGE_LATENCY = Histogram(
+    "transcript_api_stage_duration_seconds",
+    "Time spent in each stage of the chat pipeline.",
+    labelnames=("stage",),
+    buckets=settings.METRICS_LATENCY_BUCKETS,
+)
+REQUEST_LATENCY = Histogram(
+    "transcript_api_request_duration_seconds",
+    "Time until the response headers are sent, per route.",
+    labelnames=("method", "route", "status"),
+    buckets=settings.METRICS_LATENCY_BUCKETS,
+)
+
+
+def render_metrics() -> str:
+    """Render all histograms in the Prometheus text exposition format."""
+    return "\n".join(STAGE_LATENCY.render() + REQUEST_LATENCY.render()) + "\n"
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time a block of code as a pipeline stage.
+
+    The duration is recorded in the stage histogram and, when running inside a request, added
+    to that request's `Server-Timing` header.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_LATENCY.observe(duration, stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, duration))
+
+
+def timed_stage(stage: str) -> Callable:
+    """Decorator timing every call of a sync or async function as a pipeline stage."""
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with timed(stage):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    # Stages that ran several times (concurrent tool calls, batched chats) are summed
+    durations: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for stage, duration in timings:
+        durations[stage] = durations.get(stage, 0.0) + duration
+        counts[stage] = counts.get(stage, 0) + 1
+
+    metrics = [
+        f'{stage};dur={durations[stage] * 1000:.1f}' + (f';desc="x{counts[stage]}"' if counts[stage] > 1 else "")
+        for stage in durations
+    ]
+    metrics.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(metrics)
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and reports its stage breakdown in a `Server-Timing` header."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - start
+                route = scope.get("route")
+                REQUEST_LATENCY.observe(
+                    total,
+                    scope["method"],
+                    getattr(route, "path", "unmatched"),
+                    str(message["status"]),
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(timings, total).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
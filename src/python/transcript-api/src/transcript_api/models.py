@@ -26,6 +26,15 @@ class ProcessVideoResponse(BaseModel):
     task_id: str
 
 
+class TaskStatusResponse(BaseModel):
+    task_id: str
+    status: str
+    stage: str | None = None
+    progress: float | None = None
+    queue_position: int | None = None
+    error: str | None = None
+
+
 class UserMessageRequest(BaseModel):
     message: str
     video_path: str | None = None
@@ -37,6 +46,15 @@ class AssistantMessageResponse(BaseModel):
     clip_path: str | None = None
 
 
+class BatchUserMessageRequest(BaseModel):
+    video_path: str
+    messages: list[str] = Field(min_length=1)
+
+
+class BatchAssistantMessageResponse(BaseModel):
+    responses: list[AssistantMessageResponse]
+
+
 class ResetMemoryResponse(BaseModel):
     message: str
 
@@ -47,6 +65,17 @@ class VideoUploadResponse(BaseModel):
     task_id: str | None = None
 
 
+class UploadSessionRequest(BaseModel):
+    filename: str
+    sha256: str | None = None
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str | None = None
+    offset: int
+    video_path: str | None = None
+
+
 # -- LLM Structured Outputs Models --
 
 
@@ -1,15 +1,33 @@
+import functools
+import inspect
 import os
+import random
+from contextvars import ContextVar
+from typing import Callable
 
 import opik
 from loguru import logger
+from opik import opik_context
 from opik.configurator.configure import OpikConfigurator
 
 from transcript_api.config import get_settings
 
 settings = get_settings()
 
+# Whether Opik was configured successfully, checked on every tracked call
+_tracing_active = False
+# Sampling decision of the trace the current call belongs to
+_trace_sampled: ContextVar[bool] = ContextVar("trace_sampled", default=False)
+
 
 def configure() -> None:
+    global _tracing_active
+
+    if not settings.OPIK_TRACING_ENABLED:
+        os.environ["OPIK_TRACK_DISABLE"] = "true"
+        logger.info("Opik tracing is disabled.")
+        return
+
     if settings.OPIK_API_KEY and settings.OPIK_PROJECT:
         try:
             client = OpikConfigurator(api_key=settings.OPIK_API_KEY)
@@ -29,6 +47,7 @@ def configure() -> None:
                 use_local=False,
                 force=True,
             )
+            _tracing_active = True
             logger.info(
                 f"Opik configured successfully using workspace '{default_workspace}'"
             )
@@ -41,3 +60,71 @@ def configure() -> None:
         logger.warning(
             "COMET_API_KEY and COMET_PROJECT are not set. Set them to enable prompt monitoring with Opik (powered by Comet ML)."
         )
+
+
+def _sample() -> bool:
+    return _tracing_active and random.random() < settings.OPIK_TRACE_SAMPLE_RATE
+
+
+def track(name: str, type: str = "general", root: bool = False) -> Callable:
+    """Trace a function with Opik, honouring the tracing switch and the sample rate.
+
+    When tracing is disabled the function is returned untouched. Otherwise the sampling
+    decision is taken once per trace, by its `root` function, and nested tracked functions
+    follow it, so unsampled requests skip Opik entirely. Spans of sampled traces are handed
+    to the Opik streamer, which exports them in batches from background threads.
+
+    Args:
+        name (str): The span name.
+        type (str): The Opik span type.
+        root (bool): Whether the function starts a new trace.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        if not settings.OPIK_TRACING_ENABLED:
+            return fn
+
+        traced = opik.track(name=name, type=type)(fn)
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not root:
+                    return await (traced if _trace_sampled.get() else fn)(*args, **kwargs)
+                token = _trace_sampled.set(_sample())
+                try:
+                    return await (traced if _trace_sampled.get() else fn)(*args, **kwargs)
+                finally:
+                    _trace_sampled.reset(token)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not root:
+                return (traced if _trace_sampled.get() else fn)(*args, **kwargs)
+            token = _trace_sampled.set(_sample())
+            try:
+                return (traced if _trace_sampled.get() else fn)(*args, **kwargs)
+            finally:
+                _trace_sampled.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+def update_current_trace(**kwargs) -> None:
+    """Update the current Opik trace, if the current call is being traced."""
+    if _tracing_active and _trace_sampled.get():
+        opik_context.update_current_trace(**kwargs)
+
+
+def flush() -> None:
+    """Export the spans still buffered by the Opik streamer."""
+    if _tracing_active:
+        opik.flush_tracker()
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (UUID, Path)):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize an object to compact JSON bytes."""
+    if isinstance(obj, BaseModel):
+        # pydantic-core writes the JSON bytes directly, without an intermediate dict
+        return obj.__pydantic_serializer__.to_json(obj)
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def loads(data: bytes | str) -> Any:
+    """Parse JSON."""
+    return orjson.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with `dumps` instead of the stdlib encoder.
+
+    FastAPI runs whatever an endpoint returns through `jsonable_encoder` before handing it to
+    the response class, which costs more than rendering it. Hot endpoints return this response
+    directly instead, wrapping their pydantic model or plain payload, so it is written in a
+    single pass by pydantic-core or orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional
+from uuid import uuid4
+
+from loguru import logger
+
+logger = logger.bind(name="UploadStore")
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadError(Exception):
+    """Raised when an upload session is unknown or receives data out of order."""
+
+
+class UploadHashMismatch(UploadError):
+    """Raised when the bytes of a completed upload don't match the hash its client declared."""
+
+
+class UploadStore:
+    """Content-addressed storage for uploaded videos.
+
+    Uploads are streamed to a partial file under `<media_dir>/.uploads`, hashed as the bytes
+    arrive and, once complete, renamed to `<media_dir>/<sha256><suffix>`. Identical content is
+    therefore stored once. A hash declared by the client is only checked against the hash of the
+    received bytes, never trusted to skip the transfer: knowing the hash of a file doesn't prove
+    having it. All disk I/O runs in worker threads so the event loop is never blocked.
+
+    Resumable uploads are exposed as sessions: bytes are appended at a given offset and the
+    session survives restarts, since its partial file and metadata live on disk.
+    """
+
+    def __init__(self, media_dir: str | Path, chunk_size: int):
+        self.media_dir = Path(media_dir)
+        self.partial_dir = self.media_dir / ".uploads"
+        self.chunk_size = chunk_size
+        self._hashers: dict[str, "hashlib._Hash"] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _suffix(filename: str) -> str:
+        return Path(filename).suffix.lower()
+
+    def _partial_path(self, upload_id: str) -> Path:
+        if not re.fullmatch(r"[0-9a-f]{32}", upload_id):
+            raise UploadError(f"Unknown upload '{upload_id}'")
+        return self.partial_dir / f"{upload_id}.part"
+
+    def _metadata_path(self, upload_id: str) -> Path:
+        return self.partial_dir / f"{upload_id}.json"
+
+    async def save(self, chunks: AsyncIterator[bytes], filename: str) -> Path:
+        """Stream an upload to disk in one go and store it under its content hash."""
+        upload_id = uuid4().hex
+        partial_path = self._partial_path(upload_id)
+        hasher = hashlib.sha256()
+
+        f = await asyncio.to_thread(open, partial_path, "wb")
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(self._write_chunk, f, hasher, chunk)
+        except BaseException:
+            await asyncio.to_thread(f.close)
+            await asyncio.to_thread(partial_path.unlink, missing_ok=True)
+            raise
+        await asyncio.to_thread(f.close)
+
+        return await asyncio.to_thread(self._store, partial_path, hasher.hexdigest(), filename)
+
+    async def create_session(self, filename: str, sha256: Optional[str] = None) -> str:
+        """Start a resumable upload and return its id.
+
+        Args:
+            filename (str): Name of the uploaded file, only its suffix is kept.
+            sha256 (Optional[str]): Hash the client expects the upload to have, checked on completion.
+
+        Returns:
+            str: The id of the upload.
+        """
+        if sha256 is not None and not SHA256_PATTERN.match(sha256):
+            raise UploadError(f"'{sha256}' is not a hexadecimal SHA-256 hash")
+        upload_id = uuid4().hex
+        metadata = json.dumps({"filename": filename, "sha256": sha256})
+        await asyncio.to_thread(self._partial_path(upload_id).touch)
+        await asyncio.to_thread(self._metadata_path(upload_id).write_text, metadata)
+        self._hashers[upload_id] = hashlib.sha256()
+        return upload_id
+
+    async def get_offset(self, upload_id: str) -> int:
+        """Return how many bytes of a resumable upload were received so far."""
+        partial_path = self._partial_path(upload_id)
+        try:
+            return (await asyncio.to_thread(partial_path.stat)).st_size
+        except FileNotFoundError as e:
+            raise UploadError(f"Unknown upload '{upload_id}'") from e
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """Append bytes to a resumable upload, starting at `offset`, and return the new offset."""
+        async with await self._session_lock(upload_id):
+            current_offset = await self.get_offset(upload_id)
+            if offset != current_offset:
+                raise UploadError(f"Upload '{upload_id}' is at offset {current_offset}, got {offset}")
+
+            hasher = await self._get_hasher(upload_id, current_offset)
+            f = await asyncio.to_thread(open, self._partial_path(upload_id), "ab")
+            try:
+                async for chunk in chunks:
+                    await asyncio.to_thread(self._write_chunk, f, hasher, chunk)
+            except BaseException:
+                # The bytes already written are kept, but the running hash can't be trusted anymore
+                self._hashers.pop(upload_id, None)
+                raise
+            finally:
+                await asyncio.to_thread(f.close)
+
+            return await self.get_offset(upload_id)
+
+    async def complete(self, upload_id: str) -> Path:
+        """Finish a resumable upload and store it under its content hash."""
+        lock = await self._session_lock(upload_id)
+        try:
+            async with lock:
+                offset = await self.get_offset(upload_id)
+                hasher = await self._get_hasher(upload_id, offset)
+                metadata = json.loads(await asyncio.to_thread(self._metadata_path(upload_id).read_text))
+
+                sha256 = hasher.hexdigest()
+                expected = metadata.get("sha256")
+                if expected is not None and sha256 != expected:
+                    # The received bytes are not the file the client meant to send, it starts over
+                    await asyncio.to_thread(self._partial_path(upload_id).unlink, missing_ok=True)
+                    await asyncio.to_thread(self._metadata_path(upload_id).unlink, missing_ok=True)
+                    raise UploadHashMismatch(f"Upload '{upload_id}' has SHA-256 {sha256}, expected {expected}")
+
+                path = await asyncio.to_thread(self._store, self._partial_path(upload_id), sha256, metadata["filename"])
+                await asyncio.to_thread(self._metadata_path(upload_id).unlink, missing_ok=True)
+        finally:
+            # A session that failed to complete keeps its lock, appends may still be waiting on it
+            if not await asyncio.to_thread(self._metadata_path(upload_id).exists):
+                self._hashers.pop(upload_id, None)
+                self._locks.pop(upload_id, None)
+        return path
+
+    async def _session_lock(self, upload_id: str) -> asyncio.Lock:
+        """Lock of an upload session, only handed out for sessions that exist."""
+        await self.get_offset(upload_id)
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    async def _get_hasher(self, upload_id: str, offset: int) -> "hashlib._Hash":
+        hasher = self._hashers.get(upload_id)
+        if hasher is None:
+            # Lost after a restart or an interrupted append, rebuild it from the partial file
+            logger.info(f"Rehashing {offset} bytes of upload '{upload_id}'")
+            hasher = await asyncio.to_thread(self._hash_file, self._partial_path(upload_id))
+            self._hashers[upload_id] = hasher
+        return hasher
+
+    def _hash_file(self, path: Path) -> "hashlib._Hash":
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(self.chunk_size):
+                hasher.update(chunk)
+        return hasher
+
+    @staticmethod
+    def _write_chunk(f: BinaryIO, hasher: "hashlib._Hash", chunk: bytes) -> None:
+        f.write(chunk)
+        hasher.update(chunk)
+
+    def _store(self, partial_path: Path, sha256: str, filename: str) -> Path:
+        path = self.media_dir / f"{sha256}{self._suffix(filename)}"
+        if path.exists():
+            logger.info(f"Upload of '{filename}' matches existing file {path}")
+            partial_path.unlink(missing_ok=True)
+        else:
+            os.replace(partial_path, path)
+            logger.info(f"Stored upload of '{filename}' as {path}")
+        return path
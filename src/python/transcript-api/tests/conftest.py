@@ -0,0 +1,5 @@
+import os
+
+# Settings are read when transcript_api is imported, give the tests a key and keep Opik off
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("OPIK_TRACING_ENABLED", "false")
@@ -0,0 +1,62 @@
+import groq
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from transcript_api.api import app
+from transcript_api.models import AssistantMessageResponse
+
+
+class FakeAgent:
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.batches: list[tuple[list[str], str]] = []
+
+    async def setup(self):
+        pass
+
+    async def chat_batch(self, messages, video_path):
+        self.batches.append((messages, video_path))
+        if self.error is not None:
+            raise self.error
+        return [AssistantMessageResponse(message=f"answer to {message}") for message in messages]
+
+
+@pytest.fixture
+def client():
+    # The lifespan isn't run, the tests install the agent themselves
+    return TestClient(app)
+
+
+def test_chat_batch_answers_every_message_in_order(client):
+    app.state.agent = agent = FakeAgent()
+    response = client.post("/chat/batch", json={"video_path": "video.mp4", "messages": ["first?", "second?"]})
+    assert response.status_code == 200
+    assert response.json() == {
+        "responses": [
+            {"message": "answer to first?", "clip_path": None},
+            {"message": "answer to second?", "clip_path": None},
+        ]
+    }
+    assert agent.batches == [(["first?", "second?"], "video.mp4")]
+
+
+def test_chat_batch_requires_a_message(client):
+    app.state.agent = FakeAgent()
+    response = client.post("/chat/batch", json={"video_path": "video.mp4", "messages": []})
+    assert response.status_code == 422
+
+
+def test_chat_batch_reports_rate_limits_as_429(client):
+    rate_limit = httpx.Response(429, headers={"retry-after": "12"}, request=httpx.Request("POST", "https://api.groq.com"))
+    app.state.agent = FakeAgent(groq.RateLimitError("Rate limited", response=rate_limit, body=None))
+    response = client.post("/chat/batch", json={"video_path": "video.mp4", "messages": ["first?"]})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "12"
+
+
+def test_chat_batch_reports_other_failures_as_500(client):
+    app.state.agent = FakeAgent(RuntimeError("tool selection failed"))
+    response = client.post("/chat/batch", json={"video_path": "video.mp4", "messages": ["first?"]})
+    assert response.status_code == 500
+    assert response.json()["detail"] == "tool selection failed"
@@ -0,0 +1,87 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from transcript_api.agent import GroqAgent
+from transcript_api.models import GeneralResponseModel, VideoClipResponseModel
+
+
+def tool_call(call_id: str, name: str, **arguments) -> SimpleNamespace:
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+
+
+class FakeMcpClient:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeMemory:
+    def __init__(self):
+        self.records = []
+
+    def insert_many(self, records):
+        self.records += records
+
+
+class StubAgent(GroqAgent):
+    """A GroqAgent whose completions and MCP calls are scripted per message."""
+
+    def __init__(self, routes: dict, selections: dict):
+        self.thread_id = "test"
+        self.mcp_client = FakeMcpClient()
+        self.memory = FakeMemory()
+        self.routes = routes
+        self.selections = selections
+        self.tool_calls: list[tuple[str, dict]] = []
+
+    def _should_use_tool(self, message: str) -> bool:
+        return self.routes[message]
+
+    def _select_tool_calls(self, message: str, image_base64: str | None = None):
+        return self.selections[message]
+
+    def _follow_up(self, message, tool_calls, function_responses):
+        if tool_calls[0].function.name == "ask_question_about_video":
+            return GeneralResponseModel(message=json.loads(function_responses[0])["answer"])
+        return VideoClipResponseModel(message=message, clip_path=json.loads(function_responses[0])["clip_path"])
+
+    def _respond_general(self, message: str):
+        return GeneralResponseModel(message=f"general: {message}")
+
+    async def call_tool(self, function_name: str, function_args: dict) -> str:
+        self.tool_calls.append((function_name, function_args))
+        if function_name == "ask_questions_about_video":
+            return json.dumps({"answers": [f"answer to {query}" for query in function_args["user_queries"]]})
+        return json.dumps({"clip_path": f"/media/clip_{function_args['user_query']}.mp4"})
+
+
+def test_chat_batch_routes_each_message_through_its_tools():
+    agent = StubAgent(
+        routes={"hello": False, "who scores?": True, "show the goal": True, "and then?": True},
+        selections={
+            "who scores?": SimpleNamespace(
+                tool_calls=[tool_call("1", "ask_question_about_video", user_query="who scores?")], content=None
+            ),
+            "show the goal": SimpleNamespace(
+                tool_calls=[tool_call("2", "get_video_clip_from_user_query", user_query="goal")], content=None
+            ),
+            "and then?": SimpleNamespace(tool_calls=None, content="Nothing else happens."),
+        },
+    )
+
+    responses = asyncio.run(agent.chat_batch(["hello", "who scores?", "show the goal", "and then?"], "video.mp4"))
+
+    assert [(response.message, response.clip_path) for response in responses] == [
+        ("general: hello", None),
+        ("answer to who scores?", None),
+        ("show the goal", "/media/clip_goal.mp4"),
+        ("Nothing else happens.", None),
+    ]
+    assert agent.tool_calls == [
+        ("ask_questions_about_video", {"video_path": "video.mp4", "user_queries": ["who scores?"]}),
+        ("get_video_clip_from_user_query", {"user_query": "goal", "video_path": "video.mp4"}),
+    ]
+    assert len(agent.memory.records) == 8
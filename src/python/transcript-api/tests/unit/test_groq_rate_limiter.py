@@ -0,0 +1,117 @@
+import httpx
+import pytest
+
+from transcript_api.agent.groq.groq_rate_limiter import (
+    EXPECTED_COMPLETION_TOKENS,
+    IMAGE_TOKENS,
+    GroqRateLimiter,
+    ModelRateLimiter,
+    RateLimitWaitExceeded,
+    TokenBucket,
+    parse_duration,
+)
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [("2m59.56s", 179.56), ("7.66s", 7.66), ("120ms", 0.12), ("1h", 3600.0), ("1m30ms", 60.03)],
+)
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize("value", ["", "soon", "5"])
+def test_parse_duration_rejects_other_formats(value):
+    assert parse_duration(value) is None
+
+
+def test_token_bucket_starts_full_and_refills_at_its_rate():
+    bucket = TokenBucket(60)
+    now = bucket.updated
+    assert bucket.time_until(60, now) == 0.0
+
+    bucket.take(60)
+    assert bucket.time_until(1, now) == pytest.approx(1.0)
+    assert bucket.time_until(1, now + 1) == pytest.approx(0.0)
+
+
+def test_token_bucket_never_refills_above_capacity():
+    bucket = TokenBucket(60)
+    bucket.take(30)
+    bucket.time_until(1, bucket.updated + 3600)
+    assert bucket.level == 60
+
+
+def test_token_bucket_requests_above_capacity_wait_for_a_full_bucket():
+    bucket = TokenBucket(60)
+    now = bucket.updated
+    bucket.take(30)
+    assert bucket.time_until(600, now) == pytest.approx(30.0)
+    bucket.take(600)
+    assert bucket.level == -30
+
+
+def test_token_bucket_sync_only_lowers_the_level():
+    bucket = TokenBucket(100)
+    now = bucket.updated
+    bucket.sync(500, now)
+    assert bucket.level == 100
+    bucket.sync(10, now)
+    assert bucket.level == 10
+
+
+def test_model_rate_limiter_takes_from_both_budgets():
+    limiter = ModelRateLimiter("model", requests_per_minute=10, tokens_per_minute=1000, max_wait=0)
+    assert limiter.acquire(400) == pytest.approx(0.0, abs=0.05)
+    assert limiter.requests.level == pytest.approx(9, abs=0.01)
+    assert limiter.tokens.level == pytest.approx(600, abs=1)
+
+
+def test_model_rate_limiter_fails_fast_when_the_wait_exceeds_max_wait():
+    limiter = ModelRateLimiter("model", requests_per_minute=10, tokens_per_minute=1000, max_wait=1)
+    limiter.acquire(1000)
+    with pytest.raises(RateLimitWaitExceeded) as error:
+        limiter.acquire(1000)
+    assert error.value.retry_after > 1
+
+
+def test_model_rate_limiter_pauses_every_caller_after_a_429():
+    limiter = ModelRateLimiter("model", requests_per_minute=10, tokens_per_minute=1000, max_wait=1)
+    limiter.update(httpx.Headers({"retry-after": "30"}), 429)
+    assert limiter.tokens.level == 0
+    with pytest.raises(RateLimitWaitExceeded) as error:
+        limiter.acquire(1)
+    assert error.value.retry_after == pytest.approx(30, abs=0.5)
+
+
+def test_model_rate_limiter_blocks_until_the_daily_requests_reset():
+    limiter = ModelRateLimiter("model", requests_per_minute=10, tokens_per_minute=1000, max_wait=1)
+    headers = httpx.Headers(
+        {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2m", "x-ratelimit-remaining-tokens": "5"}
+    )
+    limiter.update(headers, 200)
+    assert limiter.tokens.level == pytest.approx(5, abs=1)
+    with pytest.raises(RateLimitWaitExceeded):
+        limiter.acquire(1)
+
+
+def test_estimate_request_tokens():
+    body = {
+        "messages": [
+            {"role": "system", "content": "a" * 400},
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": "b" * 40},
+                    {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,..."}},
+                ],
+            },
+        ],
+        "max_completion_tokens": 4096,
+    }
+    assert GroqRateLimiter.estimate_request_tokens(body) == 101 + 11 + IMAGE_TOKENS + EXPECTED_COMPLETION_TOKENS
+
+
+def test_estimate_request_tokens_uses_small_completion_limits():
+    body = {"messages": [{"role": "user", "content": None}], "max_completion_tokens": 100}
+    assert GroqRateLimiter.estimate_request_tokens(body) == 1 + 100
@@ -0,0 +1,198 @@
+import asyncio
+
+import pytest
+
+from transcript_api.jobs import IngestionJobQueue, TaskStatus
+
+
+class FakeMcp:
+    """Stands in for the MCP server side of the ingestion jobs."""
+
+    def __init__(self, block: bool = False, error: Exception | None = None):
+        self.block = block
+        self.error = error
+        self.runs: list[tuple[str, str | None]] = []
+        self.cancelled: list[str] = []
+        self.started = asyncio.Event()
+
+    async def run(self, video_path, mcp_job_id, report_progress, record_mcp_job):
+        self.runs.append((video_path, mcp_job_id))
+        if mcp_job_id is None:
+            await record_mcp_job(f"mcp-{len(self.runs)}")
+        await report_progress("transcription", 0.25)
+        self.started.set()
+        if self.block:
+            await asyncio.Event().wait()
+        if self.error is not None:
+            raise self.error
+
+    async def cancel(self, mcp_job_id):
+        self.cancelled.append(mcp_job_id)
+
+
+async def wait_for_status(queue: IngestionJobQueue, job_id: str, status: TaskStatus) -> dict:
+    for _ in range(200):
+        job = await queue.get(job_id)
+        if job["status"] == status.value:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} never reached {status.value}, last seen {job}")
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=10))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "jobs.db"
+
+
+def test_job_completes(db_path):
+    async def scenario():
+        mcp = FakeMcp()
+        queue = IngestionJobQueue(db_path, mcp.run, 1, mcp.cancel)
+        await queue.start()
+        job_id = await queue.enqueue("video.mp4")
+        job = await wait_for_status(queue, job_id, TaskStatus.COMPLETED)
+        await queue.stop()
+        return mcp, job
+
+    mcp, job = run(scenario())
+    assert mcp.runs == [("video.mp4", None)]
+    assert job["progress"] == 1.0
+    assert job["stage"] == "transcription"
+
+
+def test_job_fails_with_the_runner_error(db_path):
+    async def scenario():
+        mcp = FakeMcp(error=RuntimeError("transcription failed"))
+        queue = IngestionJobQueue(db_path, mcp.run, 1, mcp.cancel)
+        await queue.start()
+        job_id = await queue.enqueue("video.mp4")
+        job = await wait_for_status(queue, job_id, TaskStatus.FAILED)
+        await queue.stop()
+        return job
+
+    assert run(scenario())["error"] == "transcription failed"
+
+
+def test_pending_jobs_report_their_queue_position(db_path):
+    async def scenario():
+        mcp = FakeMcp()
+        queue = IngestionJobQueue(db_path, mcp.run, 0, mcp.cancel)
+        await queue.start()
+        job_ids = [await queue.enqueue(f"video_{idx}.mp4") for idx in range(3)]
+        await queue.cancel(job_ids[0])
+        positions = [(await queue.get(job_id))["queue_position"] for job_id in job_ids]
+        await queue.stop()
+        return positions
+
+    assert run(scenario()) == [None, 1, 2]
+
+
+def test_cancelled_pending_job_never_runs(db_path):
+    async def scenario():
+        mcp = FakeMcp()
+        queue = IngestionJobQueue(db_path, mcp.run, 0, mcp.cancel)
+        await queue.start()
+        job_id = await queue.enqueue("video.mp4")
+        status = await queue.cancel(job_id)
+        queue.workers = 1
+        await queue.stop()
+        await queue.start()
+        await asyncio.sleep(0.05)
+        job = await queue.get(job_id)
+        await queue.stop()
+        return mcp, status, job
+
+    mcp, status, job = run(scenario())
+    assert status == TaskStatus.CANCELLED
+    assert job["status"] == TaskStatus.CANCELLED.value
+    assert mcp.runs == []
+    assert mcp.cancelled == []
+
+
+def test_cancelling_a_running_job_cancels_its_mcp_job(db_path):
+    async def scenario():
+        mcp = FakeMcp(block=True)
+        queue = IngestionJobQueue(db_path, mcp.run, 1, mcp.cancel)
+        await queue.start()
+        job_id = await queue.enqueue("video.mp4")
+        await mcp.started.wait()
+        status = await queue.cancel(job_id)
+        job = await queue.get(job_id)
+        await queue.stop()
+        return mcp, status, job
+
+    mcp, status, job = run(scenario())
+    assert status == TaskStatus.CANCELLED
+    assert job["status"] == TaskStatus.CANCELLED.value
+    assert mcp.cancelled == ["mcp-1"]
+
+
+def test_finished_and_unknown_jobs_keep_their_status(db_path):
+    async def scenario():
+        mcp = FakeMcp()
+        queue = IngestionJobQueue(db_path, mcp.run, 1, mcp.cancel)
+        await queue.start()
+        job_id = await queue.enqueue("video.mp4")
+        await wait_for_status(queue, job_id, TaskStatus.COMPLETED)
+        statuses = await queue.cancel(job_id), await queue.cancel("unknown")
+        await queue.stop()
+        return mcp, statuses
+
+    mcp, statuses = run(scenario())
+    assert statuses == (TaskStatus.COMPLETED, TaskStatus.NOT_FOUND)
+    assert mcp.cancelled == []
+
+
+def test_interrupted_job_resumes_its_mcp_job_after_a_restart(db_path):
+    async def scenario():
+        first_run = FakeMcp(block=True)
+        queue = IngestionJobQueue(db_path, first_run.run, 1, first_run.cancel)
+        await queue.start()
+        job_id = await queue.enqueue("video.mp4")
+        await first_run.started.wait()
+        await queue.stop()
+
+        second_run = FakeMcp()
+        queue = IngestionJobQueue(db_path, second_run.run, 1, second_run.cancel)
+        await queue.start()
+        await wait_for_status(queue, job_id, TaskStatus.COMPLETED)
+        await queue.stop()
+        return second_run
+
+    assert run(scenario()).runs == [("video.mp4", "mcp-1")]
+
+
+def test_cancelling_a_job_as_it_finishes_leaves_no_flag_behind(db_path):
+    async def scenario():
+        release = asyncio.Event()
+
+        async def runner(video_path, mcp_job_id, report_progress, record_mcp_job):
+            await release.wait()
+
+        queue = IngestionJobQueue(db_path, runner, 1, FakeMcp().cancel)
+        transition = queue._transition
+
+        async def cancel_then_let_the_job_finish(job_id, expected, **fields):
+            changed = await transition(job_id, expected, **fields)
+            if fields.get("status") == TaskStatus.CANCELLED.value:
+                release.set()
+                await queue._queue.join()
+            return changed
+
+        queue._transition = cancel_then_let_the_job_finish
+        await queue.start()
+        job_id = await queue.enqueue("video.mp4")
+        await wait_for_status(queue, job_id, TaskStatus.IN_PROGRESS)
+        status = await queue.cancel(job_id)
+        job = await queue.get(job_id)
+        await queue.stop()
+        return queue, status, job
+
+    queue, status, job = run(scenario())
+    assert status == TaskStatus.CANCELLED
+    assert job["status"] == TaskStatus.CANCELLED.value
+    assert queue._cancelled == set()
@@ -0,0 +1,84 @@
+import pytest
+from fastapi import Request
+
+from transcript_api.media import RangeNotSatisfiable, _cache_control, _is_not_modified, _parse_range
+
+ETAG = '"0123456789abcdef"'
+MTIME = 1_700_000_000.5
+
+
+def make_request(**headers: str) -> Request:
+    raw_headers = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/media/video.mp4", "headers": raw_headers})
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+        ("bytes=500-5000", (500, 999)),
+        ("BYTES = 0-0", (0, 0)),
+    ],
+)
+def test_parse_range(header, expected):
+    assert _parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize(
+    "header",
+    ["items=0-99", "bytes=0-99,200-299", "bytes=abc-", "bytes=-", "bytes=0", "bytes=99-10"],
+)
+def test_parse_range_ignores_unsupported_headers(header):
+    assert _parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, size", [("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=0-", 0)])
+def test_parse_range_not_satisfiable(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        _parse_range(header, size)
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [(ETAG, True), (f'"other", W/{ETAG}', True), ("*", True), ('"other"', False)],
+)
+def test_is_not_modified_by_etag(if_none_match, expected):
+    assert _is_not_modified(make_request(if_none_match=if_none_match), ETAG, MTIME) is expected
+
+
+def test_etag_takes_precedence_over_modification_date():
+    request = make_request(if_none_match='"other"', if_modified_since="Fri, 01 Jan 2100 00:00:00 GMT")
+    assert not _is_not_modified(request, ETAG, MTIME)
+
+
+@pytest.mark.parametrize(
+    "if_modified_since, expected",
+    [
+        ("Tue, 14 Nov 2023 22:13:20 GMT", True),
+        ("Tue, 14 Nov 2023 22:13:19 GMT", False),
+        ("not a date", False),
+    ],
+)
+def test_is_not_modified_by_date(if_modified_since, expected):
+    assert _is_not_modified(make_request(if_modified_since=if_modified_since), ETAG, MTIME) is expected
+
+
+def test_is_modified_without_conditional_headers():
+    assert not _is_not_modified(make_request(), ETAG, MTIME)
+
+
+@pytest.mark.parametrize(
+    "name, immutable",
+    [
+        (f"clip_{'a' * 32}.mp4", True),
+        (f"{'b' * 64}.mp4", True),
+        ("0b7a3c1e-4f2d-4c8a-9e6b-1d2f3a4b5c6d.mp4", True),
+        ("video.mp4", False),
+        (f"clip_{'a' * 31}.mp4", False),
+    ],
+)
+def test_cache_control(tmp_path, name, immutable):
+    assert (_cache_control(tmp_path / name) == "public, max-age=31536000, immutable") is immutable
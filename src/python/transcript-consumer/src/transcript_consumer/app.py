@@ -2,7 +2,10 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from loguru import logger
-from .transcripts_consumer import TranscriptsConsumer
+from transcript_profiling import profiling_endpoints
+
+from .serialization import FastJSONResponse
+from .transcripts_consumer import PROFILING_ENABLED, PROFILING_MAX_SECONDS, PROFILING_TOKEN, TranscriptsConsumer
 
 logger = logger.bind(name="TranscriptsConsumerManager")
 
@@ -26,9 +29,18 @@ app = FastAPI(
     title="Transcript Consumer Service",
     description="Consumer service for processing transcript requests from .NET M3 system",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+if PROFILING_ENABLED:
+    if PROFILING_TOKEN:
+        for path, methods, endpoint in profiling_endpoints(PROFILING_TOKEN, PROFILING_MAX_SECONDS):
+            app.add_api_route(path, endpoint, methods=methods, include_in_schema=False)
+        logger.info("Profiling endpoints mounted under /debug")
+    else:
+        logger.warning("PROFILING_ENABLED is set without a PROFILING_TOKEN, the profiling endpoints are not mounted")
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring"""
@@ -38,10 +50,10 @@ async def health_check():
 async def list_processed_requests():
     """List all processed transcript requests"""
     result = await consumer.get_processed_requests()
-    return {"processed_requests": result}
+    return FastJSONResponse({"processed_requests": result})
 
 @app.get("/info")
 async def info():
     """Get consumer statistics and information"""
     result = await consumer.info()
-    return {"info": result}
\ No newline at end of file
+    return FastJSONResponse({"info": result})
\ No newline at end of file
@@ -1,5 +1,8 @@
+import os
 from functools import lru_cache
+from typing import Literal
 
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -15,9 +18,18 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     AUDIO_TRANSCRIPT_MODEL: str = "gpt-4o-mini-transcribe"  # Whisper tiny model 37M
     IMAGE_CAPTION_MODEL: str = "gpt-4o-mini"
+    AUDIO_TRANSCRIPT_RPM: int = 500
 
     # --- Video Ingestion Configuration ---
+    FRAME_SAMPLING: Literal["scenes", "fixed"] = "scenes"
     SPLIT_FRAMES_COUNT: int = 45
+    SCENE_MIN_FRAMES_PER_MINUTE: float = 2.0
+    SCENE_MAX_FRAMES_PER_MINUTE: float = 12.0
+    SCENE_CHANGE_THRESHOLD: float = 0.3
+    SCENE_ANALYSIS_FPS: float = 2.0
+    FRAME_DEDUP_ENABLED: bool = True
+    FRAME_DEDUP_MAX_DISTANCE: int = 10
+    FRAME_DEDUP_WINDOW_SECONDS: float = 120.0
     AUDIO_CHUNK_LENGTH: int = 10
     AUDIO_OVERLAP_SECONDS: int = 1
     AUDIO_MIN_CHUNK_DURATION_SECONDS: int = 1
@@ -37,11 +49,51 @@ class Settings(BaseSettings):
     CAPTION_MODEL_PROMPT: str = "Describe what is happening in the image"
     DELTA_SECONDS_FRAME_INTERVAL: float = 5.0
 
+    # --- Remote Calls Configuration ---
+    TRANSCRIPTION_MAX_CONCURRENCY: int = 8
+    CAPTIONING_MAX_CONCURRENCY: int = 16
+    REMOTE_CALL_MAX_RETRIES: int = 8
+    REMOTE_CALL_BACKOFF_SECONDS: float = 1.0
+    REMOTE_CALL_MAX_BACKOFF_SECONDS: float = 60.0
+
+    # --- Ingestion Jobs Configuration ---
+    INGESTION_MAX_CONCURRENCY: int = 2
+    INGESTION_JOBS_HISTORY: int = 1000
+
     # --- Video Search Engine Configuration ---
-    VIDEO_CLIP_SPEECH_SEARCH_TOP_K: int = 1
-    VIDEO_CLIP_CAPTION_SEARCH_TOP_K: int = 1
+    VIDEO_CLIP_SPEECH_SEARCH_TOP_K: int = 10
+    VIDEO_CLIP_CAPTION_SEARCH_TOP_K: int = 10
     VIDEO_CLIP_IMAGE_SEARCH_TOP_K: int = 1
     QUESTION_ANSWER_TOP_K: int = 3
+    HYBRID_SEARCH_RRF_K: int = 60
+    LIBRARY_SEARCH_TOP_K: int = 10
+
+    # --- Query Embedding Cache Configuration ---
+    QUERY_EMBEDDING_CACHE_SIZE: int = 4096
+
+    # --- Search Engine Cache Configuration ---
+    SEARCH_ENGINE_CACHE_SIZE: int = 32
+    SEARCH_ENGINE_CACHE_MAX_MB: int = 512
+
+    # --- Clip Extraction Configuration ---
+    CLIP_EXTRACTION_MODE: Literal["copy", "accurate", "auto"] = "auto"
+    CLIP_MAX_KEYFRAME_DRIFT_SECONDS: float = 5.0
+    CLIP_ENCODE_PRESET: str = "veryfast"
+    CLIP_ENCODE_CRF: int = 23
+    CLIP_KEYFRAME_INDEX_SIZE: int = 256
+
+    # --- FFmpeg Pool Configuration ---
+    FFMPEG_MAX_CONCURRENCY: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    FFMPEG_TIMEOUT_SECONDS: float = 120.0
+
+    # --- Clip Cache Configuration ---
+    CLIP_CACHE_DIR: str = "./shared_media"
+    CLIP_CACHE_MAX_MB: int = 2048
+
+    # --- Profiling Configuration ---
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILING_MAX_SECONDS: float = 60.0
 
 
 @lru_cache(maxsize=1)
@@ -0,0 +1,28 @@
+from typing import Callable, List
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Each collector returns the exposition lines of its own metrics
+_collectors: List[Callable[[], List[str]]] = []
+
+
+def register_collector(collector: Callable[[], List[str]]) -> Callable[[], List[str]]:
+    """Register a function rendering metrics for the /metrics endpoint."""
+    _collectors.append(collector)
+    return collector
+
+
+def counter(name: str, documentation: str, value: float) -> List[str]:
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} counter", f"{name} {value}"]
+
+
+def gauge(name: str, documentation: str, value: float) -> List[str]:
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} gauge", f"{name} {value}"]
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
@@ -1,5 +1,7 @@
-from transcript_mcp.video.ingestion.models import CachedTable, CachedTableMetadata
-from transcript_mcp.video.ingestion.registry import get_registry
+from transcript_mcp.serialization import dumps
+from transcript_mcp.video.ingestion.jobs import ingestion_jobs
+from transcript_mcp.video.ingestion.models import CachedTable
+from transcript_mcp.video.ingestion.registry import get_index, list_indexes
 
 
 def list_tables() -> str:
@@ -8,7 +10,7 @@ def list_tables() -> str:
     Returns:
         A string listing the current video indexes.
     """
-    keys = list(get_registry().keys())
+    keys = list_indexes()
     if not keys:
         return "No video indexes exist."
     return f"Current video indexes: {', '.join(keys)}"
@@ -23,10 +25,23 @@ def list_table_info(table_name: str) -> str:
     Returns:
         A string with the information about the video index.
     """
-    registry = get_registry()
-    if table_name not in registry:
+    metadata = get_index(table_name)
+    if metadata is None:
         return f"Video index '{table_name}' does not exist."
-    table_metadata = registry[table_name]
-    table_info = CachedTableMetadata(**table_metadata)
-    table = CachedTable.from_metadata(table_info)
+    table = CachedTable.from_metadata(metadata)
     return f"Video index '{table_name}' info: {' | '.join(table.video_table.columns)}"
+
+
+def get_ingestion_job_info(job_id: str) -> str:
+    """Get the status and progress of a video ingestion job.
+
+    Args:
+        job_id: The id of the ingestion job.
+
+    Returns:
+        The job as JSON.
+    """
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        return dumps({"job_id": job_id, "status": "not_found"}).decode()
+    return dumps(job).decode()
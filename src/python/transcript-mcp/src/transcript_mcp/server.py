@@ -1,24 +1,56 @@
 import click
 from fastmcp import FastMCP
+from loguru import logger
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from transcript_profiling import profiling_endpoints
 
+from transcript_mcp.config import get_settings
+from transcript_mcp.metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
 from transcript_mcp.prompts import general_system_prompt, routing_system_prompt, tool_use_system_prompt
-from transcript_mcp.resources import list_tables
+from transcript_mcp.resources import get_ingestion_job_info, list_tables
 from transcript_mcp.tools import (
     ask_question_about_video,
+    ask_questions_about_video,
+    cancel_ingestion_job,
     get_video_clip_from_image,
+    get_ingestion_job,
     get_video_clip_from_user_query,
+    list_ingestion_jobs,
     process_video,
+    search_videos,
 )
 
 
 def add_mcp_tools(mcp: FastMCP):
     mcp.add_tool(
         name="process_video",
-        description="Process a video file and prepare it for searching.",
+        description="Start processing a video file in the background. Returns an ingestion job to poll.",
         fn=process_video,
         tags={"video", "process"},
     )
 
+    mcp.add_tool(
+        name="get_ingestion_job",
+        description="Get the status and progress of a video ingestion job started by process_video.",
+        fn=get_ingestion_job,
+        tags={"video", "process", "job"},
+    )
+
+    mcp.add_tool(
+        name="cancel_ingestion_job",
+        description="Cancel a pending or running video ingestion job started by process_video.",
+        fn=cancel_ingestion_job,
+        tags={"video", "process", "job"},
+    )
+
+    mcp.add_tool(
+        name="list_ingestion_jobs",
+        description="List the pending, running and recently finished video ingestion jobs.",
+        fn=list_ingestion_jobs,
+        tags={"video", "process", "job"},
+    )
+
     mcp.add_tool(
         name="get_video_clip_from_user_query",
         description="Use this tool to get a video clip from a video file based on a user query or question.",
@@ -40,6 +72,20 @@ def add_mcp_tools(mcp: FastMCP):
         tags={"ask", "question", "information"},
     )
 
+    mcp.add_tool(
+        name="ask_questions_about_video",
+        description="Use this tool to get answers to several questions about the same video at once.",
+        fn=ask_questions_about_video,
+        tags={"ask", "question", "information", "batch"},
+    )
+
+    mcp.add_tool(
+        name="search_videos",
+        description="Use this tool to find the moments matching a user query across every processed video.",
+        fn=search_videos,
+        tags={"search", "library", "global"},
+    )
+
 
 def add_mcp_resources(mcp: FastMCP):
     mcp.add_resource_fn(
@@ -50,6 +96,15 @@ def add_mcp_resources(mcp: FastMCP):
         tags={"resource", "all"},
     )
 
+    mcp.add_resource_fn(
+        fn=get_ingestion_job_info,
+        uri="ingestion://jobs/{job_id}",
+        name="ingestion_job",
+        description="Status and progress of a video ingestion job.",
+        mime_type="application/json",
+        tags={"resource", "ingestion"},
+    )
+
 
 def add_mcp_prompts(mcp: FastMCP):
     mcp.add_prompt(
@@ -74,11 +129,33 @@ def add_mcp_prompts(mcp: FastMCP):
     )
 
 
+def add_profiling_routes(mcp: FastMCP):
+    settings = get_settings()
+    if not settings.PROFILING_ENABLED:
+        return
+    if not settings.PROFILING_TOKEN:
+        logger.warning("PROFILING_ENABLED is set without a PROFILING_TOKEN, the profiling endpoints are not mounted")
+        return
+
+    for path, methods, endpoint in profiling_endpoints(settings.PROFILING_TOKEN, settings.PROFILING_MAX_SECONDS):
+        mcp.custom_route(path, methods=methods, include_in_schema=False)(endpoint)
+    logger.info("Profiling endpoints mounted under /debug")
+
+
+def add_metrics_route(mcp: FastMCP):
+    @mcp.custom_route("/metrics", methods=["GET"], include_in_schema=False)
+    async def metrics(request: Request) -> PlainTextResponse:
+        """Expose the service metrics in the Prometheus text format."""
+        return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 mcp = FastMCP("VideoProcessor")
 
 add_mcp_prompts(mcp)
 add_mcp_tools(mcp)
 add_mcp_resources(mcp)
+add_metrics_route(mcp)
+add_profiling_routes(mcp)
 
 
 @click.command()
@@ -1,71 +1,129 @@
-from typing import Dict
-from uuid import uuid4
+import asyncio
+from typing import Any, Dict, List
 
 from loguru import logger
 
 from transcript_mcp.config import get_settings
-from transcript_mcp.video.ingestion.tools import extract_video_clip
-from transcript_mcp.video.ingestion.video_processor import VideoProcessor
-from transcript_mcp.video.video_search_engine import VideoSearchEngine
+from transcript_mcp.video.clip_cache import clip_cache
+from transcript_mcp.video.ingestion.jobs import ingestion_jobs
+from transcript_mcp.video.library_search import search_library
+from transcript_mcp.video.search_engine_cache import search_engine_cache
 
 logger = logger.bind(name="MCPVideoTools")
-video_processor = VideoProcessor()
 settings = get_settings()
 
 
-def process_video(video_path: str) -> str:
-    """Process a video file and prepare it for searching.
+def process_video(video_path: str) -> Dict[str, Any]:
+    """Start processing a video file in the background to prepare it for searching.
+
+    Ingestion (audio extraction, transcription, frame captioning and indexing) takes minutes,
+    so it runs as a background job and this returns right away. Poll the job with
+    `get_ingestion_job` until it is completed or failed.
 
     Args:
         video_path (str): Path to the video file to process.
 
     Returns:
-        str: Success message indicating the video was processed.
+        Dict[str, Any]: The ingestion job, with its `job_id`, `status`, `stage`, `progress`
+            and `queue_position`. A video already indexed returns a completed job, a video
+            being ingested returns the job in progress.
+    """
+    return ingestion_jobs.submit(video_path).model_dump(mode="json")
+
+
+def get_ingestion_job(job_id: str) -> Dict[str, Any]:
+    """Get the status and progress of a video ingestion job.
+
+    Args:
+        job_id (str): The id returned by `process_video`.
+
+    Returns:
+        Dict[str, Any]: The ingestion job, with its `status` (pending, in_progress, completed,
+            failed or cancelled), current `stage`, `progress` between 0 and 1, `queue_position` while
+            pending and `error` if it failed.
 
     Raises:
-        ValueError: If the video file cannot be found or processed.
+        ValueError: If the job doesn't exist.
     """
-    exists = video_processor._check_if_exists(video_path)
-    if exists:
-        logger.info(f"Video index for '{video_path}' already exists and is ready for use.")
-        return False
-    video_processor.setup_table(video_name=video_path)
-    is_done = video_processor.add_video(video_path=video_path)
-    return is_done
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise ValueError(f"Ingestion job {job_id} not found.")
+    return job.model_dump(mode="json")
 
 
-def get_video_clip_from_user_query(video_path: str, user_query: str) -> Dict[str, str]:
+def cancel_ingestion_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a pending or running video ingestion job.
+
+    A running ingestion stops before its next stage or OpenAI call, and its partial index is
+    never registered.
+
+    Args:
+        job_id (str): The id returned by `process_video`.
+
+    Returns:
+        Dict[str, Any]: The ingestion job after the call. Jobs that already finished keep their
+            status.
+
+    Raises:
+        ValueError: If the job doesn't exist.
+    """
+    job = ingestion_jobs.cancel(job_id)
+    if job is None:
+        raise ValueError(f"Ingestion job {job_id} not found.")
+    return job.model_dump(mode="json")
+
+
+def list_ingestion_jobs() -> Dict[str, List[Dict[str, Any]]]:
+    """List the pending, running and recently finished video ingestion jobs.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Dictionary containing:
+            jobs (List[Dict[str, Any]]): The ingestion jobs, oldest first.
+    """
+    return {"jobs": [job.model_dump(mode="json") for job in ingestion_jobs.list()]}
+
+
+async def get_video_clip_from_user_query(video_path: str, user_query: str) -> Dict[str, str]:
     """Get a video clip based on the user query using speech and caption similarity.
 
+    Speech and caption results are searched concurrently and merged with rank fusion, the
+    best fused time range is extracted by ffmpeg. The search runs in a worker thread so it
+    doesn't block the server.
+
     Args:
         video_path (str): The path to the video file.
         user_query (str): The user query to search for.
 
     Returns:
         Dict[str, str]: Dictionary containing:
-            filename (str): Path to the extracted video clip.
-    """
-    search_engine = VideoSearchEngine(video_path)
-
-    speech_clips = search_engine.search_by_speech(user_query, settings.VIDEO_CLIP_SPEECH_SEARCH_TOP_K)
-    caption_clips = search_engine.search_by_caption(user_query, settings.VIDEO_CLIP_CAPTION_SEARCH_TOP_K)
+            clip_path (str): Path to the extracted video clip.
 
-    speech_sim = speech_clips[0]["similarity"] if speech_clips else 0
-    caption_sim = caption_clips[0]["similarity"] if caption_clips else 0
-
-    video_clip_info = speech_clips[0] if speech_sim > caption_sim else caption_clips[0]
+    Raises:
+        ValueError: If neither the speech nor the captions of the video match the query.
+    """
+    search_engine = await asyncio.to_thread(search_engine_cache.get, video_path)
+
+    clips = await asyncio.to_thread(
+        search_engine.search_hybrid,
+        user_query,
+        top_k=1,
+        speech_top_k=settings.VIDEO_CLIP_SPEECH_SEARCH_TOP_K,
+        caption_top_k=settings.VIDEO_CLIP_CAPTION_SEARCH_TOP_K,
+    )
+    if not clips:
+        raise ValueError(f"No clip of {video_path} matches the query.")
+    video_clip_info = clips[0]
 
-    video_clip = extract_video_clip(
+    clip_path = await clip_cache.get_or_extract(
         video_path=video_path,
         start_time=video_clip_info["start_time"],
         end_time=video_clip_info["end_time"],
-        output_path=f"./shared_media/{str(uuid4())}.mp4",
     )
 
-    return {"clip_path": video_clip.filename}
+    return {"clip_path": clip_path}
 
 
-def get_video_clip_from_image(video_path: str, user_image: str) -> Dict[str, str]:
+async def get_video_clip_from_image(video_path: str, user_image: str) -> Dict[str, str]:
     """Get a video clip based on similarity to a provided image.
 
     Args:
@@ -74,24 +132,33 @@ def get_video_clip_from_image(video_path: str, user_image: str) -> Dict[str, str
 
     Returns:
         Dict[str, str]: Dictionary containing:
-            filename (str): Path to the extracted video clip.
+            clip_path (str): Path to the extracted video clip.
+
+    Raises:
+        ValueError: If no frame of the video matches the image.
     """
-    search_engine = VideoSearchEngine(video_path)
-    image_clips = search_engine.search_by_image(user_image, settings.VIDEO_CLIP_IMAGE_SEARCH_TOP_K)
+    search_engine = await asyncio.to_thread(search_engine_cache.get, video_path)
+    image_clips = await asyncio.to_thread(
+        search_engine.search_by_image, user_image, settings.VIDEO_CLIP_IMAGE_SEARCH_TOP_K
+    )
+    if not image_clips:
+        raise ValueError(f"No clip of {video_path} matches the image.")
+    video_clip_info = image_clips[0]
 
-    video_clip = extract_video_clip(
+    clip_path = await clip_cache.get_or_extract(
         video_path=video_path,
-        start_time=image_clips[0]["start_time"],
-        end_time=image_clips[0]["end_time"],
-        output_path=f"./shared_media/{str(uuid4())}.mp4",
+        start_time=video_clip_info["start_time"],
+        end_time=video_clip_info["end_time"],
     )
 
-    return {"clip_path": video_clip.filename}
+    return {"clip_path": clip_path}
 
 
-def ask_question_about_video(video_path: str, user_query: str) -> Dict[str, str]:
+async def ask_question_about_video(video_path: str, user_query: str) -> Dict[str, str]:
     """Get relevant captions from the video based on the user's question.
 
+    The search runs in a worker thread so it doesn't block the server.
+
     Args:
         video_path (str): The path to the video file.
         user_query (str): The question to search for relevant captions.
@@ -100,8 +167,55 @@ def ask_question_about_video(video_path: str, user_query: str) -> Dict[str, str]
         Dict[str, str]: Dictionary containing:
             answer (str): Concatenated relevant captions from the video.
     """
-    search_engine = VideoSearchEngine(video_path)
-    caption_info = search_engine.get_caption_info(user_query, settings.QUESTION_ANSWER_TOP_K)
+    search_engine = await asyncio.to_thread(search_engine_cache.get, video_path)
+    caption_info = await asyncio.to_thread(search_engine.get_caption_info, user_query, settings.QUESTION_ANSWER_TOP_K)
 
     answer = "\n".join(entry["caption"] for entry in caption_info)
     return {"answer": answer}
+
+
+async def ask_questions_about_video(video_path: str, user_queries: List[str]) -> Dict[str, List[str]]:
+    """Answer several questions about the same video with a single batched caption search.
+
+    The questions are embedded together and ranked in one pass, in a worker thread so the
+    search doesn't block the server.
+
+    Args:
+        video_path (str): The path to the video file.
+        user_queries (List[str]): The questions to search for relevant captions.
+
+    Returns:
+        Dict[str, List[str]]: Dictionary containing:
+            answers (List[str]): Concatenated relevant captions for each question, in order.
+    """
+    search_engine = await asyncio.to_thread(search_engine_cache.get, video_path)
+    captions_info = await asyncio.to_thread(
+        search_engine.get_captions_info, user_queries, settings.QUESTION_ANSWER_TOP_K
+    )
+
+    answers = ["\n".join(entry["caption"] for entry in caption_info) for caption_info in captions_info]
+    return {"answers": answers}
+
+
+async def search_videos(user_query: str) -> Dict[str, List[Dict]]:
+    """Find the moments matching a query across every indexed video.
+
+    The first search loads the embeddings of every video, so it runs in a worker thread to
+    keep the server responsive.
+
+    Args:
+        user_query (str): The user query to search for.
+
+    Returns:
+        Dict[str, List[Dict]]: Dictionary containing:
+            hits (List[Dict]): Best matches first, each with the `video_name`, the `start_time`
+                and `end_time` in seconds and the fused `score`.
+    """
+    hits = await asyncio.to_thread(
+        search_library,
+        user_query,
+        top_k=settings.LIBRARY_SEARCH_TOP_K,
+        speech_top_k=settings.VIDEO_CLIP_SPEECH_SEARCH_TOP_K,
+        caption_top_k=settings.VIDEO_CLIP_CAPTION_SEARCH_TOP_K,
+    )
+    return {"hits": hits}
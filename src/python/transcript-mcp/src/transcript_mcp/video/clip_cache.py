@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Tuple
+from uuid import uuid4
+
+from loguru import logger
+
+from transcript_mcp.config import get_settings
+from transcript_mcp.metrics import counter, gauge, register_collector
+from transcript_mcp.video.clip_engine import ClipEngine, clip_engine
+
+logger = logger.bind(name="ClipCache")
+
+settings = get_settings()
+
+CLIP_PREFIX = "clip_"
+CLIP_KEY_LENGTH = 32
+# Names of complete clips. transcript-api serves them as immutable, its media.py mirrors this pattern
+CLIP_NAME_PATTERN = re.compile(rf"^{CLIP_PREFIX}[0-9a-f]{{{CLIP_KEY_LENGTH}}}\.mp4$")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class SourceDigests:
+    """Content hashes of source videos, computed once per file version.
+
+    Entries are keyed by path, size and modification time, so a replaced file is hashed again.
+    """
+
+    def __init__(self):
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, video_path: str) -> str:
+        try:
+            stat = os.stat(video_path)
+        except OSError:
+            # Not a local file, e.g. a URL ffmpeg reads from: its address stands for its content
+            return hashlib.sha256(video_path.encode()).hexdigest()
+
+        key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(video_path, "rb") as f:
+                while chunk := f.read(HASH_CHUNK_SIZE):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            with self._lock:
+                self._digests[key] = digest
+        return digest
+
+
+class ClipCache:
+    """Content-addressed cache of extracted clips, bounded by a disk quota.
+
+    A clip is named after the hash of its source video's content, its time range and the
+    extraction mode, so the same moment of the same video is only cut once, whatever the path
+    the video was given under. Concurrent requests for a clip being extracted wait for that
+    extraction instead of starting their own, which is cancelled once none of them waits.
+
+    Clips are written next to the other media, as `clip_<key>.mp4` files so they can be served
+    the same way. Only those files are counted against the quota and evicted, least recently
+    used first. The cache is rebuilt from the directory on startup, ordered by modification
+    time, which hits refresh.
+
+    The cache is used from the event loop only, source videos are hashed in worker threads.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, engine: ClipEngine):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.engine = engine
+        self.digests = SourceDigests()
+
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        # Extraction of each clip being cut, with the number of requests waiting for it
+        self._in_flight: Dict[str, Tuple["asyncio.Task[str]", List[int]]] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+        self._load()
+
+    def _load(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        clips = []
+        for path in self.directory.glob(f"{CLIP_PREFIX}*.mp4"):
+            stat = path.stat()
+            if path.name.endswith(".partial.mp4"):
+                # Left behind by an interrupted extraction. Recent ones may still be written by
+                # another process sharing the directory, e.g. the server when this is an
+                # ingestion worker, and ffmpeg is killed past its timeout.
+                if time.time() - stat.st_mtime > settings.FFMPEG_TIMEOUT_SECONDS:
+                    path.unlink(missing_ok=True)
+                continue
+            if not CLIP_NAME_PATTERN.match(path.name):
+                continue
+            clips.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(clips):
+            self._entries[name] = size
+            self.total_bytes += size
+        if clips:
+            logger.info(f"Found {len(clips)} cached clips, {self.total_bytes / 1024**2:.1f} MiB")
+
+    async def clip_name(self, video_path: str, start_time: float, end_time: float) -> str:
+        digest = await asyncio.to_thread(self.digests.get, video_path)
+        key = f"{digest}:{start_time:.3f}:{end_time:.3f}:{settings.CLIP_EXTRACTION_MODE}"
+        return f"{CLIP_PREFIX}{hashlib.sha256(key.encode()).hexdigest()[:CLIP_KEY_LENGTH]}.mp4"
+
+    async def get_or_extract(self, video_path: str, start_time: float, end_time: float) -> str:
+        """Return the path of a clip of a video, extracting it unless it is cached.
+
+        Args:
+            video_path (str): The source video.
+            start_time (float): Start of the clip, in seconds.
+            end_time (float): End of the clip, in seconds.
+
+        Returns:
+            str: The path of the clip.
+
+        Raises:
+            ValueError: If start_time is not less than end_time.
+            IOError: If the extraction fails.
+            TimeoutError: If the extraction runs longer than FFMPEG_TIMEOUT_SECONDS.
+        """
+        if start_time >= end_time:
+            raise ValueError("start_time must be less than end_time")
+
+        name = await self.clip_name(video_path, start_time, end_time)
+        path = self.directory / name
+
+        if name in self._entries and path.is_file():
+            self._entries.move_to_end(name)
+            # Keeps the LRU order across restarts
+            os.utime(path)
+            self.hits += 1
+            return str(path)
+        # Deleted behind our back
+        self.total_bytes -= self._entries.pop(name, 0)
+
+        if name in self._in_flight:
+            task, waiters = self._in_flight[name]
+            self.coalesced += 1
+        else:
+            task = asyncio.create_task(self._extract(name, video_path, start_time, end_time))
+            waiters = [0]
+            self._in_flight[name] = (task, waiters)
+            task.add_done_callback(lambda _: self._forget(name, task))
+            self.misses += 1
+
+        waiters[0] += 1
+        try:
+            # A cancelled request must not cancel the extraction others are waiting for
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if waiters[0] == 1 and not task.done():
+                logger.debug(f"Cancelling extraction of {name}, no request waits for it anymore")
+                task.cancel()
+                # The next request starts a new extraction rather than waiting for this one to stop
+                self._forget(name, task)
+            raise
+        finally:
+            waiters[0] -= 1
+
+    def _forget(self, name: str, task: "asyncio.Task[str]"):
+        if name in self._in_flight and self._in_flight[name][0] is task:
+            del self._in_flight[name]
+
+    async def _extract(self, name: str, video_path: str, start_time: float, end_time: float) -> str:
+        path = self.directory / name
+        partial = self.directory / f"{name}.{uuid4().hex[:8]}.partial.mp4"
+        try:
+            await self.engine.extract(video_path, start_time, end_time, str(partial))
+            os.replace(partial, path)
+        finally:
+            partial.unlink(missing_ok=True)
+
+        size = path.stat().st_size
+        self._entries[name] = size
+        self.total_bytes += size
+        self._evict(keep=name)
+        return str(path)
+
+    def _evict(self, keep: str):
+        # The clip just written is never evicted
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            name = next(iter(self._entries))
+            if name == keep:
+                self._entries.move_to_end(name)
+                name = next(iter(self._entries))
+            size = self._entries.pop(name)
+            self.total_bytes -= size
+            self.evictions += 1
+            # A client may still be downloading it, unlinking only removes the name
+            (self.directory / name).unlink(missing_ok=True)
+            logger.debug(f"Evicted clip {name}, {size / 1024**2:.1f} MiB")
+
+    def render_metrics(self) -> List[str]:
+        hits, misses, coalesced, evictions = self.hits, self.misses, self.coalesced, self.evictions
+        entries, total_bytes = len(self._entries), self.total_bytes
+        prefix = "transcript_mcp_clip_cache"
+        return [
+            *counter(f"{prefix}_hits_total", "Clips served from the cache.", hits),
+            *counter(f"{prefix}_misses_total", "Clips extracted.", misses),
+            *counter(f"{prefix}_coalesced_total", "Clip requests that waited for an identical extraction.", coalesced),
+            *counter(f"{prefix}_evictions_total", "Clips evicted from the cache.", evictions),
+            *gauge(f"{prefix}_entries", "Clips currently cached.", entries),
+            *gauge(f"{prefix}_bytes", "Disk used by cached clips.", total_bytes),
+        ]
+
+
+clip_cache = ClipCache(settings.CLIP_CACHE_DIR, settings.CLIP_CACHE_MAX_MB * 1024 * 1024, clip_engine)
+register_collector(clip_cache.render_metrics)
@@ -0,0 +1,246 @@
+import asyncio
+import bisect
+import os
+from collections import OrderedDict
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from transcript_mcp.config import get_settings
+from transcript_mcp.video.ffmpeg_pool import FFmpegPool, ffmpeg_pool
+
+logger = logger.bind(name="ClipEngine")
+
+settings = get_settings()
+
+
+class ClipMode(str, Enum):
+    COPY = "copy"
+    ACCURATE = "accurate"
+    AUTO = "auto"
+
+
+class Clip(BaseModel):
+    path: str = Field(..., description="Path of the extracted clip")
+    start_time: float = Field(..., description="Start of the clip in the source video, in seconds")
+    end_time: float = Field(..., description="End of the clip in the source video, in seconds")
+    mode: ClipMode = Field(..., description="How the clip was cut, either copy or accurate")
+
+
+class KeyframeIndex:
+    """LRU cache of the keyframe timestamps of each video.
+
+    Keyframes are read from the packet flags of the video stream, without decoding it. Entries
+    are keyed by path, size and modification time, so a replaced file is probed again.
+    Concurrent requests for a video that isn't cached wait for the same probe.
+    """
+
+    def __init__(self, max_entries: int, pool: FFmpegPool):
+        self.max_entries = max_entries
+        self.pool = pool
+        self._entries: "OrderedDict[Tuple[str, int, int], List[float]]" = OrderedDict()
+        # Running probes and the number of requests waiting for each
+        self._in_flight: Dict[Tuple[str, int, int], Tuple["asyncio.Task[List[float]]", List[int]]] = {}
+
+    async def get(self, video_path: str) -> List[float]:
+        """Return the sorted keyframe timestamps of a video, in seconds."""
+        key = await asyncio.to_thread(self._key, video_path)
+        keyframes = self._entries.get(key)
+        if keyframes is not None:
+            self._entries.move_to_end(key)
+            return keyframes
+
+        if key in self._in_flight:
+            task, waiters = self._in_flight[key]
+        else:
+            task = asyncio.create_task(self._index(key, video_path))
+            waiters = [0]
+            self._in_flight[key] = (task, waiters)
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        waiters[0] += 1
+        try:
+            # A cancelled request must not cancel the probe others are waiting for
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if waiters[0] == 1 and not task.done():
+                task.cancel()
+                self._forget(key, task)
+            raise
+        finally:
+            waiters[0] -= 1
+
+    @staticmethod
+    def _key(video_path: str) -> Tuple[str, int, int]:
+        try:
+            stat = os.stat(video_path)
+            return (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            # Not a local file, e.g. a URL ffmpeg reads from
+            return (video_path, 0, 0)
+
+    def _forget(self, key: Tuple[str, int, int], task: "asyncio.Task[List[float]]"):
+        if key in self._in_flight and self._in_flight[key][0] is task:
+            del self._in_flight[key]
+
+    async def _index(self, key: Tuple[str, int, int], video_path: str) -> List[float]:
+        keyframes = await self._probe(video_path)
+
+        self._entries[key] = keyframes
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return keyframes
+
+    async def _probe(self, video_path: str) -> List[float]:
+        output = await self.pool.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "packet=pts_time,flags",
+                "-of",
+                "csv=p=0",
+                video_path,
+            ]
+        )
+        keyframes = []
+        for line in output.splitlines():
+            pts_time, _, flags = line.partition(",")
+            if "K" in flags and pts_time not in ("", "N/A"):
+                keyframes.append(float(pts_time))
+        keyframes.sort()
+        logger.debug(f"Indexed {len(keyframes)} keyframes of {video_path}")
+        return keyframes
+
+
+class ClipEngine:
+    """Extracts clips of indexed videos with ffmpeg.
+
+    - `copy` cuts on the keyframes around the requested range and copies the streams without
+      decoding them, in tens of milliseconds. The clip starts up to one keyframe interval early
+      and ends up to one keyframe interval late.
+    - `accurate` re-encodes the video stream with a fast preset to cut on the exact frames.
+    - `auto` copies when the keyframes are close enough to the requested range, within
+      CLIP_MAX_KEYFRAME_DRIFT_SECONDS, and re-encodes otherwise.
+
+    ffmpeg runs in the processes of the pool, the output is never opened again once it is
+    written.
+    """
+
+    def __init__(self, keyframe_index: KeyframeIndex, pool: FFmpegPool):
+        self.keyframe_index = keyframe_index
+        self.pool = pool
+
+    async def extract(
+        self,
+        video_path: str,
+        start_time: float,
+        end_time: float,
+        output_path: str,
+        mode: Optional[ClipMode] = None,
+    ) -> Clip:
+        """Extract a clip of a video.
+
+        Args:
+            video_path (str): The source video.
+            start_time (float): Start of the clip, in seconds.
+            end_time (float): End of the clip, in seconds.
+            output_path (str): Where to write the clip.
+            mode (Optional[ClipMode]): How to cut the clip. Defaults to settings.CLIP_EXTRACTION_MODE.
+
+        Returns:
+            Clip: The written clip, with the range actually cut.
+
+        Raises:
+            ValueError: If start_time is not less than end_time.
+            IOError: If ffprobe or ffmpeg fail.
+            TimeoutError: If ffprobe or ffmpeg run longer than FFMPEG_TIMEOUT_SECONDS.
+        """
+        if start_time >= end_time:
+            raise ValueError("start_time must be less than end_time")
+        start_time = max(start_time, 0.0)
+        mode = ClipMode(mode or settings.CLIP_EXTRACTION_MODE)
+
+        if mode != ClipMode.ACCURATE:
+            copy_start, copy_end = await self._keyframe_range(video_path, start_time, end_time)
+            drift = max(start_time - copy_start, (copy_end - end_time) if copy_end is not None else 0.0)
+            if mode == ClipMode.COPY or drift <= settings.CLIP_MAX_KEYFRAME_DRIFT_SECONDS:
+                await self._copy(video_path, copy_start, copy_end, output_path)
+                return Clip(
+                    path=output_path,
+                    start_time=copy_start,
+                    end_time=copy_end if copy_end is not None else end_time,
+                    mode=ClipMode.COPY,
+                )
+            logger.debug(f"Keyframes of {video_path} are {drift:.2f}s away from the clip, re-encoding it")
+
+        await self._encode(video_path, start_time, end_time, output_path)
+        return Clip(path=output_path, start_time=start_time, end_time=end_time, mode=ClipMode.ACCURATE)
+
+    async def _keyframe_range(
+        self, video_path: str, start_time: float, end_time: float
+    ) -> Tuple[float, Optional[float]]:
+        """Snap a range outwards to the keyframes around it. The end is None past the last keyframe."""
+        keyframes = await self.keyframe_index.get(video_path)
+        if not keyframes:
+            return start_time, end_time
+        start_idx = bisect.bisect_right(keyframes, start_time) - 1
+        end_idx = bisect.bisect_left(keyframes, end_time)
+        copy_start = keyframes[max(start_idx, 0)]
+        copy_end = keyframes[end_idx] if end_idx < len(keyframes) else None
+        return copy_start, copy_end
+
+    async def _copy(self, video_path: str, start_time: float, end_time: Optional[float], output_path: str):
+        command = ["ffmpeg", "-v", "error", "-ss", str(start_time), "-i", video_path]
+        if end_time is not None:
+            command += ["-t", str(end_time - start_time)]
+        command += [
+            "-map",
+            "0:v:0",
+            "-map",
+            "0:a?",
+            "-c",
+            "copy",
+            "-avoid_negative_ts",
+            "make_zero",
+            "-movflags",
+            "+faststart",
+            "-y",
+            output_path,
+        ]
+        await self.pool.run(command)
+
+    async def _encode(self, video_path: str, start_time: float, end_time: float, output_path: str):
+        await self.pool.run(
+            [
+                "ffmpeg",
+                "-v",
+                "error",
+                "-ss",
+                str(start_time),
+                "-i",
+                video_path,
+                "-t",
+                str(end_time - start_time),
+                "-c:v",
+                "libx264",
+                "-preset",
+                settings.CLIP_ENCODE_PRESET,
+                "-crf",
+                str(settings.CLIP_ENCODE_CRF),
+                "-c:a",
+                "copy",
+                "-movflags",
+                "+faststart",
+                "-y",
+                output_path,
+            ]
+        )
+
+
+clip_engine = ClipEngine(KeyframeIndex(settings.CLIP_KEYFRAME_INDEX_SIZE, ffmpeg_pool), ffmpeg_pool)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import List, Optional
+
+from loguru import logger
+
+from transcript_mcp.config import get_settings
+from transcript_mcp.metrics import counter, gauge, register_collector
+
+logger = logger.bind(name="FFmpegPool")
+
+settings = get_settings()
+
+
+class FFmpegPool:
+    """Runs ffmpeg and ffprobe as async subprocesses, a bounded number at a time.
+
+    The event loop only waits on the processes, so the server keeps answering while clips are
+    encoded. Processes beyond `max_concurrency` queue up, and a process that outlives its
+    timeout or whose caller is cancelled is killed.
+    """
+
+    def __init__(self, max_concurrency: int, timeout: float):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.busy_seconds = 0.0
+
+    async def run(self, command: List[str], timeout: Optional[float] = None) -> str:
+        """Run a command and return its standard output.
+
+        Args:
+            command (List[str]): The command, starting with the executable.
+            timeout (Optional[float]): Seconds the process may run, queueing excluded.
+                Defaults to the pool's timeout.
+
+        Returns:
+            str: The standard output of the process.
+
+        Raises:
+            IOError: If the process exits with a non-zero code.
+            TimeoutError: If the process runs longer than the timeout.
+        """
+        timeout = timeout or self.timeout
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.running += 1
+        start = time.perf_counter()
+        process = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError as e:
+            self.timeouts += 1
+            raise TimeoutError(f"{command[0]} did not finish within {timeout:g}s") from e
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            if process is not None and process.returncode is None:
+                process.kill()
+                await asyncio.shield(process.wait())
+            self.running -= 1
+            self.busy_seconds += time.perf_counter() - start
+            self._semaphore.release()
+
+        if process.returncode != 0:
+            self.failed += 1
+            stderr_text = stderr.decode("utf-8", errors="ignore").strip()
+            raise IOError(f"{command[0]} exited with code {process.returncode}: {stderr_text[-2000:]}")
+        self.completed += 1
+        return stdout.decode("utf-8", errors="ignore")
+
+    def render_metrics(self) -> List[str]:
+        prefix = "transcript_mcp_ffmpeg"
+        return [
+            *gauge(f"{prefix}_queued", "ffmpeg processes waiting for a slot.", self.queued),
+            *gauge(f"{prefix}_running", "ffmpeg processes running.", self.running),
+            *gauge(f"{prefix}_max_concurrency", "ffmpeg processes allowed to run at once.", self.max_concurrency),
+            *counter(f"{prefix}_completed_total", "ffmpeg processes that succeeded.", self.completed),
+            *counter(f"{prefix}_failed_total", "ffmpeg processes that exited with an error.", self.failed),
+            *counter(f"{prefix}_timeouts_total", "ffmpeg processes killed after their timeout.", self.timeouts),
+            *counter(f"{prefix}_cancelled_total", "ffmpeg processes killed on cancellation.", self.cancelled),
+            *counter(f"{prefix}_busy_seconds_total", "Time spent running ffmpeg processes.", self.busy_seconds),
+        ]
+
+
+ffmpeg_pool = FFmpegPool(settings.FFMPEG_MAX_CONCURRENCY, settings.FFMPEG_TIMEOUT_SECONDS)
+register_collector(ffmpeg_pool.render_metrics)
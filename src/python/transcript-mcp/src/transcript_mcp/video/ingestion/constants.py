@@ -1 +1,4 @@
 DEFAULT_CACHED_TABLES_REGISTRY_DIR = ".records"
+REGISTRY_DB_FILENAME = "registry.sqlite3"
+# How long a registry write waits for another process holding the write lock
+REGISTRY_BUSY_TIMEOUT_SECONDS = 30.0
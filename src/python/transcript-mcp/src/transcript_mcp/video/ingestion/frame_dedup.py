@@ -0,0 +1,156 @@
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+import PIL.Image
+import pixeltable.type_system as ts
+from pixeltable.iterators.video import FrameIterator
+
+HASH_SIZE = 8
+HASH_IMAGE_SIZE = 32
+
+# Parameters and extra columns of the iterators that flag near-duplicate frames
+DEDUP_INPUT_SCHEMA = {
+    "dedup_max_distance": ts.IntType(nullable=False),
+    "dedup_window_seconds": ts.FloatType(nullable=False),
+}
+DEDUP_OUTPUT_SCHEMA = {
+    "frame_hash": ts.StringType(),
+    "representative_idx": ts.IntType(),
+}
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix, `m @ x` transforms the columns of x."""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+# Only the lowest frequencies make it into the hash
+_DCT = _dct_matrix(HASH_IMAGE_SIZE)[:HASH_SIZE].astype(np.float32)
+
+
+def perceptual_hash(image: PIL.Image.Image) -> int:
+    """
+    Compute the 64-bit perceptual hash (pHash) of an image.
+
+    The image is reduced to 32x32 grayscale and each bit tells whether one of its 8x8 lowest
+    frequencies is above their median. Resizing, compression and small changes such as a
+    moving cursor or a speaker's lips flip few bits, while a different picture flips about half.
+
+    Args:
+        image (PIL.Image.Image): The image to hash.
+
+    Returns:
+        int: The hash, compared with `hamming_distance`.
+    """
+    small = image.convert("L").resize((HASH_IMAGE_SIZE, HASH_IMAGE_SIZE), PIL.Image.Resampling.LANCZOS)
+    frequencies = _DCT @ np.asarray(small, dtype=np.float32) @ _DCT.T
+    bits = (frequencies > np.median(frequencies)).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of bits that differ between two hashes."""
+    return (a ^ b).bit_count()
+
+
+class FrameDeduplicator:
+    """
+    Groups the near-duplicate frames of a video, as they are read in order.
+
+    A frame whose perceptual hash is within `max_distance` bits of the hash of a representative
+    at most `window_seconds` before it is a duplicate of the closest such representative, else
+    it becomes a representative itself. Comparing to the representative rather than to the
+    previous duplicate keeps slow changes, such as a slide filling up, from drifting into one
+    group, and the window bounds the time range a group covers.
+
+    Args:
+        max_distance (int): Most differing bits between near-duplicates, negative to disable.
+        window_seconds (float): Longest time between a representative and its duplicates.
+    """
+
+    def __init__(self, max_distance: int, window_seconds: float):
+        self.max_distance = max_distance
+        self.window_seconds = window_seconds
+        # (frame_idx, hash, time) of the representatives still in the window
+        self._representatives: List[Tuple[int, int, float]] = []
+
+    def add(self, frame_idx: int, time: float, image: PIL.Image.Image) -> Tuple[str, int]:
+        """
+        Hash the next frame and find its representative.
+
+        Args:
+            frame_idx (int): Position of the frame in the iterator.
+            time (float): Timestamp of the frame, in seconds.
+            image (PIL.Image.Image): The frame.
+
+        Returns:
+            Tuple[str, int]: The hash of the frame, in hexadecimal, and the `frame_idx` of its
+                representative, its own if it is one.
+        """
+        frame_hash = perceptual_hash(image)
+        self._representatives = [r for r in self._representatives if time - r[2] <= self.window_seconds]
+        best: Optional[Tuple[int, int]] = None
+        for representative_idx, representative_hash, _ in self._representatives:
+            distance = hamming_distance(frame_hash, representative_hash)
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, representative_idx)
+
+        if best is not None:
+            return f"{frame_hash:016x}", best[1]
+        self._representatives.append((frame_idx, frame_hash, time))
+        return f"{frame_hash:016x}", frame_idx
+
+    def reset(self):
+        self._representatives = []
+
+
+class DedupFrameIterator(FrameIterator):
+    """
+    Pixeltable's `FrameIterator`, also flagging near-duplicate frames, see `FrameDeduplicator`.
+
+    Args:
+        video: The video to sample.
+        fps: Frames to extract per second of video.
+        num_frames: Exact number of frames to extract.
+        dedup_max_distance: Most differing hash bits between near-duplicates, negative to disable.
+        dedup_window_seconds: Longest time between a representative frame and its duplicates.
+    """
+
+    def __init__(
+        self,
+        video: str,
+        *,
+        fps: Optional[float] = None,
+        num_frames: Optional[int] = None,
+        dedup_max_distance: int,
+        dedup_window_seconds: float,
+    ):
+        super().__init__(video, fps=fps, num_frames=num_frames)
+        self.deduplicator = FrameDeduplicator(dedup_max_distance, dedup_window_seconds)
+
+    @classmethod
+    def input_schema(cls) -> dict[str, ts.ColumnType]:
+        return {**super().input_schema(), **DEDUP_INPUT_SCHEMA}
+
+    @classmethod
+    def output_schema(cls, *args: Any, **kwargs: Any) -> tuple[dict[str, ts.ColumnType], list[str]]:
+        schema, unstored = super().output_schema(*args, **kwargs)
+        return {**schema, **DEDUP_OUTPUT_SCHEMA}, unstored
+
+    def __next__(self) -> dict[str, Any]:
+        result = super().__next__()
+        result["frame_hash"], result["representative_idx"] = self.deduplicator.add(
+            result["frame_idx"], result["pos_msec"] / 1000, result["frame"]
+        )
+        return result
+
+    def set_pos(self, pos: int) -> None:
+        # Pixeltable only seeks to read the unstored frames again, the groups were stored while
+        # the frames were read in order
+        if pos != self.next_pos:
+            self.deduplicator.reset()
+        super().set_pos(pos)
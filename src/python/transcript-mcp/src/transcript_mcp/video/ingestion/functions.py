@@ -1,12 +1,95 @@
+import asyncio
+import base64
+import io
+import weakref
+from pathlib import Path
+from typing import Optional
+
+import openai
 import pixeltable as pxt
 from PIL import Image
 
+from transcript_mcp.config import get_settings
+from transcript_mcp.video.ingestion.rate_limiter import AdaptiveLimiter
+from transcript_mcp.video.ingestion.worker import raise_if_cancelled
+
+settings = get_settings()
+
+# Each ingestion worker process builds its own limiters, the budgets are split evenly between them
+_workers = max(1, settings.INGESTION_MAX_CONCURRENCY)
+
+transcription_limiter = AdaptiveLimiter(
+    "Transcription",
+    max_concurrency=max(1, settings.TRANSCRIPTION_MAX_CONCURRENCY // _workers),
+    requests_per_minute=settings.AUDIO_TRANSCRIPT_RPM / _workers,
+    max_retries=settings.REMOTE_CALL_MAX_RETRIES,
+    backoff_seconds=settings.REMOTE_CALL_BACKOFF_SECONDS,
+    max_backoff_seconds=settings.REMOTE_CALL_MAX_BACKOFF_SECONDS,
+)
+captioning_limiter = AdaptiveLimiter(
+    "Captioning",
+    max_concurrency=max(1, settings.CAPTIONING_MAX_CONCURRENCY // _workers),
+    max_retries=settings.REMOTE_CALL_MAX_RETRIES,
+    backoff_seconds=settings.REMOTE_CALL_BACKOFF_SECONDS,
+    max_backoff_seconds=settings.REMOTE_CALL_MAX_BACKOFF_SECONDS,
+)
+
+# Pixeltable runs each operation in a new event loop, an HTTP client can't outlive its loop
+_openai_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _openai_client() -> openai.AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    client = _openai_clients.get(loop)
+    if client is None:
+        # Retries are left to the limiters, which back off every call at once
+        client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+        _openai_clients[loop] = client
+    return client
+
 
 @pxt.udf
 def extract_text_from_chunk(transcript: pxt.type_system.Json) -> str:
     return f"{transcript['text']}"
 
 
+@pxt.udf
+async def transcribe_audio(audio: pxt.type_system.Audio, model: str) -> pxt.type_system.Json:
+    async def request():
+        # Checked on each attempt, a cancelled job stops spending the OpenAI budget right away
+        raise_if_cancelled()
+        return await _openai_client().audio.transcriptions.create(file=Path(audio), model=model)
+
+    transcription = await transcription_limiter.call(request)
+    return transcription.model_dump()
+
+
+@pxt.udf
+async def caption_image(image: pxt.type_system.Image, prompt: str, model: str) -> str:
+    # JPEG uploads are several times smaller than PNG, the model sees the same picture
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=90)
+    image_url = f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt},
+                {"type": "image_url", "image_url": {"url": image_url}},
+            ],
+        }
+    ]
+
+    async def request():
+        raise_if_cancelled()
+        return await _openai_client().chat.completions.create(messages=messages, model=model)
+
+    completion = await captioning_limiter.call(request)
+    return completion.choices[0].message.content
+
+
 @pxt.udf
 def resize_image(image: pxt.type_system.Image, width: int, height: int) -> pxt.type_system.Image:
     if not isinstance(image, Image.Image):
@@ -16,6 +99,15 @@ def resize_image(image: pxt.type_system.Image, width: int, height: int) -> pxt.t
     return image
 
 
+@pxt.udf
+def representative_frame(
+    image: pxt.type_system.Image, frame_idx: int, representative_idx: int
+) -> Optional[pxt.type_system.Image]:
+    # Near-duplicates get None, which pixeltable passes through the columns computed from it
+    # without calling their functions
+    return image if frame_idx == representative_idx else None
+
+
 @pxt.udf
 def group_sentence_by_frames(
     frame_pos_msec: pxt.type_system.Float, transcript: pxt.type_system.Json
@@ -0,0 +1,270 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from enum import Enum
+from multiprocessing.managers import SyncManager
+from typing import Any, Dict, List, Optional, Set
+from uuid import uuid4
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+import transcript_mcp.video.ingestion.registry as registry
+from transcript_mcp.config import get_settings
+from transcript_mcp.video.clip_cache import clip_cache
+from transcript_mcp.video.clip_engine import clip_engine
+from transcript_mcp.video.ingestion.worker import ingest_video, init_worker
+from transcript_mcp.video.library_search import library_index
+from transcript_mcp.video.search_engine_cache import search_engine_cache
+
+logger = logger.bind(name="IngestionJobs")
+
+settings = get_settings()
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class IngestionJob(BaseModel):
+    job_id: str = Field(..., description="Id of the job")
+    video_path: str = Field(..., description="Path of the video being ingested")
+    status: JobStatus = Field(JobStatus.PENDING, description="Status of the job")
+    stage: Optional[str] = Field(None, description="Ingestion stage currently running")
+    progress: float = Field(0.0, description="Fraction of the ingestion stages done, between 0 and 1")
+    queue_position: Optional[int] = Field(None, description="Position in the queue while pending, starting at 1")
+    error: Optional[str] = Field(None, description="Why the job failed")
+    created_at: float = Field(default_factory=time.time, description="When the job was submitted")
+    updated_at: float = Field(default_factory=time.time, description="When the job last changed")
+
+
+class IngestionJobManager:
+    """Runs video ingestions as background jobs.
+
+    `submit` returns as soon as the job is queued, clients then poll the job for its stage and
+    progress. A video already indexed completes right away, and a video already being ingested
+    returns the job in progress rather than starting another one.
+
+    At most `max_concurrency` ingestions run at once, each in a worker process: pixeltable
+    keeps a single connection per process, so ingestions can't share one, and searches served
+    by the server never wait on an ingestion's transaction. Each worker applies its own
+    limits to the OpenAI calls.
+
+    Cancelling a running job sets an event shared with its worker, which stops before its next
+    stage or OpenAI call.
+
+    Jobs are kept in memory, the `max_finished` most recent finished ones stay available.
+    """
+
+    def __init__(self, max_concurrency: int, max_finished: int):
+        self.max_concurrency = max_concurrency
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._active_by_video: Dict[str, str] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Jobs are updated from the worker threads and read from the event loop
+        self._lock = threading.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+        # Started with the first job, spawned rather than forked since the server holds
+        # pixeltable's connection and the event loop
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._progress_queue: Optional["multiprocessing.Queue"] = None
+        # Hosts the cancellation events of the running jobs, shared with the worker processes
+        self._manager: Optional[SyncManager] = None
+        self._cancel_events: Dict[str, Any] = {}
+
+    def submit(self, video_path: str) -> IngestionJob:
+        """Queue the ingestion of a video.
+
+        Args:
+            video_path (str): Path to the video file to process.
+
+        Returns:
+            IngestionJob: The new job, the job already ingesting the video, or a completed job
+                if the video is already indexed.
+        """
+        with self._lock:
+            active_job_id = self._active_by_video.get(video_path)
+            if active_job_id is not None:
+                return self._snapshot(self._jobs[active_job_id])
+
+            job = IngestionJob(job_id=str(uuid4()), video_path=video_path)
+            if registry.index_exists(video_path):
+                logger.info(f"Video index for '{video_path}' already exists and is ready for use.")
+                job.status = JobStatus.COMPLETED
+                job.stage = "completed"
+                job.progress = 1.0
+            else:
+                self._active_by_video[video_path] = job.job_id
+            self._jobs[job.job_id] = job
+            self._prune()
+
+        if job.status == JobStatus.PENDING:
+            task = asyncio.create_task(self._run(job), name=f"ingestion-{job.job_id}")
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            logger.info(f"Queued ingestion job {job.job_id} for {video_path}")
+        return self.get(job.job_id)
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Get the state of a job, or None if it doesn't exist or was pruned."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job is not None else None
+
+    def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        """Cancel a pending or running job.
+
+        A pending job never starts. A running job is marked cancelled right away, its worker
+        stops before the next ingestion stage or OpenAI call and the partial index is never
+        registered.
+
+        Args:
+            job_id (str): The id of the job to cancel.
+
+        Returns:
+            Optional[IngestionJob]: The job after the call, or None if it doesn't exist. Jobs that
+                already finished keep their status.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in FINISHED_STATUSES:
+                return self._snapshot(job)
+            job.status = JobStatus.CANCELLED
+            job.updated_at = time.time()
+            # The video can be submitted again right away
+            if self._active_by_video.get(job.video_path) == job_id:
+                del self._active_by_video[job.video_path]
+            cancel_event = self._cancel_events.get(job_id)
+            snapshot = self._snapshot(job)
+
+        if cancel_event is not None:
+            cancel_event.set()
+        logger.info(f"Cancelled ingestion job {job_id} for {job.video_path}")
+        return snapshot
+
+    def list(self) -> List[IngestionJob]:
+        """List every known job, oldest first."""
+        with self._lock:
+            return [self._snapshot(job) for job in self._jobs.values()]
+
+    def _snapshot(self, job: IngestionJob) -> IngestionJob:
+        # Called with the lock held, callers get a copy they can read while the job moves on
+        snapshot = job.model_copy()
+        if job.status == JobStatus.PENDING:
+            snapshot.queue_position = 1 + sum(
+                1
+                for other in self._jobs.values()
+                if other.status == JobStatus.PENDING and other.created_at < job.created_at
+            )
+        return snapshot
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            if self._progress_queue is None:
+                self._progress_queue = context.Queue()
+                threading.Thread(target=self._read_progress, name="ingestion-progress", daemon=True).start()
+            if self._manager is None:
+                self._manager = context.Manager()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_concurrency,
+                mp_context=context,
+                initializer=init_worker,
+                initargs=(self._progress_queue,),
+            )
+        return self._executor
+
+    def _read_progress(self):
+        while True:
+            job_id, stage, step, total = self._progress_queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+            # Ignores the last messages of a job that already failed
+            if job is not None and job.status == JobStatus.IN_PROGRESS:
+                self._update(job, stage=stage, progress=step / total if total else 0.0)
+
+    def _update(self, job: IngestionJob, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.updated_at = time.time()
+
+    def _start(self, job: IngestionJob, cancel_event: Any) -> bool:
+        """Mark a job in progress, unless it was cancelled while waiting for a slot."""
+        with self._lock:
+            if job.status != JobStatus.PENDING:
+                return False
+            job.status = JobStatus.IN_PROGRESS
+            job.updated_at = time.time()
+            self._cancel_events[job.job_id] = cancel_event
+            return True
+
+    async def _run(self, job: IngestionJob):
+        async with self._semaphore:
+            try:
+                loop = asyncio.get_running_loop()
+                executor = self._get_executor()
+                cancel_event = await asyncio.to_thread(self._manager.Event)
+                if not self._start(job, cancel_event):
+                    logger.info(f"Ingestion job {job.job_id} was cancelled before it started")
+                    return
+                try:
+                    await loop.run_in_executor(executor, ingest_video, job.job_id, job.video_path, cancel_event)
+                except BrokenProcessPool as e:
+                    # A worker died, e.g. killed for running out of memory, the next job gets a new pool.
+                    # Jobs running on the same pool fail too, only the first one replaces it.
+                    if self._executor is executor:
+                        self._executor = None
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise RuntimeError("The ingestion worker process exited unexpectedly") from e
+                search_engine_cache.invalidate(job.video_path)
+                library_index.invalidate(job.video_path)
+                # Hash the video and index its keyframes now, so its first clip is cut right away
+                await asyncio.to_thread(clip_cache.digests.get, job.video_path)
+                try:
+                    await clip_engine.keyframe_index.get(job.video_path)
+                except (IOError, TimeoutError) as e:
+                    logger.warning(f"Couldn't index the keyframes of {job.video_path}: {e}")
+            except Exception as e:
+                if job.status == JobStatus.CANCELLED:
+                    logger.info(f"Ingestion job {job.job_id} for {job.video_path} stopped after its cancellation")
+                else:
+                    logger.error(f"Ingestion job {job.job_id} for {job.video_path} failed: {e}")
+                    self._update(job, status=JobStatus.FAILED, error=str(e))
+            else:
+                # A job cancelled once its index was registered still ends completed
+                self._update(job, status=JobStatus.COMPLETED, stage="completed", progress=1.0)
+                logger.info(f"Ingestion job {job.job_id} for {job.video_path} completed")
+            finally:
+                with self._lock:
+                    if self._active_by_video.get(job.video_path) == job.job_id:
+                        del self._active_by_video[job.video_path]
+                    self._cancel_events.pop(job.job_id, None)
+                    self._prune()
+
+    def _prune(self):
+        # Called with the lock held
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in FINISHED_STATUSES
+        ]
+        for job_id in finished[: max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+
+ingestion_jobs = IngestionJobManager(settings.INGESTION_MAX_CONCURRENCY, settings.INGESTION_JOBS_HISTORY)
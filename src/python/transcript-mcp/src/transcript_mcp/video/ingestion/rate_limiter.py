@@ -0,0 +1,146 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+import openai
+from loguru import logger
+
+logger = logger.bind(name="AdaptiveLimiter")
+
+T = TypeVar("T")
+
+# Errors worth retrying, the others are the request's fault and would fail again
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+class AdaptiveLimiter:
+    """Bounds the concurrency and rate of the calls to a remote API, adapting to its rate limits.
+
+    Calls beyond the current limit wait for a slot, and calls start at most
+    `requests_per_minute` per minute. A rate limited call (HTTP 429) halves the limit and pauses
+    every call for the delay the API asks for, or an exponential backoff. Each successful call
+    then raises the limit by 1/limit, so it grows back by about one per round of calls, up to
+    `max_concurrency`. Connection errors, timeouts and server errors are retried after the same
+    backoff without lowering the limit.
+
+    Pixeltable evaluates each operation in an event loop of its own, the limit and the pause
+    carry over from one to the next. The limiter is used by one thread at a time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        requests_per_minute: Optional[float] = None,
+        max_retries: int = 8,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.min_interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._paused_until = 0.0
+        self._next_request_at = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+
+    async def call(self, request: Callable[[], Awaitable[T]]) -> T:
+        """Run a request once a slot is free, retrying it on transient errors.
+
+        Args:
+            request (Callable[[], Awaitable[T]]): Makes the request, called again on each retry.
+
+        Returns:
+            T: The result of the request.
+
+        Raises:
+            openai.OpenAIError: The error of the last attempt, once `max_retries` retries failed,
+                or right away if it is not worth retrying.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._acquire()
+            try:
+                self.requests += 1
+                result = await request()
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._on_error(e, attempt)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                return result
+            finally:
+                self._release()
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def _on_error(self, error: Exception, attempt: int) -> float:
+        delay = _retry_after(error)
+        if delay is None:
+            # Full jitter keeps the callers that failed together from retrying together
+            delay = random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt))
+
+        if isinstance(error, openai.RateLimitError):
+            self.rate_limited += 1
+            now = time.monotonic()
+            # The calls in flight when the limit was hit fail together, only the first one counts
+            if now >= self._paused_until:
+                self.limit = max(1.0, self.limit / 2)
+                logger.warning(
+                    f"{self.name} rate limited, lowering concurrency to {int(self.limit)} and pausing {delay:.1f}s"
+                )
+            self._paused_until = max(self._paused_until, now + delay)
+        else:
+            logger.debug(f"{self.name} call failed, retrying in {delay:.1f}s: {error}")
+        return delay
+
+    async def _acquire(self):
+        while True:
+            wait = max(self._paused_until, self._next_request_at) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            elif self.in_flight < int(self.limit):
+                break
+            else:
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+                await waiter
+        self.in_flight += 1
+        self._next_request_at = time.monotonic() + self.min_interval
+
+    def _release(self):
+        self.in_flight -= 1
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            # Skips the callers that were cancelled, or whose operation was aborted with its loop
+            if not waiter.done() and not waiter.get_loop().is_closed():
+                waiter.set_result(None)
+                free -= 1
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the delay a rate limited response asks for, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        # An HTTP date rather than a number of seconds
+        return None
+    return None
@@ -1,53 +1,196 @@
-import json
 import os
+import sqlite3
+import threading
 from datetime import datetime
-from functools import lru_cache
 from pathlib import Path
-from typing import Dict
+from typing import List, Optional
 
 from loguru import logger
 
 import transcript_mcp.video.ingestion.constants as cc
+from transcript_mcp.serialization import loads
 from transcript_mcp.video.ingestion.models import CachedTable, CachedTableMetadata
 
 logger = logger.bind(name="TableRegistry")
 
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS video_indexes (
+    video_name TEXT PRIMARY KEY,
+    video_cache TEXT NOT NULL,
+    video_table TEXT NOT NULL,
+    frames_view TEXT NOT NULL,
+    audio_chunks_view TEXT NOT NULL,
+    registered_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS registry_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+COLUMNS = "video_name, video_cache, video_table, frames_view, audio_chunks_view"
+
+# sqlite3 connections can't be shared between threads or forked processes, each opens its own
+_local = threading.local()
+
+
+def _registry_path() -> Path:
+    return Path(cc.DEFAULT_CACHED_TABLES_REGISTRY_DIR) / cc.REGISTRY_DB_FILENAME
+
+
+def _connect() -> sqlite3.Connection:
+    """Return this thread's connection to the registry, creating the database on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        path = _registry_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode, writes open their transactions explicitly
+        conn = sqlite3.connect(str(path), timeout=cc.REGISTRY_BUSY_TIMEOUT_SECONDS, isolation_level=None)
+        # WAL lets readers of every process run alongside the single writer
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _migrate_snapshots(conn)
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+
+def _latest_snapshot() -> Optional[Path]:
+    try:
+        snapshots = [
+            f
+            for f in os.listdir(cc.DEFAULT_CACHED_TABLES_REGISTRY_DIR)
+            if f.startswith("registry_") and f.endswith(".json")
+        ]
+    except FileNotFoundError:
+        return None
+    return Path(cc.DEFAULT_CACHED_TABLES_REGISTRY_DIR) / max(snapshots) if snapshots else None
+
+
+def _migrate_snapshots(conn: sqlite3.Connection):
+    """Import the latest `registry_<timestamp>.json` snapshot, once per database.
+
+    Snapshots were written by earlier versions on every registration, each holding the whole
+    registry. They are left in place but no longer read after the migration.
+    """
+    if conn.execute("SELECT 1 FROM registry_meta WHERE key = 'snapshots_migrated'").fetchone():
+        return
+
+    # Taking the write lock first makes concurrent processes migrate one after the other
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not conn.execute("SELECT 1 FROM registry_meta WHERE key = 'snapshots_migrated'").fetchone():
+            snapshot = _latest_snapshot()
+            if snapshot is not None:
+                with open(snapshot, "rb") as f:
+                    entries = loads(f.read())
+                for value in entries.values():
+                    # The oldest snapshots stored each entry as a nested JSON string
+                    if isinstance(value, str):
+                        metadata = CachedTableMetadata.model_validate_json(value)
+                    else:
+                        metadata = CachedTableMetadata.model_validate(value)
+                    _insert(conn, metadata, replace=False)
+                _bump_generation(conn)
+                logger.info(f"Migrated {len(entries)} video indexes from {snapshot}")
+            conn.execute(
+                "INSERT INTO registry_meta (key, value) VALUES ('snapshots_migrated', ?)",
+                (str(snapshot) if snapshot else "",),
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _insert(conn: sqlite3.Connection, metadata: CachedTableMetadata, replace: bool):
+    conn.execute(
+        f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO video_indexes ({COLUMNS}, registered_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            metadata.video_name,
+            metadata.video_cache,
+            metadata.video_table,
+            metadata.frames_view,
+            metadata.audio_chunks_view,
+            datetime.now().isoformat(),
+        ),
+    )
+
+
+def _bump_generation(conn: sqlite3.Connection):
+    conn.execute(
+        "INSERT INTO registry_meta (key, value) VALUES ('generation', '1') "
+        "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+    )
+
+
+def generation() -> int:
+    """
+    Return the generation of the registry, a primary key read.
+
+    Every registration, by any process sharing the registry, moves it forward, so readers can
+    skip listing the registry while it stays the same.
+
+    Returns:
+        int: The number of changes made to the registry.
+    """
+    row = _connect().execute("SELECT value FROM registry_meta WHERE key = 'generation'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def get_index(video_name: str) -> Optional[CachedTableMetadata]:
+    """
+    Look up a video index in the registry.
+
+    Args:
+        video_name (str): The name of the video index.
 
-VIDEO_INDEXES_REGISTRY: Dict[str, CachedTableMetadata] = {}
+    Returns:
+        Optional[CachedTableMetadata]: The index metadata, or None if the video is not registered.
+    """
+    row = _connect().execute(f"SELECT {COLUMNS} FROM video_indexes WHERE video_name = ?", (video_name,)).fetchone()
+    if row is None:
+        return None
+    return CachedTableMetadata(**dict(zip(COLUMNS.split(", "), row)))
 
 
-# Hit cache on multiple calls to get_registry
-@lru_cache(maxsize=1)
-def get_registry() -> Dict[str, CachedTableMetadata]:
+def index_exists(video_name: str) -> bool:
     """
-    Get the global video index registry.
+    Check if a video index is registered.
+
+    Args:
+        video_name (str): The name of the video index.
 
     Returns:
-        Dict[str, CachedTableMetadata]: The video index registry.
+        bool: True if the video is registered.
     """
-    global VIDEO_INDEXES_REGISTRY
-    if not VIDEO_INDEXES_REGISTRY:
-        try:
-            registry_files = [
-                f
-                for f in os.listdir(cc.DEFAULT_CACHED_TABLES_REGISTRY_DIR)
-                if f.startswith("registry_") and f.endswith(".json")
-            ]
-            if registry_files:
-                latest_file = max(registry_files)
-                latest_registry = Path(cc.DEFAULT_CACHED_TABLES_REGISTRY_DIR) / latest_file
-                with open(str(latest_registry), "r") as f:
-                    VIDEO_INDEXES_REGISTRY = json.load(f)
-                    for key, value in VIDEO_INDEXES_REGISTRY.items():
-                        if isinstance(value, str):
-                            value = json.loads(value)
-                        VIDEO_INDEXES_REGISTRY[key] = CachedTableMetadata(**value)
-                logger.info(f"Loading registry from {latest_registry}")
-        except FileNotFoundError:
-            logger.warning("Registry file not found. Returning empty registry.")
-    else:
-        logger.info("Using existing video index registry.")
-    return VIDEO_INDEXES_REGISTRY
+    return _connect().execute("SELECT 1 FROM video_indexes WHERE video_name = ?", (video_name,)).fetchone() is not None
+
+
+def list_indexes() -> List[str]:
+    """
+    List the names of every registered video index, in registration order.
+
+    Returns:
+        List[str]: The video index names.
+    """
+    rows = _connect().execute("SELECT video_name FROM video_indexes ORDER BY registered_at, video_name").fetchall()
+    return [name for (name,) in rows]
+
+
+def list_index_metadata() -> List[CachedTableMetadata]:
+    """
+    List the metadata of every registered video index, in registration order.
+
+    Returns:
+        List[CachedTableMetadata]: The metadata of the video indexes.
+    """
+    rows = _connect().execute(
+        f"SELECT {COLUMNS} FROM video_indexes ORDER BY registered_at, video_name"
+    ).fetchall()
+    return [CachedTableMetadata(**dict(zip(COLUMNS.split(", "), row))) for row in rows]
 
 
 def add_index_to_registry(
@@ -59,51 +202,47 @@ def add_index_to_registry(
     """
     Register a video index in the global registry.
 
+    The entry is written in its own transaction and is visible to every process sharing the
+    registry once this returns. Registering a video again replaces its entry.
+
     Args:
-        video_path (str): The path to the video file.
         video_name (str): The name of the video.
         video_cache (str): The cache path for the video.
-        video_table_name (str): The name of the video table.
         frames_view_name (str): The name of the frames view.
-        sentences_view_name (str): The name of the sentences view.
-        semantics_index_name (str): The name of the semantics index.
-
+        audio_view_name (str): The name of the audio chunks view.
     """
-    global VIDEO_INDEXES_REGISTRY
     cached_table_meta = CachedTableMetadata(
         video_name=video_name,
         video_cache=video_cache,
         video_table=f"{video_cache}.table",
         frames_view=frames_view_name,
         audio_chunks_view=audio_view_name,
-    ).model_dump_json()
-    VIDEO_INDEXES_REGISTRY[video_name] = cached_table_meta
-
-    dt = datetime.now()
-    dtstr = dt.strftime("%Y-%m-%d%H:%M:%S")
-    records_dir = Path(cc.DEFAULT_CACHED_TABLES_REGISTRY_DIR)
-    records_dir.mkdir(parents=True, exist_ok=True)
-    with open(records_dir / f"registry_{dtstr}.json", "w") as f:
-        for k, v in VIDEO_INDEXES_REGISTRY.items():
-            if isinstance(v, CachedTableMetadata):
-                v = v.model_dump_json()
-            VIDEO_INDEXES_REGISTRY[k] = v
-        json.dump(VIDEO_INDEXES_REGISTRY, f, indent=4)
+    )
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _insert(conn, cached_table_meta, replace=True)
+        _bump_generation(conn)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
 
     logger.info(f"Video index '{video_name}' registered in the global registry.")
 
 
-def get_table(video_name: str) -> Dict[str, CachedTable]:
+def get_table(video_name: str) -> Optional[CachedTable]:
     """
-    Get the global video index registry.
+    Open the pixeltable tables of a registered video index.
+
+    Args:
+        video_name (str): The name of the video index.
 
     Returns:
-        Dict[str, CachedTable]: The video index registry.
+        Optional[CachedTable]: The opened index, or None if the video is not registered.
     """
-    registry = get_registry()
-    logger.info(f"Registry: {registry}")
-    metadata = registry.get(video_name)
-    if isinstance(metadata, str):
-        metadata = json.loads(metadata)
-    logger.info(f"Metadata: {metadata}")
+    metadata = get_index(video_name)
+    if metadata is None:
+        return None
+    logger.debug(f"Opening tables of video index '{video_name}': {metadata}")
     return CachedTable.from_metadata(metadata)
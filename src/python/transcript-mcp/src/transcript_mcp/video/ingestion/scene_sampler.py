@@ -0,0 +1,326 @@
+import heapq
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, List, NamedTuple, Tuple
+
+import av
+import numpy as np
+import PIL.Image
+import pixeltable.type_system as ts
+from loguru import logger
+from pixeltable.iterators import ComponentIterator
+
+from transcript_mcp.video.ingestion.frame_dedup import DEDUP_INPUT_SCHEMA, DEDUP_OUTPUT_SCHEMA, FrameDeduplicator
+
+logger = logger.bind(name="SceneSampler")
+
+THUMBNAIL_WIDTH = 64
+THUMBNAIL_HEIGHT = 36
+HISTOGRAM_BINS = 16
+FRAME_PLAN_CACHE_SIZE = 64
+
+
+class KeyframeSamples(NamedTuple):
+    times: np.ndarray  # (n,) seconds from the start of the video
+    thumbnails: np.ndarray  # (n, THUMBNAIL_HEIGHT * THUMBNAIL_WIDTH) grayscale, between 0 and 1
+    histograms: np.ndarray  # (n, 3 * HISTOGRAM_BINS) color histograms, each channel summing to 1
+    duration: float
+
+
+def sample_keyframes(video_path: str, analysis_fps: float) -> KeyframeSamples:
+    """
+    Decode the keyframes of a video into small thumbnails and color histograms.
+
+    Only keyframes are decoded: encoders place one on each shot boundary, and they decode on
+    their own without the frames around them. Keyframes closer than 1/analysis_fps seconds to
+    the previous sample are skipped.
+
+    Args:
+        video_path (str): The video to analyze.
+        analysis_fps (float): Most keyframes sampled per second of video.
+
+    Returns:
+        KeyframeSamples: The sampled keyframes, in order.
+    """
+    times, thumbnails, histograms = [], [], []
+    min_gap = 1.0 / analysis_fps
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        stream.codec_context.skip_frame = "NONKEY"
+        start = stream.start_time or 0
+        for frame in container.decode(stream):
+            if frame.pts is None:
+                continue
+            time = float((frame.pts - start) * stream.time_base)
+            if times and time - times[-1] < min_gap:
+                continue
+            rgb = frame.reformat(width=THUMBNAIL_WIDTH, height=THUMBNAIL_HEIGHT, format="rgb24").to_ndarray()
+            times.append(time)
+            thumbnails.append(rgb.mean(axis=2).ravel() / 255.0)
+            bins = rgb.reshape(-1, 3) // (256 // HISTOGRAM_BINS)
+            histogram = [np.bincount(bins[:, c], minlength=HISTOGRAM_BINS) for c in range(3)]
+            histograms.append(np.concatenate(histogram) / (THUMBNAIL_WIDTH * THUMBNAIL_HEIGHT))
+
+        if stream.duration:
+            duration = float(stream.duration * stream.time_base)
+        elif container.duration:
+            duration = container.duration / av.time_base
+        else:
+            duration = times[-1] if times else 0.0
+
+    return KeyframeSamples(
+        times=np.asarray(times, dtype=np.float64),
+        thumbnails=np.asarray(thumbnails, dtype=np.float32).reshape(len(times), -1),
+        histograms=np.asarray(histograms, dtype=np.float32).reshape(len(times), -1),
+        duration=max(duration, times[-1] if times else 0.0),
+    )
+
+
+def scene_change_scores(samples: KeyframeSamples) -> np.ndarray:
+    """
+    Score how much each sample differs from the previous one, between 0 and 1.
+
+    The score averages the distance between color histograms, which ignores motion within a
+    shot, and the mean difference between thumbnails, which catches cuts between shots of
+    similar colors.
+
+    Returns:
+        np.ndarray: (n - 1,) scores, the i-th between samples i and i + 1.
+    """
+    if len(samples.times) < 2:
+        return np.zeros(0, dtype=np.float32)
+    histogram_distance = 0.5 * np.abs(np.diff(samples.histograms, axis=0)).sum(axis=1) / 3
+    thumbnail_distance = np.abs(np.diff(samples.thumbnails, axis=0)).mean(axis=1)
+    return (histogram_distance + thumbnail_distance) / 2
+
+
+def split_scenes(scores: np.ndarray, threshold: float, max_scenes: int) -> List[int]:
+    """
+    Find the samples starting a new scene.
+
+    Args:
+        scores (np.ndarray): The scene change scores between consecutive samples.
+        threshold (float): Lowest score of a shot boundary.
+        max_scenes (int): Most scenes to split the video into, the weakest boundaries are dropped.
+
+    Returns:
+        List[int]: Sorted indexes of the samples starting a scene, the first scene excluded.
+    """
+    boundaries = [i + 1 for i in np.flatnonzero(scores > threshold)]
+    if len(boundaries) >= max_scenes:
+        boundaries = sorted(heapq.nlargest(max_scenes - 1, boundaries, key=lambda i: scores[i - 1]))
+    return boundaries
+
+
+def allocate_frames(durations: List[float], total: int) -> List[int]:
+    """
+    Share frames between scenes: one each, the rest to the scenes with the longest time per frame.
+
+    Args:
+        durations (List[float]): Duration of each scene, in seconds.
+        total (int): Frames to share, at least one per scene.
+
+    Returns:
+        List[int]: Frames of each scene.
+    """
+    counts = [1] * len(durations)
+    heap = [(-duration, i) for i, duration in enumerate(durations)]
+    heapq.heapify(heap)
+    for _ in range(total - len(durations)):
+        _, i = heapq.heappop(heap)
+        counts[i] += 1
+        heapq.heappush(heap, (-durations[i] / counts[i], i))
+    return counts
+
+
+def plan_frames(
+    video_path: str,
+    min_frames_per_minute: float,
+    max_frames_per_minute: float,
+    scene_threshold: float,
+    analysis_fps: float,
+) -> List[float]:
+    """
+    Pick the timestamps of the frames representing a video, scene by scene.
+
+    The video gets between `min_frames_per_minute` and `max_frames_per_minute` frames per
+    minute: one per scene, and more in the longest scenes when there are fewer scenes than the
+    minimum. When there are more, the weakest shot boundaries are dropped. Each scene is split
+    into as many equal parts as it has frames, and each part is represented by its keyframe
+    closest to the average of its keyframes, or by its middle when it has none.
+
+    Args:
+        video_path (str): The video to sample.
+        min_frames_per_minute (float): Fewest frames per minute of video.
+        max_frames_per_minute (float): Most frames per minute of video.
+        scene_threshold (float): Lowest scene change score of a shot boundary, between 0 and 1.
+        analysis_fps (float): Most keyframes analyzed per second of video.
+
+    Returns:
+        List[float]: Sorted timestamps of the frames to extract, in seconds.
+    """
+    samples = sample_keyframes(video_path, analysis_fps)
+    minutes = samples.duration / 60
+    min_frames = max(1, math.ceil(minutes * min_frames_per_minute))
+    max_frames = max(min_frames, math.floor(minutes * max_frames_per_minute))
+
+    if len(samples.times) == 0:
+        logger.warning(f"No keyframe decoded in {video_path}, sampling it uniformly")
+        return [samples.duration * (i + 0.5) / min_frames for i in range(min_frames)]
+
+    boundaries = split_scenes(scene_change_scores(samples), scene_threshold, max_frames)
+    starts = [0] + boundaries
+    ends = boundaries + [len(samples.times)]
+    scene_times = [0.0] + [float(samples.times[i]) for i in boundaries] + [samples.duration]
+    durations = [scene_times[k + 1] - scene_times[k] for k in range(len(starts))]
+    counts = allocate_frames(durations, max(len(starts), min_frames))
+
+    frame_times = []
+    for k, count in enumerate(counts):
+        scene_start, part = scene_times[k], durations[k] / count
+        indexes = np.arange(starts[k], ends[k])
+        for j in range(count):
+            part_start, part_end = scene_start + j * part, scene_start + (j + 1) * part
+            in_part = indexes[(samples.times[indexes] >= part_start) & (samples.times[indexes] < part_end)]
+            if len(in_part) == 0:
+                frame_times.append((part_start + part_end) / 2)
+                continue
+            thumbnails = samples.thumbnails[in_part]
+            distances = np.abs(thumbnails - thumbnails.mean(axis=0)).mean(axis=1)
+            frame_times.append(float(samples.times[in_part[int(np.argmin(distances))]]))
+
+    logger.info(
+        f"Sampling {len(frame_times)} frames from {len(starts)} scenes of {video_path} "
+        f"({minutes:.1f} min, {len(samples.times)} keyframes analyzed)"
+    )
+    return sorted(frame_times)
+
+
+# Pixeltable creates the iterator again to read the frames, which aren't stored, so plans are
+# kept for the videos read last
+_frame_plans: "OrderedDict[Tuple[Any, ...], List[float]]" = OrderedDict()
+_frame_plans_lock = threading.Lock()
+
+
+def _cached_plan_frames(video_path: str, *params: float) -> List[float]:
+    stat = os.stat(video_path)
+    key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns, *params)
+    with _frame_plans_lock:
+        if key in _frame_plans:
+            _frame_plans.move_to_end(key)
+            return _frame_plans[key]
+    frame_times = plan_frames(video_path, *params)
+    with _frame_plans_lock:
+        _frame_plans[key] = frame_times
+        while len(_frame_plans) > FRAME_PLAN_CACHE_SIZE:
+            _frame_plans.popitem(last=False)
+    return frame_times
+
+
+class SceneFrameIterator(ComponentIterator):
+    """
+    Iterator over representative frames of the scenes of a video, see `plan_frames`.
+
+    It yields the same columns as pixeltable's `FrameIterator`, and flags near-duplicate frames
+    like `DedupFrameIterator`, so views built with either are searched the same way.
+
+    Args:
+        video: The video to sample.
+        min_frames_per_minute: Fewest frames per minute of video.
+        max_frames_per_minute: Most frames per minute of video.
+        scene_threshold: Lowest scene change score of a shot boundary, between 0 and 1.
+        analysis_fps: Most keyframes analyzed per second of video.
+        dedup_max_distance: Most differing hash bits between near-duplicates, negative to disable.
+        dedup_window_seconds: Longest time between a representative frame and its duplicates.
+    """
+
+    def __init__(
+        self,
+        video: str,
+        *,
+        min_frames_per_minute: float,
+        max_frames_per_minute: float,
+        scene_threshold: float,
+        analysis_fps: float,
+        dedup_max_distance: int,
+        dedup_window_seconds: float,
+    ):
+        self.video_path = video
+        self.frame_times = _cached_plan_frames(
+            video, min_frames_per_minute, max_frames_per_minute, scene_threshold, analysis_fps
+        )
+        self.container = av.open(video)
+        self.stream = self.container.streams.video[0]
+        self.video_start_time = self.stream.start_time or 0
+        self.video_framerate = float(self.stream.average_rate or 0)
+        self.deduplicator = FrameDeduplicator(dedup_max_distance, dedup_window_seconds)
+        self.next_pos = 0
+
+    @classmethod
+    def input_schema(cls) -> dict[str, ts.ColumnType]:
+        return {
+            "video": ts.VideoType(nullable=False),
+            "min_frames_per_minute": ts.FloatType(nullable=False),
+            "max_frames_per_minute": ts.FloatType(nullable=False),
+            "scene_threshold": ts.FloatType(nullable=False),
+            "analysis_fps": ts.FloatType(nullable=False),
+            **DEDUP_INPUT_SCHEMA,
+        }
+
+    @classmethod
+    def output_schema(cls, *args: Any, **kwargs: Any) -> tuple[dict[str, ts.ColumnType], list[str]]:
+        return {
+            "frame_idx": ts.IntType(),
+            "pos_msec": ts.FloatType(),
+            "pos_frame": ts.IntType(),
+            "frame": ts.ImageType(),
+            **DEDUP_OUTPUT_SCHEMA,
+        }, ["frame"]
+
+    def __next__(self) -> dict[str, Any]:
+        if self.next_pos >= len(self.frame_times):
+            raise StopIteration
+        frame, time = self._decode_at(self.frame_times[self.next_pos])
+        image = frame.to_image()
+        assert isinstance(image, PIL.Image.Image)
+        frame_hash, representative_idx = self.deduplicator.add(self.next_pos, time, image)
+        result = {
+            "frame_idx": self.next_pos,
+            "pos_msec": time * 1000,
+            "pos_frame": round(time * self.video_framerate),
+            "frame": image,
+            "frame_hash": frame_hash,
+            "representative_idx": representative_idx,
+        }
+        self.next_pos += 1
+        return result
+
+    def _decode_at(self, target: float) -> Tuple[av.VideoFrame, float]:
+        """Decode the first frame at or after a timestamp, or the last one if it is past the end."""
+        seek_pos = int(target / self.stream.time_base) + self.video_start_time
+        # Lands on the keyframe before the target, the frames up to the target are decoded
+        self.container.seek(seek_pos, backward=True, stream=self.stream)
+        half_frame = 0.5 / self.video_framerate if self.video_framerate else 0.0
+        last = None
+        for frame in self.container.decode(self.stream):
+            if frame.pts is None:
+                continue
+            time = float((frame.pts - self.video_start_time) * self.stream.time_base)
+            last = (frame, time)
+            if time >= target - half_frame:
+                break
+        if last is None:
+            raise StopIteration
+        return last
+
+    def close(self) -> None:
+        self.container.close()
+
+    def set_pos(self, pos: int) -> None:
+        # Every frame is decoded after a seek of its own. Pixeltable only seeks to read the
+        # unstored frames again, the groups of duplicates were stored while reading in order.
+        if pos != self.next_pos:
+            self.deduplicator.reset()
+        self.next_pos = pos
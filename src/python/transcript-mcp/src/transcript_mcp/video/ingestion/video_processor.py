@@ -1,19 +1,25 @@
 import uuid
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 
 import pixeltable as pxt
 from loguru import logger
-from pixeltable.functions import openai
 from pixeltable.functions.huggingface import clip
-from pixeltable.functions.openai import embeddings, vision
+from pixeltable.functions.openai import embeddings
 from pixeltable.functions.video import extract_audio
 from pixeltable.iterators import AudioSplitter
-from pixeltable.iterators.video import FrameIterator
 
 import transcript_mcp.video.ingestion.registry as registry
 from transcript_mcp.config import get_settings
-from transcript_mcp.video.ingestion.functions import extract_text_from_chunk, resize_image
+from transcript_mcp.video.ingestion.functions import (
+    caption_image,
+    extract_text_from_chunk,
+    representative_frame,
+    resize_image,
+    transcribe_audio,
+)
+from transcript_mcp.video.ingestion.frame_dedup import DedupFrameIterator
+from transcript_mcp.video.ingestion.scene_sampler import SceneFrameIterator
 
 if TYPE_CHECKING:
     from transcript_mcp.video.ingestion.models import CachedTable
@@ -21,6 +27,9 @@ if TYPE_CHECKING:
 logger = logger.bind(name="VideoProcessor")
 settings = get_settings()
 
+# Called with (stage, completed_stages, total_stages) as ingestion moves through its stages
+ProgressCallback = Callable[[str, int, int], None]
+
 
 class VideoProcessor:
     def __init__(
@@ -34,7 +43,7 @@ class VideoProcessor:
 
         logger.info(
             "VideoProcessor initialized",
-            f"\n Split FPS: {settings.SPLIT_FRAMES_COUNT}",
+            f"\n Frame sampling: {settings.FRAME_SAMPLING}",
             f"\n Audio Chunk: {settings.AUDIO_CHUNK_LENGTH} seconds",
         )
 
@@ -56,14 +65,8 @@ class VideoProcessor:
             self.audio_view_name = f"{self.video_table_name}_audio_chunks"
             self.video_table = None
 
-            self._setup_table()
-
-            registry.add_index_to_registry(
-                video_name=self._video_mapping_idx,
-                video_cache=self.pxt_cache,
-                frames_view_name=self.frames_view_name,
-                audio_view_name=self.audio_view_name,
-            )
+            self._setup_cache_directory()
+            self._create_video_table()
             logger.info(f"Creating new video index '{self.video_table_name}' in '{self.pxt_cache}'")
 
     def _check_if_exists(self, video_path: str) -> bool:
@@ -76,14 +79,7 @@ class VideoProcessor:
         Returns:
             bool: True if all components exist, False otherwise.
         """
-        existing_tables = registry.get_registry()
-        return video_path in existing_tables
-
-    def _setup_table(self):
-        self._setup_cache_directory()
-        self._create_video_table()
-        self._setup_audio_processing()
-        self._setup_frame_processing()
+        return registry.index_exists(video_path)
 
     def _setup_cache_directory(self):
         logger.info(f"Creating cache path {self.pxt_cache}.")
@@ -97,12 +93,22 @@ class VideoProcessor:
             if_exists="replace_force",
         )
 
-    def _setup_audio_processing(self):
+    def _run_audio_extraction(self):
         self._add_audio_extraction()
         self._create_audio_chunks_view()
+
+    def _run_transcription(self):
         self._add_audio_transcription()
         self._add_audio_text_extraction()
+
+    def _run_frame_captioning(self):
+        self._create_frames_view()
+        self._add_frame_captioning()
+
+    def _run_indexing(self):
         self._add_audio_embedding_index()
+        self._add_frame_embedding_index()
+        self._add_caption_embedding_index()
 
     def _add_audio_extraction(self):
         self.video_table.add_computed_column(
@@ -125,7 +131,8 @@ class VideoProcessor:
 
     def _add_audio_transcription(self):
         self.audio_chunks.add_computed_column(
-            transcription=openai.transcriptions(
+            # One call per chunk, run concurrently under the adaptive transcription limit
+            transcription=transcribe_audio(
                 audio=self.audio_chunks.audio_chunk,
                 model=settings.AUDIO_TRANSCRIPT_MODEL,
             ),
@@ -146,26 +153,50 @@ class VideoProcessor:
             idx_name="chunks_index",
         )
 
-    def _setup_frame_processing(self):
-        self._create_frames_view()
-        self._add_frame_embedding_index()
-        self._add_frame_captioning()
-        self._add_caption_embedding_index()
-
     def _create_frames_view(self):
+        dedup_max_distance = settings.FRAME_DEDUP_MAX_DISTANCE if settings.FRAME_DEDUP_ENABLED else -1
+        if settings.FRAME_SAMPLING == "scenes":
+            # Frames per scene, so captioning and embedding costs follow the visual content
+            iterator = SceneFrameIterator.create(
+                video=self.video_table.video,
+                min_frames_per_minute=settings.SCENE_MIN_FRAMES_PER_MINUTE,
+                max_frames_per_minute=settings.SCENE_MAX_FRAMES_PER_MINUTE,
+                scene_threshold=settings.SCENE_CHANGE_THRESHOLD,
+                analysis_fps=settings.SCENE_ANALYSIS_FPS,
+                dedup_max_distance=dedup_max_distance,
+                dedup_window_seconds=settings.FRAME_DEDUP_WINDOW_SECONDS,
+            )
+        else:
+            iterator = DedupFrameIterator.create(
+                video=self.video_table.video,
+                num_frames=settings.SPLIT_FRAMES_COUNT,
+                dedup_max_distance=dedup_max_distance,
+                dedup_window_seconds=settings.FRAME_DEDUP_WINDOW_SECONDS,
+            )
         self.frames_view = pxt.create_view(
             self.frames_view_name,
             self.video_table,
-            iterator=FrameIterator.create(video=self.video_table.video, num_frames=settings.SPLIT_FRAMES_COUNT),
+            iterator=iterator,
             if_exists="ignore",
         )
         self.frames_view.add_computed_column(
+            # Only representative frames are resized, near-duplicates are left out of the
+            # captions and embedding indexes and share those of their representative
             resized_frame=resize_image(
-                self.frames_view.frame,
+                representative_frame(
+                    self.frames_view.frame,
+                    self.frames_view.frame_idx,
+                    self.frames_view.representative_idx,
+                ),
                 width=settings.IMAGE_RESIZE_WIDTH,
                 height=settings.IMAGE_RESIZE_HEIGHT,
             )
         )
+        frames = self.frames_view.count()
+        representatives = self.frames_view.where(
+            self.frames_view.frame_idx == self.frames_view.representative_idx
+        ).count()
+        logger.info(f"Kept {representatives} of {frames} frames, the others are near-duplicates")
 
     def _add_frame_embedding_index(self):
         self.frames_view.add_embedding_index(
@@ -176,9 +207,10 @@ class VideoProcessor:
 
     def _add_frame_captioning(self):
         self.frames_view.add_computed_column(
-            im_caption=vision(
-                prompt=settings.CAPTION_MODEL_PROMPT,
+            # One call per representative frame, run concurrently under the adaptive captioning limit
+            im_caption=caption_image(
                 image=self.frames_view.resized_frame,
+                prompt=settings.CAPTION_MODEL_PROMPT,
                 model=settings.IMAGE_CAPTION_MODEL,
             )
         )
@@ -190,12 +222,19 @@ class VideoProcessor:
             if_exists="replace_force",
         )
 
-    def add_video(self, video_path: str) -> bool:
+    def add_video(self, video_path: str, progress_callback: Optional[ProgressCallback] = None) -> bool:
         """
-        Add a video to the pixel table.
+        Add a video to the pixel table and run the ingestion pipeline on it.
+
+        The video row is inserted first and each stage then adds its views, computed columns
+        and indexes, which pixeltable fills in for the existing row. This makes every stage a
+        real step of the work, so progress can be reported between them. The index is only
+        registered once all stages are done, so searches never see a half-built index.
 
         Args:
             video_path (str): The path to the video file.
+            progress_callback (Optional[ProgressCallback]): Called before each stage and once
+                ingestion is done.
         """
         if not self.video_table:
             raise ValueError("Video table is not initialized. Call setup_table() first.")
@@ -203,4 +242,25 @@ class VideoProcessor:
         logger.info(f"Adding video {video_path} to table {self.video_table_name}")
         self.video_table.insert([{"video": video_path}])
 
+        stages = [
+            ("audio_extraction", self._run_audio_extraction),
+            ("transcription", self._run_transcription),
+            ("frame_captioning", self._run_frame_captioning),
+            ("indexing", self._run_indexing),
+        ]
+        for step, (stage, run_stage) in enumerate(stages):
+            logger.info(f"Running ingestion stage '{stage}' for {video_path}")
+            if progress_callback:
+                progress_callback(stage, step, len(stages))
+            run_stage()
+
+        registry.add_index_to_registry(
+            video_name=self._video_mapping_idx,
+            video_cache=self.pxt_cache,
+            frames_view_name=self.frames_view_name,
+            audio_view_name=self.audio_view_name,
+        )
+        if progress_callback:
+            progress_callback("completed", len(stages), len(stages))
+
         return True
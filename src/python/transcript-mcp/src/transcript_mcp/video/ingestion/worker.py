@@ -0,0 +1,55 @@
+import multiprocessing
+from typing import Any, Optional
+
+# Runs in the ingestion worker processes started by the ingestion job manager, see jobs.py
+
+# Carries (job_id, stage, step, total) back to the server
+_progress_queue: Optional["multiprocessing.Queue"] = None
+# Set by the server when the job this process runs is cancelled, a worker runs one job at a time
+_cancel_event: Optional[Any] = None
+
+
+class IngestionCancelled(Exception):
+    pass
+
+
+def init_worker(progress_queue: "multiprocessing.Queue"):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def raise_if_cancelled():
+    """Stop the running ingestion if its job was cancelled, called before each stage and remote call."""
+    if _cancel_event is not None and _cancel_event.is_set():
+        raise IngestionCancelled("The ingestion job was cancelled")
+
+
+def ingest_video(job_id: str, video_path: str, cancel_event: Any):
+    """
+    Build the index of a video and register it.
+
+    Args:
+        job_id (str): The ingestion job, progress is reported under its id.
+        video_path (str): Path to the video file to process.
+        cancel_event (Any): A manager `Event` proxy, set when the job is cancelled.
+
+    Raises:
+        IngestionCancelled: If the job was cancelled before the index was registered.
+    """
+    global _cancel_event
+    from transcript_mcp.video.ingestion.video_processor import VideoProcessor
+
+    def report_progress(stage: str, step: int, total: int):
+        if step < total:
+            # The last report comes once the index is registered, there is nothing left to stop
+            raise_if_cancelled()
+        _progress_queue.put((job_id, stage, step, total))
+
+    _cancel_event = cancel_event
+    try:
+        # The processor holds the state of the index being built
+        video_processor = VideoProcessor()
+        video_processor.setup_table(video_name=video_path)
+        video_processor.add_video(video_path=video_path, progress_callback=report_progress)
+    finally:
+        _cancel_event = None
@@ -0,0 +1,257 @@
+import heapq
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from loguru import logger
+from pixeltable.exprs import ColumnRef
+
+import transcript_mcp.video.ingestion.registry as registry
+from transcript_mcp.config import get_settings
+from transcript_mcp.metrics import counter, gauge, register_collector
+from transcript_mcp.video.ingestion.models import CachedTableMetadata
+from transcript_mcp.video.video_search_engine import VideoSearchEngine, embedding_executor, reciprocal_rank_fusion
+
+logger = logger.bind(name="LibrarySearch")
+
+settings = get_settings()
+
+MODALITIES = ("speech", "caption")
+
+
+class _Block(NamedTuple):
+    """The rows of one modality of one video, with their normalized embeddings."""
+
+    rows: List[Dict[str, Any]]
+    matrix: np.ndarray
+    model: str
+
+
+class _LibraryMatrix(NamedTuple):
+    """The rows of one modality of every video embedded by the same model."""
+
+    modality: str
+    column: ColumnRef  # Its embedding index embeds the queries
+    matrix: np.ndarray
+    rows: List[Dict[str, Any]]
+    owners: List[Tuple[str, VideoSearchEngine]]  # The video of each row
+
+
+class LibraryIndex:
+    """Library-wide embeddings of every indexed video, one matrix per modality and embedding model.
+
+    A library search embeds the query once per matrix and ranks the chunks and captions of
+    every video with a single matrix product. The engines of the videos are opened here rather
+    than through the search engine cache, so library searches neither reopen the videos it
+    evicted nor evict the videos searched one at a time.
+
+    Each search reads the generation of the registry. When it moved, videos registered,
+    re-indexed or removed since, by this process or another, are loaded or dropped and the
+    matrices rebuilt. Videos load outside the lock guarding the matrices: while one search
+    loads them, the others rank the matrices already built. The embeddings of each video are
+    then views into the matrices, so they are held once.
+    """
+
+    def __init__(self):
+        self._videos: Dict[str, Tuple[CachedTableMetadata, VideoSearchEngine, Dict[str, _Block]]] = {}
+        # Videos that failed to load, not retried until their registry entry changes
+        self._failed: Dict[str, CachedTableMetadata] = {}
+        # Videos invalidated since the running refresh listed the registry
+        self._invalidated: Set[str] = set()
+        self._matrices: List[_LibraryMatrix] = []
+        # Registry generation the matrices were built from, None before the first build
+        self._generation: Optional[int] = None
+        self._dirty = False
+        # Guards the videos and matrices; rankings run on a snapshot of the matrices
+        self._lock = threading.Lock()
+        # Loads hit pixeltable, which isn't thread-safe, so one refresh runs at a time
+        self._refresh_lock = threading.Lock()
+        self.loads = 0
+        self.rebuilds = 0
+
+    def invalidate(self, video_name: str):
+        """Drop the embeddings of a video, the next search loads it again."""
+        with self._lock:
+            self._failed.pop(video_name, None)
+            self._invalidated.add(video_name)
+            if self._videos.pop(video_name, None) is not None:
+                self._dirty = True
+
+    def search(self, query: str, speech_top_k: int, caption_top_k: int) -> Dict[str, List[Dict[str, Any]]]:
+        """Search the speech and captions of every indexed video.
+
+        Args:
+            query (str): The search query to match against speech content and frame captions.
+            speech_top_k (int): Number of speech results to return, across the library.
+            caption_top_k (int): Number of caption results to return, across the library.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: The `speech` and `caption` results, best first,
+                shaped like the ones of `VideoSearchEngine.search_text` with a `video_name` key.
+        """
+        matrices = self._current_matrices()
+
+        queries = [embedding_executor.submit(VideoSearchEngine.embed_query, m.column, query) for m in matrices]
+        top_k = {"speech": speech_top_k, "caption": caption_top_k}
+        results: Dict[str, List[Dict[str, Any]]] = {modality: [] for modality in MODALITIES}
+        for library_matrix, query_embedding in zip(matrices, queries):
+            modality = library_matrix.modality
+            similarities = library_matrix.matrix @ query_embedding.result()
+            for idx in _top_indexes(similarities, top_k[modality]):
+                video_name, engine = library_matrix.owners[idx]
+                clip = engine.clip(modality, library_matrix.rows[idx], float(similarities[idx]))
+                results[modality].append({**clip, "video_name": video_name})
+
+        # Matrices of the same modality only differ when videos were indexed with different models
+        return {
+            modality: heapq.nlargest(top_k[modality], clips, key=lambda clip: clip["similarity"])
+            for modality, clips in results.items()
+        }
+
+    def _current_matrices(self) -> List[_LibraryMatrix]:
+        generation = registry.generation()
+        with self._lock:
+            if generation == self._generation and not self._dirty:
+                return self._matrices
+            built = self._generation is not None
+
+        # Once built, searches don't wait for another search refreshing the matrices
+        if self._refresh_lock.acquire(blocking=not built):
+            try:
+                self._refresh()
+            finally:
+                self._refresh_lock.release()
+        with self._lock:
+            return self._matrices
+
+    def _refresh(self):
+        # Called with the refresh lock held
+        generation = registry.generation()
+        registered = {metadata.video_name: metadata for metadata in registry.list_index_metadata()}
+        with self._lock:
+            self._invalidated.clear()
+            pending = [
+                (video_name, metadata)
+                for video_name, metadata in registered.items()
+                if (video_name not in self._videos or self._videos[video_name][0] != metadata)
+                and self._failed.get(video_name) != metadata
+            ]
+
+        loaded, failed = {}, {}
+        for video_name, metadata in pending:
+            try:
+                loaded[video_name] = (metadata, *self._load(video_name))
+            except Exception as e:
+                logger.warning(f"Skipping video index '{video_name}' in library search: {e}")
+                failed[video_name] = metadata
+
+        with self._lock:
+            # A video invalidated while it loaded may have been read before it was re-indexed
+            stale = self._invalidated.intersection(loaded)
+            for video_name in stale:
+                del loaded[video_name]
+            self._failed.update(failed)
+            changed = self._dirty or bool(loaded)
+            for video_name in list(self._videos):
+                if registered.get(video_name) != self._videos[video_name][0]:
+                    del self._videos[video_name]
+                    changed = True
+            for video_name, entry in loaded.items():
+                self._failed.pop(video_name, None)
+                self._videos[video_name] = entry
+
+            if changed:
+                self._matrices = self._build()
+            self._generation = generation
+            self._dirty = bool(stale)
+
+    def _load(self, video_name: str) -> Tuple[VideoSearchEngine, Dict[str, _Block]]:
+        engine = VideoSearchEngine(video_name)
+        blocks = {}
+        for modality in MODALITIES:
+            rows, matrix = engine.fetch_embeddings(modality)
+            model = VideoSearchEngine.embedding_model(engine.embedding_column(modality))
+            blocks[modality] = _Block(rows, matrix, model)
+        # Caption results span the near-duplicates of their frame, read them now
+        engine.load_frame_spans()
+        self.loads += 1
+        return engine, blocks
+
+    def _build(self) -> List[_LibraryMatrix]:
+        groups: Dict[Tuple[str, str], List[Tuple[str, VideoSearchEngine, _Block]]] = {}
+        for video_name, (_, engine, blocks) in self._videos.items():
+            for modality, block in blocks.items():
+                if block.rows:
+                    groups.setdefault((modality, block.model), []).append((video_name, engine, block))
+
+        matrices = []
+        for (modality, _), members in groups.items():
+            matrix = np.concatenate([block.matrix for _, _, block in members])
+            rows: List[Dict[str, Any]] = []
+            owners: List[Tuple[str, VideoSearchEngine]] = []
+            for video_name, engine, block in members:
+                # The block of the video now shares the memory of the library matrix
+                offset = len(rows)
+                self._videos[video_name][2][modality] = block._replace(matrix=matrix[offset : offset + len(block.rows)])
+                rows += block.rows
+                owners += [(video_name, engine)] * len(block.rows)
+            matrices.append(_LibraryMatrix(modality, members[0][1].embedding_column(modality), matrix, rows, owners))
+
+        self.rebuilds += 1
+        logger.info(f"Built the library matrices of {len(self._videos)} videos, {self._memory_bytes() / 1024**2:.1f} MiB")
+        return matrices
+
+    def _memory_bytes(self) -> int:
+        return sum(m.matrix.nbytes for m in self._matrices)
+
+    def render_metrics(self) -> List[str]:
+        videos, memory = len(self._videos), self._memory_bytes()
+        prefix = "transcript_mcp_library_index"
+        return [
+            *gauge(f"{prefix}_videos", "Videos loaded in the library-wide matrices.", videos),
+            *gauge(f"{prefix}_memory_bytes", "Memory of the library-wide embedding matrices.", memory),
+            *counter(f"{prefix}_loads_total", "Videos whose embeddings were loaded for library search.", self.loads),
+            *counter(f"{prefix}_rebuilds_total", "Rebuilds of the library-wide matrices.", self.rebuilds),
+        ]
+
+
+def _top_indexes(similarities: np.ndarray, top_k: int) -> np.ndarray:
+    """Indexes of the `top_k` largest similarities, best first."""
+    if len(similarities) > top_k:
+        candidates = np.argpartition(-similarities, top_k)[:top_k]
+    else:
+        candidates = np.arange(len(similarities))
+    return candidates[np.argsort(-similarities[candidates])]
+
+
+library_index = LibraryIndex()
+register_collector(library_index.render_metrics)
+
+
+def search_library(query: str, top_k: int, speech_top_k: int, caption_top_k: int) -> List[Dict[str, Any]]:
+    """Search the speech and captions of every indexed video at once.
+
+    Each modality is ranked across the whole library by `LibraryIndex`. Similarities of the
+    same embedding model are comparable across videos, so both library-wide rankings are then
+    fused with reciprocal rank fusion.
+
+    Args:
+        query (str): The search query to match against speech content and frame captions.
+        top_k (int): Number of fused hits to return.
+        speech_top_k (int): Number of speech results, across the library, taking part in the fusion.
+        caption_top_k (int): Number of caption results, across the library, taking part in the fusion.
+
+    Returns:
+        List[Dict[str, Any]]: Hits, best first, with keys:
+            - video_name (str): The video the hit was found in
+            - start_time (float): Start time in seconds
+            - end_time (float): End time in seconds
+            - score (float): Fused score
+            - ranks (Dict[str, int]): Rank of the hit in the library-wide speech and caption results
+    """
+    start = time.perf_counter()
+    rankings = library_index.search(query, speech_top_k, caption_top_k)
+    hits = reciprocal_rank_fusion(rankings, k=settings.HYBRID_SEARCH_RRF_K)[:top_k]
+    logger.info(f"Searched the library in {time.perf_counter() - start:.3f}s")
+    return hits
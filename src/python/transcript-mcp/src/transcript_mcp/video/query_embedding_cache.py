@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from loguru import logger
+
+from transcript_mcp.config import get_settings
+from transcript_mcp.metrics import counter, gauge, register_collector
+
+logger = logger.bind(name="QueryEmbeddingCache")
+
+settings = get_settings()
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query embeddings keyed by (model, text).
+
+    Embedding a query is the expensive part of a search, often a remote API call, while the
+    lookup that follows is cheap. Entries are shared by every search method and every video
+    that uses the same embedding model.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, model: str, text: str, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """Return the cached embedding of `text` for `model`, computing and storing it on a miss.
+
+        Args:
+            model (str): Identifies the embedding model, and its parameters.
+            text (str): The query text.
+            compute (Callable[[], np.ndarray]): Computes the embedding on a miss. It runs
+                outside the lock, so concurrent misses don't wait for each other.
+
+        Returns:
+            np.ndarray: The embedding, read-only since it is shared.
+        """
+        key = (model, text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embedding
+            self.misses += 1
+
+        embedding = compute()
+        embedding.flags.writeable = False
+
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return embedding
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def render_metrics(self) -> List[str]:
+        stats = self.stats()
+        prefix = "transcript_mcp_query_embedding_cache"
+        return [
+            *counter(f"{prefix}_hits_total", "Query embeddings served from the cache.", stats["hits"]),
+            *counter(f"{prefix}_misses_total", "Query embeddings computed.", stats["misses"]),
+            *counter(f"{prefix}_evictions_total", "Query embeddings evicted from the cache.", stats["evictions"]),
+            *gauge(f"{prefix}_entries", "Query embeddings currently cached.", stats["entries"]),
+            *gauge(f"{prefix}_hit_rate", "Share of lookups served from the cache.", stats["hit_rate"]),
+        ]
+
+
+query_embedding_cache = QueryEmbeddingCache(settings.QUERY_EMBEDDING_CACHE_SIZE)
+register_collector(query_embedding_cache.render_metrics)
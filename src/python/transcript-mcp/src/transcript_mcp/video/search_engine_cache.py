@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from loguru import logger
+
+import transcript_mcp.video.ingestion.registry as registry
+from transcript_mcp.config import get_settings
+from transcript_mcp.metrics import counter, gauge, register_collector
+from transcript_mcp.video.ingestion.models import CachedTableMetadata
+from transcript_mcp.video.video_search_engine import VideoSearchEngine
+
+logger = logger.bind(name="SearchEngineCache")
+
+settings = get_settings()
+
+
+class SearchEngineCache:
+    """Process-wide LRU cache of open search engines, keyed by video.
+
+    Opening an engine looks up three pixeltable tables, and its first searches load the stored
+    embeddings of the video. Keeping engines open makes the setup of a query a dictionary
+    lookup, next to a primary key read of the registry. Each entry remembers the registry
+    metadata it was opened from: a video re-indexed into new tables, possibly by another
+    process, gets a fresh engine on its next lookup.
+
+    The cache is bounded by a number of engines and by the memory of their loaded embeddings.
+    Embeddings load lazily after an engine is handed out, so the memory cap is enforced on the
+    next lookup.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[CachedTableMetadata, VideoSearchEngine]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, video_name: str) -> VideoSearchEngine:
+        """Return the search engine of a video, opening it on first use.
+
+        Args:
+            video_name (str): The name of the video index.
+
+        Returns:
+            VideoSearchEngine: The shared search engine of the video.
+
+        Raises:
+            ValueError: If the video index is not found in registry.
+        """
+        metadata = registry.get_index(video_name)
+        with self._lock:
+            entry = self._entries.get(video_name)
+            if entry is not None:
+                if metadata is not None and entry[0] == metadata:
+                    self._entries.move_to_end(video_name)
+                    self.hits += 1
+                    self._evict(keep=video_name)
+                    return entry[1]
+                del self._entries[video_name]
+                self.invalidations += 1
+                logger.info(f"Video index '{video_name}' changed since its search engine was opened, reopening it")
+            self.misses += 1
+
+        # Opening tables hits the database, other videos stay served meanwhile
+        engine = VideoSearchEngine(video_name)
+
+        with self._lock:
+            self._entries[video_name] = (metadata, engine)
+            self._entries.move_to_end(video_name)
+            self._evict(keep=video_name)
+        return engine
+
+    def invalidate(self, video_name: str):
+        """Drop the engine of a video, the next lookup opens it again."""
+        with self._lock:
+            if self._entries.pop(video_name, None) is not None:
+                self.invalidations += 1
+
+    def _evict(self, keep: str):
+        # Called with the lock held, the engine being handed out is never evicted
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._memory_bytes() > self.max_bytes
+        ):
+            video_name = next(iter(self._entries))
+            if video_name == keep:
+                self._entries.move_to_end(video_name)
+                video_name = next(iter(self._entries))
+            del self._entries[video_name]
+            self.evictions += 1
+            logger.info(f"Evicted search engine of '{video_name}' from the cache")
+
+    def _memory_bytes(self) -> int:
+        return sum(engine.memory_bytes() for _, engine in self._entries.values())
+
+    def render_metrics(self) -> List[str]:
+        with self._lock:
+            entries = len(self._entries)
+            memory = self._memory_bytes()
+            hits, misses, evictions, invalidations = self.hits, self.misses, self.evictions, self.invalidations
+        prefix = "transcript_mcp_search_engine_cache"
+        return [
+            *counter(f"{prefix}_hits_total", "Searches served by an open engine.", hits),
+            *counter(f"{prefix}_misses_total", "Search engines opened.", misses),
+            *counter(f"{prefix}_evictions_total", "Search engines evicted from the cache.", evictions),
+            *counter(f"{prefix}_invalidations_total", "Search engines dropped after a re-index.", invalidations),
+            *gauge(f"{prefix}_entries", "Search engines currently open.", entries),
+            *gauge(f"{prefix}_memory_bytes", "Memory of the embeddings loaded by open engines.", memory),
+        ]
+
+
+search_engine_cache = SearchEngineCache(
+    max_entries=settings.SEARCH_ENGINE_CACHE_SIZE,
+    max_bytes=settings.SEARCH_ENGINE_CACHE_MAX_MB * 1024 * 1024,
+)
+register_collector(search_engine_cache.render_metrics)
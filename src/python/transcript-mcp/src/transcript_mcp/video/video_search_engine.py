@@ -1,15 +1,86 @@
-from typing import Any, Dict, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pixeltable.exprs import ColumnRef
 
 import transcript_mcp.video.ingestion.registry as registry
 from transcript_mcp.config import get_settings
 from transcript_mcp.video.ingestion.models import CachedTable
 from transcript_mcp.video.ingestion.tools import decode_image
+from transcript_mcp.video.query_embedding_cache import query_embedding_cache
 
 settings = get_settings()
 
+# Query embeddings call remote APIs or local models but never the database, so the
+# modalities of a hybrid search are embedded concurrently in these threads
+embedding_executor = ThreadPoolExecutor(thread_name_prefix="query-embedding")
+
+
+def _time_ranges_overlap(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    # Results of a library-wide search only overlap within the same video
+    if a.get("video_name") != b.get("video_name"):
+        return False
+    return a["start_time"] < b["end_time"] and b["start_time"] < a["end_time"]
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[Dict[str, Any]]], k: int) -> List[Dict[str, Any]]:
+    """Merge ranked lists of time ranges from several modalities.
+
+    Raw similarities from different embedding models aren't comparable, so each result only
+    contributes `1 / (k + rank)` from its own list. Results of different modalities whose time
+    ranges overlap are the same moment of the video: they are merged into one range whose
+    score adds up their contributions, each modality counting once.
+
+    Args:
+        rankings (Dict[str, List[Dict[str, Any]]]): Results per modality, best first, with
+            `start_time` and `end_time` keys, and a `video_name` key when they span videos.
+        k (int): Damping constant, larger values flatten the difference between ranks.
+
+    Returns:
+        List[Dict[str, Any]]: Merged time ranges, best first, with keys:
+            - start_time (float): Start time in seconds
+            - end_time (float): End time in seconds
+            - score (float): Fused score
+            - ranks (Dict[str, int]): Rank of the range in each modality that found it
+            - video_name (str): The video of the range, when the results carry one
+    """
+    fused: List[Dict[str, Any]] = []
+    for modality, results in rankings.items():
+        for rank, result in enumerate(results, start=1):
+            score = 1.0 / (k + rank)
+            for candidate in fused:
+                if modality not in candidate["ranks"] and _time_ranges_overlap(candidate, result):
+                    candidate["start_time"] = min(candidate["start_time"], result["start_time"])
+                    candidate["end_time"] = max(candidate["end_time"], result["end_time"])
+                    candidate["score"] += score
+                    candidate["ranks"][modality] = rank
+                    break
+            else:
+                candidate = {
+                    "start_time": result["start_time"],
+                    "end_time": result["end_time"],
+                    "score": score,
+                    "ranks": {modality: rank},
+                }
+                if "video_name" in result:
+                    candidate["video_name"] = result["video_name"]
+                fused.append(candidate)
+    return sorted(fused, key=lambda candidate: candidate["score"], reverse=True)
+
 
 class VideoSearchEngine:
-    """A class that provides video search capabilities using different modalities."""
+    """A class that provides video search capabilities using different modalities.
+
+    Text queries are embedded once per model through a process-wide cache, then ranked by
+    exact cosine similarity against the stored embeddings of the video, which are loaded on
+    first use. Videos have at most a few hundred chunks and frames, so this beats a database
+    round trip that would embed the query again.
+
+    Only representative frames are captioned and embedded, a frame result spans the
+    near-duplicates of its representative too.
+    """
 
     def __init__(self, video_name: str):
         """Initialize the video search engine.
@@ -24,6 +95,15 @@ class VideoSearchEngine:
         if not self.video_index:
             raise ValueError(f"Video index {video_name} not found in registry.")
         self.video_name = video_name
+        self._embeddings: Dict[str, Tuple[List[Dict[str, Any]], np.ndarray]] = {}
+        # Engines are shared between concurrent tool calls, load each modality once
+        self._embeddings_lock = threading.Lock()
+        self._frame_spans: Optional[Dict[int, Tuple[float, float]]] = None
+        self._memory_bytes = 0
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the loaded embeddings and their rows."""
+        return self._memory_bytes
 
     def search_by_speech(self, query: str, top_k: int) -> List[Dict[str, Any]]:
         """Search video clips by speech similarity.
@@ -38,22 +118,7 @@ class VideoSearchEngine:
                 - end_time (float): End time in seconds
                 - similarity (float): Similarity score
         """
-        sims = self.video_index.audio_chunks_view.chunk_text.similarity(query)
-        results = self.video_index.audio_chunks_view.select(
-            self.video_index.audio_chunks_view.pos,
-            self.video_index.audio_chunks_view.start_time_sec,
-            self.video_index.audio_chunks_view.end_time_sec,
-            similarity=sims,
-        ).order_by(sims, asc=False)
-
-        return [
-            {
-                "start_time": float(entry["start_time_sec"]),
-                "end_time": float(entry["end_time_sec"]),
-                "similarity": float(entry["similarity"]),
-            }
-            for entry in results.limit(top_k).collect()
-        ]
+        return [self._speech_clip(row, similarity) for row, similarity in self._search("speech", query, top_k)]
 
     def search_by_image(self, image_base64: str, top_k: int) -> List[Dict[str, Any]]:
         """Search video clips by image similarity.
@@ -69,21 +134,16 @@ class VideoSearchEngine:
                 - similarity (float): Similarity score
         """
         image = decode_image(image_base64)
-        sims = self.video_index.frames_view.resized_frame.similarity(image)
-        results = self.video_index.frames_view.select(
-            self.video_index.frames_view.pos_msec,
-            self.video_index.frames_view.resized_frame,
-            similarity=sims,
-        ).order_by(sims, asc=False)
+        view = self.video_index.frames_view
+        sims = view.resized_frame.similarity(image)
+        # Near-duplicates have no frame nor embedding, which would sort first
+        results = (
+            view.where(view.resized_frame != None)  # noqa: E711
+            .select(view.frame_idx, view.pos_msec, similarity=sims)
+            .order_by(sims, asc=False)
+        )
 
-        return [
-            {
-                "start_time": entry["pos_msec"] / 1000.0 - settings.DELTA_SECONDS_FRAME_INTERVAL,
-                "end_time": entry["pos_msec"] / 1000.0 + settings.DELTA_SECONDS_FRAME_INTERVAL,
-                "similarity": float(entry["similarity"]),
-            }
-            for entry in results.limit(top_k).collect()
-        ]
+        return [self._frame_clip(entry, float(entry["similarity"])) for entry in results.limit(top_k).collect()]
 
     def search_by_caption(self, query: str, top_k: int) -> List[Dict[str, Any]]:
         """Search video clips by caption similarity.
@@ -98,21 +158,7 @@ class VideoSearchEngine:
                 - end_time (float): End time in seconds
                 - similarity (float): Similarity score
         """
-        sims = self.video_index.frames_view.im_caption.similarity(query)
-        results = self.video_index.frames_view.select(
-            self.video_index.frames_view.pos_msec,
-            self.video_index.frames_view.im_caption,
-            similarity=sims,
-        ).order_by(sims, asc=False)
-
-        return [
-            {
-                "start_time": entry["pos_msec"] / 1000.0 - settings.DELTA_SECONDS_FRAME_INTERVAL,
-                "end_time": entry["pos_msec"] / 1000.0 + settings.DELTA_SECONDS_FRAME_INTERVAL,
-                "similarity": float(entry["similarity"]),
-            }
-            for entry in results.limit(top_k).collect()
-        ]
+        return [self._frame_clip(row, similarity) for row, similarity in self._search("caption", query, top_k)]
 
     def get_speech_info(self, query: str, top_k: int) -> List[Dict[str, Any]]:
         """Get speech text information based on query similarity.
@@ -126,18 +172,9 @@ class VideoSearchEngine:
                 - text (str): The speech text
                 - similarity (float): Similarity score
         """
-        sims = self.video_index.audio_chunks_view.chunk_text.similarity(query)
-        results = self.video_index.audio_chunks_view.select(
-            self.video_index.audio_chunks_view.chunk_text,
-            similarity=sims,
-        ).order_by(sims, asc=False)
-
         return [
-            {
-                "text": entry["chunk_text"],
-                "similarity": float(entry["similarity"]),
-            }
-            for entry in results.limit(top_k).collect()
+            {"text": row["chunk_text"], "similarity": similarity}
+            for row, similarity in self._search("speech", query, top_k)
         ]
 
     def get_caption_info(self, query: str, top_k: int) -> List[Dict[str, Any]]:
@@ -152,16 +189,210 @@ class VideoSearchEngine:
                 - caption (str): The frame caption
                 - similarity (float): Similarity score
         """
-        sims = self.video_index.frames_view.im_caption.similarity(query)
-        results = self.video_index.frames_view.select(
-            self.video_index.frames_view.im_caption,
-            similarity=sims,
-        ).order_by(sims, asc=False)
-
         return [
-            {
-                "caption": entry["im_caption"],
-                "similarity": float(entry["similarity"]),
-            }
-            for entry in results.limit(top_k).collect()
+            {"caption": row["im_caption"], "similarity": similarity}
+            for row, similarity in self._search("caption", query, top_k)
         ]
+
+    def get_captions_info(self, queries: List[str], top_k: int) -> List[List[Dict[str, Any]]]:
+        """Get caption information for several queries at once.
+
+        The queries are embedded concurrently while the stored caption embeddings are loaded,
+        then all of them are ranked with a single matrix product.
+
+        Args:
+            queries (List[str]): The search queries to match against frame captions.
+            top_k (int): Number of results to return per query.
+
+        Returns:
+            List[List[Dict[str, Any]]]: The results of each query, in order, shaped like the
+                ones of `get_caption_info`.
+        """
+        column = self.embedding_column("caption")
+        embeddings = [embedding_executor.submit(self.embed_query, column, query) for query in queries]
+
+        rows, matrix = self.load_embeddings("caption")
+        queries_matrix = np.stack([embedding.result() for embedding in embeddings], axis=1) if queries else None
+        if not rows or queries_matrix is None:
+            return [[] for _ in queries]
+
+        results = []
+        for similarities in (matrix @ queries_matrix).T:
+            best = np.argsort(-similarities)[:top_k]
+            results.append([{"caption": rows[idx]["im_caption"], "similarity": float(similarities[idx])} for idx in best])
+        return results
+
+    def search_text(self, query: str, speech_top_k: int, caption_top_k: int) -> Dict[str, List[Dict[str, Any]]]:
+        """Search video clips by speech and caption similarity at once.
+
+        The query is embedded for both modalities concurrently while the stored embeddings are
+        loaded, so the latency is the one of the slowest modality rather than their sum.
+
+        Args:
+            query (str): The search query to match against speech content and frame captions.
+            speech_top_k (int): Number of speech results to return.
+            caption_top_k (int): Number of caption results to return.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: The `speech` and `caption` results, best first,
+                shaped like the ones of `search_by_speech` and `search_by_caption`.
+        """
+        speech_query = embedding_executor.submit(self.embed_query, self.embedding_column("speech"), query)
+        caption_query = embedding_executor.submit(self.embed_query, self.embedding_column("caption"), query)
+
+        # Database access stays on this thread, pixeltable transactions are not thread-safe
+        speech_rows, speech_matrix = self.load_embeddings("speech")
+        caption_rows, caption_matrix = self.load_embeddings("caption")
+
+        return {
+            "speech": [
+                self._speech_clip(row, similarity)
+                for row, similarity in self._rank(speech_rows, speech_matrix, speech_query.result(), speech_top_k)
+            ],
+            "caption": [
+                self._frame_clip(row, similarity)
+                for row, similarity in self._rank(caption_rows, caption_matrix, caption_query.result(), caption_top_k)
+            ],
+        }
+
+    def search_hybrid(self, query: str, top_k: int, speech_top_k: int, caption_top_k: int) -> List[Dict[str, Any]]:
+        """Search video clips by speech and caption similarity at once, fusing both rankings.
+
+        Both modalities are searched concurrently by `search_text`, their rankings are merged
+        with reciprocal rank fusion.
+
+        Args:
+            query (str): The search query to match against speech content and frame captions.
+            top_k (int): Number of fused results to return.
+            speech_top_k (int): Number of speech results taking part in the fusion.
+            caption_top_k (int): Number of caption results taking part in the fusion.
+
+        Returns:
+            List[Dict[str, Any]]: List of dictionaries containing clip information with keys:
+                - start_time (float): Start time in seconds
+                - end_time (float): End time in seconds
+                - score (float): Fused score
+                - ranks (Dict[str, int]): Rank of the clip in the speech and caption results
+        """
+        rankings = self.search_text(query, speech_top_k, caption_top_k)
+        return reciprocal_rank_fusion(rankings, k=settings.HYBRID_SEARCH_RRF_K)[:top_k]
+
+    def clip(self, modality: str, row: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+        """Turn a row loaded by `load_embeddings` into the time range of a search result."""
+        if modality == "speech":
+            return self._speech_clip(row, similarity)
+        return self._frame_clip(row, similarity)
+
+    @staticmethod
+    def _speech_clip(row: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+        return {
+            "start_time": float(row["start_time_sec"]),
+            "end_time": float(row["end_time_sec"]),
+            "similarity": similarity,
+        }
+
+    def _frame_clip(self, row: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+        first_msec, last_msec = self.load_frame_spans().get(row["frame_idx"], (row["pos_msec"], row["pos_msec"]))
+        return {
+            "start_time": first_msec / 1000.0 - settings.DELTA_SECONDS_FRAME_INTERVAL,
+            "end_time": last_msec / 1000.0 + settings.DELTA_SECONDS_FRAME_INTERVAL,
+            "similarity": similarity,
+        }
+
+    def load_frame_spans(self) -> Dict[int, Tuple[float, float]]:
+        """Load the first and last timestamps, in milliseconds, of each representative frame's group."""
+        with self._embeddings_lock:
+            if self._frame_spans is None:
+                self._frame_spans = self._fetch_frame_spans()
+                # Two floats and an int per entry, with the dict overhead
+                self._memory_bytes += 100 * len(self._frame_spans)
+        return self._frame_spans
+
+    def _fetch_frame_spans(self) -> Dict[int, Tuple[float, float]]:
+        view = self.video_index.frames_view
+        if not hasattr(view, "representative_idx"):
+            # Indexed before near-duplicates were grouped, every frame stands for itself
+            return {}
+        spans: Dict[int, Tuple[float, float]] = {}
+        for row in view.select(view.pos_msec, view.representative_idx).collect():
+            pos_msec = row["pos_msec"]
+            first_msec, last_msec = spans.get(row["representative_idx"], (pos_msec, pos_msec))
+            spans[row["representative_idx"]] = (min(first_msec, pos_msec), max(last_msec, pos_msec))
+        return spans
+
+    def _search(self, modality: str, query: str, top_k: int) -> List[Tuple[Dict[str, Any], float]]:
+        embedding = self.embed_query(self.embedding_column(modality), query)
+        rows, matrix = self.load_embeddings(modality)
+        return self._rank(rows, matrix, embedding, top_k)
+
+    def embedding_column(self, modality: str) -> ColumnRef:
+        """The column whose embedding index serves a modality, `speech` or `caption`."""
+        if modality == "speech":
+            return self.video_index.audio_chunks_view.chunk_text
+        return self.video_index.frames_view.im_caption
+
+    # `.similarity()` only runs the query inside pixeltable, reaching the embedding function of an
+    # index goes through `find_embedding_index` and `string_embed`, which aren't public. They are
+    # stable within a minor version, hence the `pixeltable<0.5` pin in pyproject.toml.
+    @staticmethod
+    def embedding_model(column: ColumnRef) -> str:
+        """Identify the model embedding queries for a column, e.g. `embeddings(..., model='text-embedding-3-small')`."""
+        (index_info,) = column.find_embedding_index(None, "similarity").values()
+        return str(index_info.idx.string_embed)
+
+    @staticmethod
+    def embed_query(column: ColumnRef, query: str) -> np.ndarray:
+        """Embed a text query with the embedding function of the column's index, through the cache."""
+        (index_info,) = column.find_embedding_index(None, "similarity").values()
+        embed = index_info.idx.string_embed
+
+        def compute() -> np.ndarray:
+            embedding = np.asarray(embed.exec([query], {}), dtype=np.float32)
+            return embedding / (np.linalg.norm(embedding) or 1.0)
+
+        # The bound template, e.g. embeddings(..., model='text-embedding-3-small'), identifies the model
+        return query_embedding_cache.get_or_compute(str(embed), query, compute)
+
+    def load_embeddings(self, modality: str) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """Load the rows of a modality with their stored embeddings, normalized for cosine similarity."""
+        with self._embeddings_lock:
+            if modality not in self._embeddings:
+                rows, matrix = self.fetch_embeddings(modality)
+                self._embeddings[modality] = (rows, matrix)
+                self._memory_bytes += matrix.nbytes + sum(len(str(value)) for row in rows for value in row.values())
+        return self._embeddings[modality]
+
+    def fetch_embeddings(self, modality: str) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """Read the rows of a modality with their stored embeddings, without keeping them in the engine."""
+        if modality == "speech":
+            view = self.video_index.audio_chunks_view
+            rows = view.select(
+                view.start_time_sec,
+                view.end_time_sec,
+                view.chunk_text,
+                embedding=view.chunk_text.embedding(),
+            ).collect()
+        else:
+            view = self.video_index.frames_view
+            rows = view.select(
+                view.frame_idx,
+                view.pos_msec,
+                view.im_caption,
+                embedding=view.im_caption.embedding(),
+            ).collect()
+
+        rows = [row for row in rows if row["embedding"] is not None]
+        matrix = np.asarray([row.pop("embedding") for row in rows], dtype=np.float32).reshape(len(rows), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return rows, matrix / np.where(norms == 0, 1.0, norms)
+
+    @staticmethod
+    def _rank(
+        rows: List[Dict[str, Any]], matrix: np.ndarray, query: np.ndarray, top_k: int
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Return the `top_k` rows most similar to the query, with their cosine similarity."""
+        if not rows:
+            return []
+        similarities = matrix @ query
+        best = np.argsort(-similarities)[:top_k]
+        return [(rows[idx], float(similarities[idx])) for idx in best]
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Settings are read when transcript_mcp is imported, give the tests keys that are never used
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("OPIK_API_KEY", "test")
+# The process-wide clip cache creates its directory on import
+os.environ.setdefault("CLIP_CACHE_DIR", tempfile.mkdtemp(prefix="transcript-mcp-clips-"))
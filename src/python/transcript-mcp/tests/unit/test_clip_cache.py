@@ -0,0 +1,186 @@
+import asyncio
+import os
+
+import pytest
+
+from transcript_mcp.video.clip_cache import ClipCache
+
+CLIP_SIZE = 100
+
+
+class FakeEngine:
+    """Writes clips of CLIP_SIZE bytes, optionally waiting to be released first."""
+
+    def __init__(self, block: bool = False):
+        self.block = block
+        self.release = asyncio.Event()
+        self.started = asyncio.Event()
+        self.cancelled = False
+        self.extractions: list[tuple[str, float, float]] = []
+
+    async def extract(self, video_path: str, start_time: float, end_time: float, output_path: str):
+        self.extractions.append((video_path, start_time, end_time))
+        self.started.set()
+        try:
+            if self.block:
+                await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        with open(output_path, "wb") as f:
+            f.write(b"\0" * CLIP_SIZE)
+
+
+async def wait_for_coalesced(cache: ClipCache, requests: int):
+    # Requests hash the source video in a thread before joining the extraction
+    while cache.coalesced < requests:
+        await asyncio.sleep(0.001)
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=10))
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"video content")
+    return str(path)
+
+
+@pytest.fixture
+def clips_dir(tmp_path):
+    return tmp_path / "clips"
+
+
+def test_clip_is_extracted_once_then_served_from_the_cache(clips_dir, video):
+    async def scenario():
+        engine = FakeEngine()
+        cache = ClipCache(str(clips_dir), 10 * CLIP_SIZE, engine)
+        first = await cache.get_or_extract(video, 1.0, 5.0)
+        second = await cache.get_or_extract(video, 1.0, 5.0)
+        return engine, cache, first, second
+
+    engine, cache, first, second = run(scenario())
+    assert first == second
+    assert os.path.getsize(first) == CLIP_SIZE
+    assert len(engine.extractions) == 1
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert not list(clips_dir.glob("*.partial.mp4"))
+
+
+def test_copies_of_a_video_share_their_clips(clips_dir, video, tmp_path):
+    copy = tmp_path / "copy.mp4"
+    copy.write_bytes(b"video content")
+
+    async def scenario():
+        engine = FakeEngine()
+        cache = ClipCache(str(clips_dir), 10 * CLIP_SIZE, engine)
+        return engine, await cache.get_or_extract(video, 1.0, 5.0), await cache.get_or_extract(str(copy), 1.0, 5.0)
+
+    engine, first, second = run(scenario())
+    assert first == second
+    assert len(engine.extractions) == 1
+
+
+def test_concurrent_requests_wait_for_the_same_extraction(clips_dir, video):
+    async def scenario():
+        engine = FakeEngine(block=True)
+        cache = ClipCache(str(clips_dir), 10 * CLIP_SIZE, engine)
+        requests = [asyncio.create_task(cache.get_or_extract(video, 1.0, 5.0)) for _ in range(3)]
+        await wait_for_coalesced(cache, 2)
+        engine.release.set()
+        return engine, cache, await asyncio.gather(*requests)
+
+    engine, cache, paths = run(scenario())
+    assert len(set(paths)) == 1
+    assert len(engine.extractions) == 1
+    assert (cache.misses, cache.coalesced) == (1, 2)
+
+
+def test_a_cancelled_request_leaves_the_extraction_to_the_others(clips_dir, video):
+    async def scenario():
+        engine = FakeEngine(block=True)
+        cache = ClipCache(str(clips_dir), 10 * CLIP_SIZE, engine)
+        cancelled = asyncio.create_task(cache.get_or_extract(video, 1.0, 5.0))
+        waiting = asyncio.create_task(cache.get_or_extract(video, 1.0, 5.0))
+        await wait_for_coalesced(cache, 1)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        engine.release.set()
+        return engine, await waiting, cancelled
+
+    engine, path, cancelled = run(scenario())
+    assert cancelled.cancelled()
+    assert not engine.cancelled
+    assert os.path.isfile(path)
+
+
+def test_the_last_request_cancelled_cancels_the_extraction(clips_dir, video):
+    async def scenario():
+        engine = FakeEngine(block=True)
+        cache = ClipCache(str(clips_dir), 10 * CLIP_SIZE, engine)
+        request = asyncio.create_task(cache.get_or_extract(video, 1.0, 5.0))
+        await engine.started.wait()
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        await asyncio.sleep(0.01)
+        return engine, cache
+
+    engine, cache = run(scenario())
+    assert engine.cancelled
+    assert cache._in_flight == {}
+    assert cache._entries == {}
+    assert list(clips_dir.iterdir()) == []
+
+
+def test_least_recently_used_clips_are_evicted_beyond_the_quota(clips_dir, video):
+    async def scenario():
+        cache = ClipCache(str(clips_dir), 2 * CLIP_SIZE + CLIP_SIZE // 2, FakeEngine())
+        first = await cache.get_or_extract(video, 0.0, 1.0)
+        second = await cache.get_or_extract(video, 1.0, 2.0)
+        # A hit makes the first clip the most recently used
+        await cache.get_or_extract(video, 0.0, 1.0)
+        third = await cache.get_or_extract(video, 2.0, 3.0)
+        return cache, first, second, third
+
+    cache, first, second, third = run(scenario())
+    assert os.path.isfile(first) and os.path.isfile(third)
+    assert not os.path.exists(second)
+    assert cache.total_bytes == 2 * CLIP_SIZE
+    assert cache.evictions == 1
+
+
+def test_a_clip_larger_than_the_quota_is_kept(clips_dir, video):
+    async def scenario():
+        cache = ClipCache(str(clips_dir), CLIP_SIZE // 2, FakeEngine())
+        first = await cache.get_or_extract(video, 0.0, 1.0)
+        second = await cache.get_or_extract(video, 1.0, 2.0)
+        return cache, first, second
+
+    cache, first, second = run(scenario())
+    assert not os.path.exists(first)
+    assert os.path.isfile(second)
+    assert cache.total_bytes == CLIP_SIZE
+
+
+def test_cached_clips_are_found_again_on_startup(clips_dir, video):
+    async def scenario():
+        path = await ClipCache(str(clips_dir), 10 * CLIP_SIZE, FakeEngine()).get_or_extract(video, 0.0, 1.0)
+        (clips_dir / "upload.mp4").write_bytes(b"not a clip")
+
+        engine = FakeEngine()
+        cache = ClipCache(str(clips_dir), 10 * CLIP_SIZE, engine)
+        return engine, cache, path, await cache.get_or_extract(video, 0.0, 1.0)
+
+    engine, cache, path, again = run(scenario())
+    assert again == path
+    assert engine.extractions == []
+    assert cache.total_bytes == CLIP_SIZE
+
+
+def test_empty_time_ranges_are_rejected(clips_dir, video):
+    cache = ClipCache(str(clips_dir), 10 * CLIP_SIZE, FakeEngine())
+    with pytest.raises(ValueError):
+        run(cache.get_or_extract(video, 5.0, 5.0))
@@ -0,0 +1,78 @@
+import numpy as np
+import PIL.Image
+import pytest
+
+from transcript_mcp.video.ingestion import frame_dedup
+from transcript_mcp.video.ingestion.frame_dedup import FrameDeduplicator, hamming_distance, perceptual_hash
+
+
+def picture(seed: int, size: tuple[int, int] = (320, 180)) -> PIL.Image.Image:
+    # Smooth random blobs, closer to a video frame than pixel noise
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, size=(9, 16, 3), dtype=np.uint8)
+    return PIL.Image.fromarray(small).resize(size, PIL.Image.Resampling.BICUBIC)
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    """Frames stand for their own hash, so the tests pick the distances between them."""
+    monkeypatch.setattr(frame_dedup, "perceptual_hash", lambda frame_hash: frame_hash)
+
+
+def test_perceptual_hash_survives_resizing_and_small_changes():
+    image = picture(0)
+    resized = image.resize((640, 360), PIL.Image.Resampling.BILINEAR)
+    cursor = image.copy()
+    cursor.paste((255, 255, 255), (100, 100, 108, 108))
+    assert hamming_distance(perceptual_hash(image), perceptual_hash(resized)) <= 4
+    assert hamming_distance(perceptual_hash(image), perceptual_hash(cursor)) <= 8
+
+
+def test_perceptual_hash_tells_different_pictures_apart():
+    assert hamming_distance(perceptual_hash(picture(0)), perceptual_hash(picture(1))) > 16
+
+
+def test_hamming_distance():
+    assert hamming_distance(0b1011, 0b0010) == 2
+    assert hamming_distance(2**64 - 1, 0) == 64
+
+
+def test_near_duplicates_point_to_their_representative(hashes):
+    deduplicator = FrameDeduplicator(max_distance=2, window_seconds=60)
+    assert deduplicator.add(0, 0.0, 0b0000) == ("0000000000000000", 0)
+    assert deduplicator.add(1, 5.0, 0b0011)[1] == 0
+    assert deduplicator.add(2, 10.0, 0b1111_0000)[1] == 2
+    assert deduplicator.add(3, 15.0, 0b0111_0000)[1] == 2
+
+
+def test_duplicates_join_the_closest_representative(hashes):
+    deduplicator = FrameDeduplicator(max_distance=3, window_seconds=60)
+    deduplicator.add(0, 0.0, 0b0000_0000)
+    deduplicator.add(1, 1.0, 0b1111_0000)
+    assert deduplicator.add(2, 2.0, 0b0111_0000)[1] == 1
+
+
+def test_slow_changes_do_not_drift_into_one_group(hashes):
+    # Each frame is one bit away from the previous one, but the third is two from the first
+    deduplicator = FrameDeduplicator(max_distance=1, window_seconds=60)
+    representatives = [deduplicator.add(idx, idx, frame_hash)[1] for idx, frame_hash in enumerate([0b0, 0b1, 0b11])]
+    assert representatives == [0, 0, 2]
+
+
+def test_representatives_expire_after_the_window(hashes):
+    deduplicator = FrameDeduplicator(max_distance=2, window_seconds=10)
+    deduplicator.add(0, 0.0, 0b0)
+    assert deduplicator.add(1, 10.0, 0b0)[1] == 0
+    assert deduplicator.add(2, 10.5, 0b0)[1] == 2
+
+
+def test_negative_max_distance_disables_deduplication(hashes):
+    deduplicator = FrameDeduplicator(max_distance=-1, window_seconds=60)
+    assert [deduplicator.add(idx, idx, 0b0)[1] for idx in range(3)] == [0, 1, 2]
+
+
+def test_reset_forgets_the_representatives(hashes):
+    deduplicator = FrameDeduplicator(max_distance=2, window_seconds=60)
+    deduplicator.add(0, 0.0, 0b0)
+    deduplicator.reset()
+    assert deduplicator.add(5, 1.0, 0b0)[1] == 5
@@ -0,0 +1,154 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from transcript_mcp.video.ingestion.rate_limiter import AdaptiveLimiter, _retry_after
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/audio/transcriptions")
+
+
+def rate_limit_error(headers: dict | None = None) -> openai.RateLimitError:
+    response = httpx.Response(429, headers=headers, request=REQUEST)
+    return openai.RateLimitError("Rate limited", response=response, body=None)
+
+
+def limiter(max_concurrency: int = 4, **kwargs) -> AdaptiveLimiter:
+    return AdaptiveLimiter("Test", max_concurrency=max_concurrency, backoff_seconds=0.0, **kwargs)
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=10))
+
+
+def test_calls_in_flight_never_exceed_the_limit():
+    rate_limiter = limiter(max_concurrency=3)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        peak = max(peak, rate_limiter.in_flight)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(*(rate_limiter.call(request) for _ in range(10)))
+
+    assert run(scenario()) == ["ok"] * 10
+    assert peak == 3
+    assert rate_limiter.in_flight == 0
+    assert rate_limiter.requests == 10
+
+
+def test_rate_limit_halves_the_limit_once_per_burst():
+    rate_limiter = limiter(max_concurrency=8)
+    attempts = 0
+
+    async def request():
+        nonlocal attempts
+        attempts += 1
+        if attempts <= 4:
+            await asyncio.sleep(0.01)
+            raise rate_limit_error({"retry-after-ms": "20"})
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(*(rate_limiter.call(request) for _ in range(4)))
+
+    assert run(scenario()) == ["ok"] * 4
+    # The four calls failed together, so the limit is halved once, then grows back by 1/limit per success
+    assert 4 < rate_limiter.limit < 5
+    assert rate_limiter.rate_limited == 4
+    assert rate_limiter.retries == 4
+
+
+def test_rate_limit_pauses_every_call_for_the_delay_the_api_asks_for():
+    rate_limiter = limiter()
+    started = []
+
+    async def rate_limited_once():
+        if not started:
+            started.append("rate limited")
+            raise rate_limit_error({"retry-after": "0.2"})
+
+    async def request():
+        started.append(asyncio.get_running_loop().time())
+
+    async def scenario():
+        start = asyncio.get_running_loop().time()
+        first = asyncio.create_task(rate_limiter.call(rate_limited_once))
+        await asyncio.sleep(0.05)
+        await asyncio.gather(first, rate_limiter.call(request))
+        return start
+
+    start = run(scenario())
+    assert started[1] - start >= 0.2
+
+
+def test_successes_grow_the_limit_up_to_max_concurrency():
+    rate_limiter = limiter(max_concurrency=4)
+    rate_limiter.limit = 1.0
+
+    async def request():
+        return "ok"
+
+    async def scenario():
+        for _ in range(20):
+            await rate_limiter.call(request)
+
+    run(scenario())
+    assert rate_limiter.limit == 4
+
+
+def test_other_errors_are_not_retried():
+    rate_limiter = limiter()
+    attempts = 0
+
+    async def request():
+        nonlocal attempts
+        attempts += 1
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        run(rate_limiter.call(request))
+    assert attempts == 1
+    assert rate_limiter.in_flight == 0
+
+
+def test_transient_errors_are_retried_without_lowering_the_limit():
+    rate_limiter = limiter(max_retries=2)
+    attempts = 0
+
+    async def request():
+        nonlocal attempts
+        attempts += 1
+        raise openai.APIConnectionError(request=REQUEST)
+
+    with pytest.raises(openai.APIConnectionError):
+        run(rate_limiter.call(request))
+    assert attempts == 3
+    assert rate_limiter.retries == 2
+    assert rate_limiter.limit == 4
+
+
+def test_requests_per_minute_spaces_the_calls():
+    rate_limiter = limiter(requests_per_minute=600)
+    started = []
+
+    async def request():
+        started.append(asyncio.get_running_loop().time())
+
+    async def scenario():
+        await asyncio.gather(*(rate_limiter.call(request) for _ in range(3)))
+
+    run(scenario())
+    assert started[2] - started[0] >= 0.19
+
+
+@pytest.mark.parametrize(
+    "headers, delay",
+    [({"retry-after-ms": "1500"}, 1.5), ({"retry-after": "3"}, 3.0), ({"retry-after": "Wed, 21 Oct 2015"}, None), ({}, None)],
+)
+def test_retry_after(headers, delay):
+    assert _retry_after(rate_limit_error(headers)) == delay
@@ -0,0 +1,66 @@
+import pytest
+
+from transcript_mcp.video.video_search_engine import reciprocal_rank_fusion
+
+
+def clip(start_time: float, end_time: float, **extra) -> dict:
+    return {"start_time": start_time, "end_time": end_time, **extra}
+
+
+def test_single_modality_keeps_its_order():
+    fused = reciprocal_rank_fusion({"speech": [clip(10, 20), clip(30, 40)]}, k=60)
+    assert [(hit["start_time"], hit["ranks"]) for hit in fused] == [(10, {"speech": 1}), (30, {"speech": 2})]
+    assert fused[0]["score"] == pytest.approx(1 / 61)
+    assert fused[1]["score"] == pytest.approx(1 / 62)
+
+
+def test_overlapping_ranges_of_different_modalities_are_merged():
+    fused = reciprocal_rank_fusion(
+        {"speech": [clip(10, 20), clip(50, 60)], "caption": [clip(15, 25)]},
+        k=60,
+    )
+    assert len(fused) == 2
+    assert fused[0] == {
+        "start_time": 10,
+        "end_time": 25,
+        "score": pytest.approx(2 / 61),
+        "ranks": {"speech": 1, "caption": 1},
+    }
+
+
+def test_agreement_between_modalities_beats_a_single_first_rank():
+    fused = reciprocal_rank_fusion(
+        {"speech": [clip(0, 5), clip(100, 110)], "caption": [clip(200, 210), clip(105, 106)]},
+        k=60,
+    )
+    assert (fused[0]["start_time"], fused[0]["end_time"]) == (100, 110)
+    assert fused[0]["ranks"] == {"speech": 2, "caption": 2}
+
+
+def test_each_modality_counts_once_per_range():
+    fused = reciprocal_rank_fusion({"speech": [clip(10, 20), clip(15, 25)]}, k=60)
+    assert [hit["ranks"] for hit in fused] == [{"speech": 1}, {"speech": 2}]
+
+
+def test_touching_ranges_do_not_overlap():
+    fused = reciprocal_rank_fusion({"speech": [clip(10, 20)], "caption": [clip(20, 30)]}, k=60)
+    assert len(fused) == 2
+
+
+def test_ranges_of_different_videos_are_never_merged():
+    fused = reciprocal_rank_fusion(
+        {"speech": [clip(10, 20, video_name="a.mp4")], "caption": [clip(10, 20, video_name="b.mp4")]},
+        k=60,
+    )
+    assert sorted(hit["video_name"] for hit in fused) == ["a.mp4", "b.mp4"]
+    assert all(len(hit["ranks"]) == 1 for hit in fused)
+
+
+def test_larger_k_flattens_the_scores():
+    rankings = {"speech": [clip(0, 1), clip(2, 3)]}
+    steep, flat = reciprocal_rank_fusion(rankings, k=1), reciprocal_rank_fusion(rankings, k=1000)
+    assert steep[0]["score"] / steep[1]["score"] > flat[0]["score"] / flat[1]["score"]
+
+
+def test_no_results():
+    assert reciprocal_rank_fusion({"speech": [], "caption": []}, k=60) == []
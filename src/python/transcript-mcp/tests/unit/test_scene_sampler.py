@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from transcript_mcp.video.ingestion import scene_sampler
+from transcript_mcp.video.ingestion.scene_sampler import (
+    HISTOGRAM_BINS,
+    KeyframeSamples,
+    allocate_frames,
+    plan_frames,
+    scene_change_scores,
+    split_scenes,
+)
+
+PIXELS = scene_sampler.THUMBNAIL_WIDTH * scene_sampler.THUMBNAIL_HEIGHT
+
+
+def samples(times: list[float], brightness: list[float], duration: float) -> KeyframeSamples:
+    """Uniform gray keyframes, a change of brightness is a cut."""
+    thumbnails = np.repeat(np.asarray(brightness, dtype=np.float32)[:, None], PIXELS, axis=1)
+    histograms = np.zeros((len(times), 3 * HISTOGRAM_BINS), dtype=np.float32)
+    for i, value in enumerate(brightness):
+        histograms[i, [c * HISTOGRAM_BINS + min(int(value * HISTOGRAM_BINS), HISTOGRAM_BINS - 1) for c in range(3)]] = 1
+    return KeyframeSamples(np.asarray(times, dtype=np.float64), thumbnails, histograms, duration)
+
+
+def test_allocate_frames_gives_every_scene_one_frame():
+    assert allocate_frames([5.0, 50.0, 1.0], 3) == [1, 1, 1]
+
+
+def test_allocate_frames_gives_the_rest_to_the_longest_time_per_frame():
+    assert allocate_frames([10.0, 40.0], 5) == [1, 4]
+    assert allocate_frames([30.0, 20.0, 10.0], 6) == [3, 2, 1]
+
+
+def test_allocate_frames_shares_all_frames():
+    counts = allocate_frames([7.0, 3.0, 12.5, 0.5], 17)
+    assert sum(counts) == 17
+    assert min(counts) == 1
+
+
+def test_split_scenes_keeps_the_boundaries_above_the_threshold():
+    scores = np.array([0.1, 0.6, 0.2, 0.9, 0.3])
+    assert split_scenes(scores, threshold=0.5, max_scenes=10) == [2, 4]
+
+
+def test_split_scenes_drops_the_weakest_boundaries_beyond_max_scenes():
+    scores = np.array([0.7, 0.6, 0.9, 0.8])
+    assert split_scenes(scores, threshold=0.5, max_scenes=3) == [3, 4]
+    assert split_scenes(scores, threshold=0.5, max_scenes=1) == []
+
+
+def test_split_scenes_without_boundaries():
+    assert split_scenes(np.zeros(4), threshold=0.5, max_scenes=3) == []
+    assert split_scenes(np.zeros(0), threshold=0.5, max_scenes=3) == []
+
+
+def test_scene_change_scores_are_high_on_cuts_only():
+    scores = scene_change_scores(samples([0, 1, 2, 3], [0.1, 0.1, 0.9, 0.9], duration=4))
+    assert scores.shape == (3,)
+    assert scores[0] == pytest.approx(0.0)
+    assert scores[1] > 0.5
+    assert scores[2] == pytest.approx(0.0)
+
+
+def test_scene_change_scores_of_a_single_sample():
+    assert len(scene_change_scores(samples([0], [0.5], duration=1))) == 0
+
+
+def test_plan_frames_samples_each_scene(monkeypatch):
+    # Two scenes of one minute each, cut at 60s
+    video = samples([0, 20, 40, 60, 80, 100], [0.1, 0.1, 0.1, 0.9, 0.9, 0.9], duration=120)
+    monkeypatch.setattr(scene_sampler, "sample_keyframes", lambda video_path, analysis_fps: video)
+    frame_times = plan_frames("video.mp4", 2, 10, scene_threshold=0.5, analysis_fps=1)
+    assert len(frame_times) == 4
+    assert sum(time < 60 for time in frame_times) == 2
+    assert frame_times == sorted(frame_times)
+
+
+def test_plan_frames_without_keyframes_samples_uniformly(monkeypatch):
+    video = samples([], [], duration=120)
+    monkeypatch.setattr(scene_sampler, "sample_keyframes", lambda video_path, analysis_fps: video)
+    assert plan_frames("video.mp4", 2, 10, scene_threshold=0.5, analysis_fps=1) == [15.0, 45.0, 75.0, 105.0]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from transcript_mcp.video.video_search_engine import VideoSearchEngine
+
+QUERY_EMBEDDINGS = {
+    "kickoff": np.array([1.0, 0.0, 0.0], dtype=np.float32),
+    "goal": np.array([0.0, 1.0, 0.0], dtype=np.float32),
+}
+
+
+class StubEngine(VideoSearchEngine):
+    """Ranks fixed caption embeddings, without pixeltable."""
+
+    def __init__(self, captions: list[tuple[str, list[float]]]):
+        self.rows = [{"im_caption": caption} for caption, _ in captions]
+        self.matrix = np.array([embedding for _, embedding in captions], dtype=np.float32).reshape(len(captions), 3)
+
+    def embedding_column(self, modality):
+        return modality
+
+    @staticmethod
+    def embed_query(column, query):
+        return QUERY_EMBEDDINGS[query]
+
+    def load_embeddings(self, modality):
+        return self.rows, self.matrix
+
+
+@pytest.fixture
+def engine():
+    return StubEngine(
+        [
+            ("players line up", [0.9, 0.1, 0.0]),
+            ("the ball hits the net", [0.1, 0.9, 0.0]),
+            ("the crowd cheers", [0.0, 0.6, 0.4]),
+        ]
+    )
+
+
+def test_get_captions_info_ranks_each_query(engine):
+    kickoff, goal = engine.get_captions_info(["kickoff", "goal"], top_k=2)
+    assert [entry["caption"] for entry in kickoff] == ["players line up", "the ball hits the net"]
+    assert [entry["caption"] for entry in goal] == ["the ball hits the net", "the crowd cheers"]
+    assert goal[0]["similarity"] == pytest.approx(0.9)
+
+
+def test_get_captions_info_matches_get_caption_info(engine):
+    (batched,) = engine.get_captions_info(["goal"], top_k=3)
+    assert batched == engine.get_caption_info("goal", top_k=3)
+
+
+def test_get_captions_info_without_captions_or_queries(engine):
+    assert StubEngine([]).get_captions_info(["kickoff", "goal"], top_k=2) == [[], []]
+    assert engine.get_captions_info([], top_k=2) == []
@@ -0,0 +1,3 @@
+from transcript_profiling.endpoints import profiling_endpoints
+
+__all__ = ["profiling_endpoints"]
@@ -0,0 +1,303 @@
+import asyncio
+import functools
+import hmac
+import io
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import FrameType
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from loguru import logger
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+
+logger = logger.bind(name="Profiling")
+
+Endpoint = Callable[[Request], Awaitable[Response]]
+
+DEFAULT_PROFILE_SECONDS = 10.0
+DEFAULT_SAMPLE_INTERVAL_MS = 5.0
+DEFAULT_LAG_INTERVAL_MS = 10.0
+DEFAULT_BLOCKING_THRESHOLD_MS = 100.0
+DEFAULT_TRACEMALLOC_FRAMES = 25
+
+# Samplers add overhead to every thread of the process, never run two at once
+_sampling_lock = threading.Lock()
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+
+class BadParameter(ValueError):
+    pass
+
+
+def _frame_label(frame: FrameType) -> str:
+    # Flamegraphs merge frames by label, so lines are left out to aggregate per function
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_qualname}".replace(";", ":")
+
+
+def _stack(frame: Optional[FrameType]) -> List[str]:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _collapsed(samples: Counter) -> str:
+    """Render stacks in the collapsed format read by flamegraph.pl, inferno and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+def sample_cpu(seconds: float, interval: float) -> Counter:
+    """Sample the Python stack of every thread at a fixed interval.
+
+    Samples are taken from a background thread, which needs the GIL to run: a thread holding
+    it in a long C call is only seen once the call returns.
+
+    Args:
+        seconds (float): How long to sample for.
+        interval (float): Seconds between two samples.
+
+    Returns:
+        Counter: Number of samples per collapsed stack, rooted at the thread name.
+    """
+    samples: Counter = Counter()
+    own_ident = threading.get_ident()
+    thread_names: dict[int, str] = {}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            if ident not in thread_names:
+                thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            thread_name = thread_names.get(ident, f"thread-{ident}")
+            samples[";".join([thread_name, *_stack(frame)])] += 1
+        time.sleep(interval)
+    return samples
+
+
+def dump_tasks() -> str:
+    """Describe every asyncio task of the running loop with the stack it is suspended at."""
+    tasks = sorted(asyncio.all_tasks(), key=lambda task: task.get_name())
+    out = io.StringIO()
+    out.write(f"{len(tasks)} tasks\n")
+    for task in tasks:
+        out.write(f"\n--- {task.get_name()}: {task.get_coro()!r}\n")
+        task.print_stack(file=out)
+    return out.getvalue()
+
+
+async def measure_loop_lag(seconds: float, interval: float, blocking_threshold: float) -> dict:
+    """Measure how late the event loop wakes up timers, and what blocks it.
+
+    A watchdog thread captures the stack of the loop thread whenever the loop hasn't woken up
+    for longer than `blocking_threshold`, pointing at the synchronous code that holds it.
+
+    Args:
+        seconds (float): How long to measure for.
+        interval (float): Seconds between two wake-ups of the loop.
+        blocking_threshold (float): Lag in seconds above which the loop is considered blocked.
+
+    Returns:
+        dict: Lag percentiles in milliseconds and the stacks seen while the loop was blocked.
+    """
+    loop = asyncio.get_running_loop()
+    loop_ident = threading.get_ident()
+    heartbeat = time.monotonic()
+    blocked_stacks: Counter = Counter()
+    stop = threading.Event()
+
+    def watchdog():
+        while not stop.wait(blocking_threshold / 2):
+            if time.monotonic() - heartbeat > blocking_threshold:
+                frame = sys._current_frames().get(loop_ident)
+                if frame is not None:
+                    blocked_stacks[";".join(_stack(frame))] += 1
+
+    watchdog_thread = threading.Thread(target=watchdog, name="loop-lag-watchdog", daemon=True)
+    watchdog_thread.start()
+
+    lags = []
+    deadline = loop.time() + seconds
+    try:
+        while loop.time() < deadline:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            heartbeat = time.monotonic()
+            lags.append(max(loop.time() - start - interval, 0.0))
+    finally:
+        stop.set()
+        await asyncio.to_thread(watchdog_thread.join)
+
+    lags.sort()
+
+    def percentile(q: float) -> float:
+        return round(lags[min(int(q * len(lags)), len(lags) - 1)] * 1000, 3) if lags else 0.0
+
+    return {
+        "samples": len(lags),
+        "interval_ms": interval * 1000,
+        "mean_ms": round(sum(lags) / len(lags) * 1000, 3) if lags else 0.0,
+        "p50_ms": percentile(0.5),
+        "p99_ms": percentile(0.99),
+        "max_ms": percentile(1.0),
+        "blocked_stacks": [{"stack": stack, "samples": count} for stack, count in blocked_stacks.most_common(20)],
+    }
+
+
+def memory_snapshot(top: int, collapsed: bool) -> str:
+    """Summarize the memory allocated since tracemalloc was started.
+
+    Args:
+        top (int): Number of allocation sites to list.
+        collapsed (bool): Return the allocation tracebacks as collapsed stacks weighted in bytes,
+            instead of the top allocation sites and their growth since the previous snapshot.
+
+    Returns:
+        str: The report.
+    """
+    global _last_snapshot
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        )
+    )
+
+    if collapsed:
+        samples: Counter = Counter()
+        for stat in snapshot.statistics("traceback"):
+            stack = ";".join(f"{frame.filename}:{frame.lineno}".replace(";", ":") for frame in stat.traceback)
+            samples[stack] += stat.size
+        return _collapsed(samples)
+
+    current, peak = tracemalloc.get_traced_memory()
+    out = io.StringIO()
+    out.write(f"Traced memory: current {current / 1024**2:.1f} MiB, peak {peak / 1024**2:.1f} MiB\n")
+    out.write(f"\nTop {top} allocation sites:\n")
+    for stat in snapshot.statistics("lineno")[:top]:
+        out.write(f"{stat}\n")
+    if _last_snapshot is not None:
+        out.write(f"\nTop {top} changes since the previous snapshot:\n")
+        for stat in snapshot.compare_to(_last_snapshot, "lineno")[:top]:
+            out.write(f"{stat}\n")
+    _last_snapshot = snapshot
+    return out.getvalue()
+
+
+def _param(request: Request, name: str, default: float, maximum: float) -> float:
+    raw = request.query_params.get(name)
+    if raw is None:
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        raise BadParameter(f"'{name}' must be a number")
+    if not 0 < value <= maximum:
+        raise BadParameter(f"'{name}' must be greater than 0 and at most {maximum:g}")
+    return value
+
+
+def _attachment(content: str, kind: str, extension: str) -> Response:
+    filename = f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.{extension}"
+    return PlainTextResponse(content, headers={"content-disposition": f'attachment; filename="{filename}"'})
+
+
+def _busy() -> Response:
+    return JSONResponse({"detail": "Another profile is already running"}, status_code=409)
+
+
+def profiling_endpoints(token: str, max_seconds: float) -> List[Tuple[str, List[str], Endpoint]]:
+    """Build the debug endpoints, each requiring `Authorization: Bearer <token>`.
+
+    Args:
+        token (str): The bearer token callers must present.
+        max_seconds (float): Upper bound of the duration of a single profile.
+
+    Returns:
+        List[Tuple[str, List[str], Endpoint]]: (path, methods, endpoint) of every route, for
+            the service to mount on its own application.
+    """
+
+    async def cpu_profile(request: Request) -> Response:
+        seconds = _param(request, "seconds", DEFAULT_PROFILE_SECONDS, max_seconds)
+        interval = _param(request, "interval_ms", DEFAULT_SAMPLE_INTERVAL_MS, 1000) / 1000
+        if not _sampling_lock.acquire(blocking=False):
+            return _busy()
+        try:
+            logger.info(f"Sampling CPU profile for {seconds:g}s every {interval * 1000:g}ms")
+            samples = await asyncio.to_thread(sample_cpu, seconds, interval)
+        finally:
+            _sampling_lock.release()
+        return _attachment(_collapsed(samples), "cpu", "folded")
+
+    async def tasks(request: Request) -> Response:
+        return PlainTextResponse(dump_tasks())
+
+    async def loop_lag(request: Request) -> Response:
+        seconds = _param(request, "seconds", DEFAULT_PROFILE_SECONDS, max_seconds)
+        interval = _param(request, "interval_ms", DEFAULT_LAG_INTERVAL_MS, 1000) / 1000
+        threshold = _param(request, "blocking_threshold_ms", DEFAULT_BLOCKING_THRESHOLD_MS, 60_000) / 1000
+        if not _sampling_lock.acquire(blocking=False):
+            return _busy()
+        try:
+            return JSONResponse(await measure_loop_lag(seconds, interval, threshold))
+        finally:
+            _sampling_lock.release()
+
+    async def memory_start(request: Request) -> Response:
+        frames = int(_param(request, "frames", DEFAULT_TRACEMALLOC_FRAMES, 100))
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"Started tracing memory allocations with {frames} frames")
+        return JSONResponse({"tracing": True, "frames": tracemalloc.get_traceback_limit()})
+
+    async def memory_stop(request: Request) -> Response:
+        global _last_snapshot
+        tracemalloc.stop()
+        _last_snapshot = None
+        logger.info("Stopped tracing memory allocations")
+        return JSONResponse({"tracing": False})
+
+    async def memory(request: Request) -> Response:
+        if not tracemalloc.is_tracing():
+            return JSONResponse(
+                {"detail": "Memory tracing is off, start it with POST /debug/memory/start"}, status_code=409
+            )
+        top = int(_param(request, "top", 25, 1000))
+        collapsed = request.query_params.get("format") == "collapsed"
+        report = await asyncio.to_thread(memory_snapshot, top, collapsed)
+        return _attachment(report, "memory", "folded") if collapsed else PlainTextResponse(report)
+
+    endpoints = [
+        ("/debug/profile/cpu", ["GET"], cpu_profile),
+        ("/debug/tasks", ["GET"], tasks),
+        ("/debug/loop-lag", ["GET"], loop_lag),
+        ("/debug/memory/start", ["POST"], memory_start),
+        ("/debug/memory/stop", ["POST"], memory_stop),
+        ("/debug/memory", ["GET"], memory),
+    ]
+    return [(path, methods, _authenticated(endpoint, token)) for path, methods, endpoint in endpoints]
+
+
+def _authenticated(endpoint: Endpoint, token: str) -> Endpoint:
+    expected = f"Bearer {token}".encode()
+
+    @functools.wraps(endpoint)
+    async def wrapper(request: Request) -> Response:
+        provided = request.headers.get("authorization", "").encode()
+        if not hmac.compare_digest(provided, expected):
+            return JSONResponse({"detail": "Not authenticated"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+        try:
+            return await endpoint(request)
+        except BadParameter as e:
+            return JSONResponse({"detail": str(e)}, status_code=400)
+
+    return wrapper